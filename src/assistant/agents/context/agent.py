@@ -2,14 +2,17 @@ from __future__ import annotations
 
 import json
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from sqlalchemy.orm import Session
 
 from assistant.config.settings import Settings
+from assistant.db.models import UserContextORM
+from assistant.db.repo_cards import CardsRepository
 from assistant.db.repo_context_snapshot import ContextSnapshotRepository
+from assistant.observability.tracing import traced
 from assistant.schemas.context import ContextUpdateOutput, StructuredUserContext
-from assistant.agents.context.evidence import build_context_evidence
+from assistant.agents.context.evidence import build_context_evidence, evidence_card_hash, evidence_fingerprint
 from assistant.agents.context.updater import ContextUpdateError, ContextUpdater
 
 
@@ -18,6 +21,8 @@ class ContextUpdateResult:
     updated: bool
     evidence_count: int
     messages: list[str]
+    # Set when the update was debounced: the time a trailing update should run.
+    retry_after: datetime | None = None
 
 
 class ContextAgent:
@@ -25,6 +30,7 @@ class ContextAgent:
         self.session = session
         self.settings = settings
         self.snapshot_repo = ContextSnapshotRepository(session)
+        self.cards_repo = CardsRepository(session)
         self.updater = ContextUpdater(settings)
 
     @staticmethod
@@ -32,26 +38,110 @@ class ContextAgent:
         empty = StructuredUserContext().model_dump(mode="json")
         return json.dumps(empty, ensure_ascii=False)
 
-    def update_context(self, card_id: int) -> ContextUpdateResult:
+    def _debounce_until(self, snapshot: UserContextORM, now: datetime) -> tuple[datetime, int] | None:
+        """End of the current update window if this update should wait, with the new-card count."""
+        window = self.settings.context_update_min_interval_seconds
+        if window <= 0 or snapshot.last_card_id is None:
+            return None
+        pending = self.cards_repo.count_after(snapshot.last_card_id)
+        # No new cards: fall through to the (cheap) evidence hash check instead.
+        if pending == 0 or pending >= self.settings.context_update_max_pending_cards:
+            return None
+        window_end = snapshot.updated_at + timedelta(seconds=window)
+        return (window_end, pending) if now < window_end else None
+
+    def _needs_full_refresh(self, snapshot: UserContextORM | None, force: bool) -> bool:
+        every = self.settings.context_full_refresh_every
+        if snapshot is None or force or every <= 0 or not snapshot.seen_evidence_json:
+            return True
+        return (snapshot.delta_updates_since_full or 0) >= every
+
+    @traced("context.update_context")
+    def update_context(
+        self, card_id: int, *, force: bool = False, debounce: bool = True, now: datetime | None = None
+    ) -> ContextUpdateResult:
+        """Refresh the context snapshot, coalescing bursts of ingests.
+
+        Within ``CONTEXT_UPDATE_MIN_INTERVAL_SECONDS`` of the last LLM update the call is
+        debounced (``retry_after`` says when to try again) unless
+        ``CONTEXT_UPDATE_MAX_PENDING_CARDS`` new cards have arrived, or ``debounce`` is off
+        because nothing would run the trailing update. The LLM is skipped
+        when the evidence set hashes the same as the one behind the current snapshot.
+
+        Otherwise only new or changed evidence cards are sent, next to a compact digest of
+        the previous context; every ``CONTEXT_FULL_REFRESH_EVERY`` updates (and on ``force``)
+        the full context and evidence are resent so drift cannot accumulate.
+        """
+        now = now or datetime.utcnow()
         snapshot = self.snapshot_repo.get_snapshot()
+        if snapshot is not None and debounce and not force:
+            window = self._debounce_until(snapshot, now)
+            if window is not None:
+                retry_after, pending = window
+                return ContextUpdateResult(
+                    updated=False,
+                    evidence_count=0,
+                    messages=[
+                        f"context update debounced: {pending} new cards, next update at "
+                        f"{retry_after.strftime('%H:%M:%S')} UTC"
+                    ],
+                    retry_after=retry_after,
+                )
+
         previous_context_json = snapshot.context_json if snapshot else self._default_context_json()
         evidence = build_context_evidence(self.session, max_cards=12)
         if not evidence:
             return ContextUpdateResult(updated=False, evidence_count=0, messages=["context unchanged: no evidence"])
 
+        latest_card_id = max(card_id, self.cards_repo.max_id())
+        fingerprint = evidence_fingerprint(evidence, salt=self.updater.prompt_version)
+        if snapshot is not None and snapshot.evidence_sha256 == fingerprint:
+            self.snapshot_repo.mark_seen(snapshot, last_card_id=latest_card_id)
+            return ContextUpdateResult(
+                updated=False,
+                evidence_count=len(evidence),
+                messages=["context unchanged: evidence identical to last update"],
+            )
+
+        current_hashes = {str(card.card_id): evidence_card_hash(card) for card in evidence}
+        full = self._needs_full_refresh(snapshot, force)
+        if full:
+            delta = evidence
+            seen_card_ids = None
+        else:
+            seen = snapshot.seen_evidence_json or {}
+            delta = [card for card in evidence if seen.get(str(card.card_id)) != current_hashes[str(card.card_id)]]
+            delta_ids = {card.card_id for card in delta}
+            seen_card_ids = [card.card_id for card in evidence if card.card_id not in delta_ids]
+            if not delta:
+                # Same cards, only reordered or some dropped out of the window: nothing new to fold in.
+                self.snapshot_repo.mark_seen(snapshot, last_card_id=latest_card_id, evidence_sha256=fingerprint)
+                return ContextUpdateResult(
+                    updated=False,
+                    evidence_count=len(evidence),
+                    messages=["context unchanged: no new evidence since last update"],
+                )
+
         try:
-            updated_output = self.updater.update(previous_context_json=previous_context_json, evidence=evidence)
-            now = datetime.utcnow()
+            updated_output = self.updater.update(
+                previous_context_json=previous_context_json,
+                evidence=delta,
+                seen_card_ids=seen_card_ids,
+            )
             self.snapshot_repo.upsert_snapshot(
                 context_json=updated_output.context.model_dump_json(),
                 focus_summary=updated_output.focus_summary,
                 updated_at=now,
+                evidence_sha256=fingerprint,
+                last_card_id=latest_card_id,
+                seen_evidence=current_hashes,
+                delta_updates_since_full=0 if full else (snapshot.delta_updates_since_full or 0) + 1,
             )
-            return ContextUpdateResult(
-                updated=True,
-                evidence_count=len(evidence),
-                messages=[f"context updated with {len(evidence)} evidence cards"],
-            )
+            if full:
+                message = f"context updated with {len(evidence)} evidence cards"
+            else:
+                message = f"context updated with {len(delta)} new of {len(evidence)} evidence cards (delta)"
+            return ContextUpdateResult(updated=True, evidence_count=len(evidence), messages=[message])
         except ContextUpdateError:
             # keep previous snapshot unchanged
             return ContextUpdateResult(
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import hashlib
+import json
+from dataclasses import asdict, dataclass
 from datetime import datetime
 
-from sqlalchemy import case, func
-from sqlalchemy.orm import Session, aliased
+from sqlalchemy import case, func, literal, select, union_all
+from sqlalchemy.orm import Session
 
 from assistant.db.models import CardORM, EnvelopeORM
 
@@ -22,93 +24,64 @@ class ContextEvidenceCard:
     created_at: datetime
 
 
-def build_context_evidence(session: Session, *, max_cards: int = 12) -> list[ContextEvidenceCard]:
-    # Query A: latest global cards (fixed window used by existing behavior).
-    latest_ids = [
-        row[0]
-        for row in (
-            session.query(CardORM.id)
-            .order_by(CardORM.created_at.desc())
-            .limit(6)
-            .all()
-        )
-    ]
-    if not latest_ids:
-        return []
-
-    # Query B: active envelopes.
-    active_envelope_ids = [
-        row[0]
-        for row in (
-            session.query(EnvelopeORM.id)
-            .order_by(EnvelopeORM.card_count.desc(), EnvelopeORM.updated_at.desc())
-            .limit(8)
-            .all()
-        )
-    ]
-
-    selected_ids = list(latest_ids)
-
-    # Query C: top-important card per active envelope using window function.
-    if active_envelope_ids:
-        keyword_count = func.coalesce(func.json_array_length(CardORM.keywords_json), 0)
-        importance_score = (
-            case((CardORM.card_type == "task", 2.0), (CardORM.card_type == "reminder", 1.5), else_=0.0)
-            + case((CardORM.due_at.is_not(None), 1.0), else_=0.0)
-            + case((CardORM.assignee_text.is_not(None), 0.6), else_=0.0)
-            + case((keyword_count > 5, 5), else_=keyword_count) * 0.15
-        )
-
-        ranked = (
-            session.query(
-                CardORM.id.label("card_id"),
-                CardORM.envelope_id.label("envelope_id"),
-                func.row_number()
-                .over(
-                    partition_by=CardORM.envelope_id,
-                    order_by=(importance_score.desc(), CardORM.created_at.desc()),
-                )
-                .label("rn"),
-            )
-            .filter(CardORM.envelope_id.in_(active_envelope_ids))
-            .subquery()
-        )
-
-        ranked_alias = aliased(ranked)
-        top_per_env_ids = [
-            row[0]
-            for row in (
-                session.query(ranked_alias.c.card_id)
-                .filter(ranked_alias.c.rn == 1)
-                .order_by(ranked_alias.c.envelope_id.asc())
-                .all()
-            )
-        ]
-        selected_ids.extend(top_per_env_ids)
+# Evidence = the latest cards overall plus the most important card of each most-active envelope.
+LATEST_CARDS = 6
+ACTIVE_ENVELOPES = 8
 
-    # Deduplicate in insertion order and cap.
-    deduped_ids: list[int] = []
-    seen: set[int] = set()
-    for cid in selected_ids:
-        if cid in seen:
-            continue
-        seen.add(cid)
-        deduped_ids.append(cid)
-        if len(deduped_ids) >= max_cards:
-            break
 
-    if not deduped_ids:
-        return []
+def build_context_evidence(session: Session, *, max_cards: int = 12) -> list[ContextEvidenceCard]:
+    """Select evidence cards in one round-trip.
 
-    # Query D: fetch selected cards + envelope name in one query.
+    Every step is an index seek: ``ix_cards_created_at`` for the latest cards,
+    ``ix_envelopes_activity`` for active envelopes and ``ix_cards_envelope_importance``
+    for each envelope's top card (persisted ``importance_score``), so cost does not
+    grow with the number of cards. Latest cards come first (newest first), then the
+    per-envelope picks by envelope id; a card in both lists appears once.
+    """
+    latest = (
+        select(CardORM.id.label("card_id"), literal(0).label("grp"))
+        .order_by(CardORM.created_at.desc())
+        .limit(LATEST_CARDS)
+        .cte("latest")
+    )
+    active = (
+        select(EnvelopeORM.id.label("envelope_id"))
+        .order_by(EnvelopeORM.card_count.desc(), EnvelopeORM.updated_at.desc())
+        .limit(ACTIVE_ENVELOPES)
+        .cte("active")
+    )
+    top_card_id = (
+        select(CardORM.id)
+        .where(CardORM.envelope_id == active.c.envelope_id)
+        .order_by(CardORM.importance_score.desc(), CardORM.created_at.desc())
+        .limit(1)
+        .correlate(active)
+        .scalar_subquery()
+    )
+    candidates = union_all(
+        select(latest.c.card_id, latest.c.grp),
+        select(top_card_id.label("card_id"), literal(1).label("grp")).select_from(active),
+    ).cte("candidates")
+    picked = (
+        select(candidates.c.card_id, func.min(candidates.c.grp).label("grp"))
+        .where(candidates.c.card_id.is_not(None))
+        .group_by(candidates.c.card_id)
+        .cte("picked")
+    )
     rows = (
         session.query(CardORM, EnvelopeORM.name)
+        .join(picked, CardORM.id == picked.c.card_id)
         .outerjoin(EnvelopeORM, CardORM.envelope_id == EnvelopeORM.id)
-        .filter(CardORM.id.in_(deduped_ids))
+        .order_by(
+            picked.c.grp.asc(),
+            case((picked.c.grp == 0, CardORM.created_at)).desc(),
+            CardORM.envelope_id.asc(),
+        )
+        .limit(max_cards)
         .all()
     )
-    by_id = {
-        card.id: ContextEvidenceCard(
+    return [
+        ContextEvidenceCard(
             card_id=card.id,
             card_type=card.card_type,
             description=card.description,
@@ -120,5 +93,16 @@ def build_context_evidence(session: Session, *, max_cards: int = 12) -> list[Con
             created_at=card.created_at,
         )
         for card, envelope_name in rows
-    }
-    return [by_id[cid] for cid in deduped_ids if cid in by_id]
+    ]
+
+
+def evidence_fingerprint(evidence: list[ContextEvidenceCard], *, salt: str = "") -> str:
+    """sha256 over the evidence set (order-sensitive, as the prompt sees it) plus ``salt``."""
+    payload = json.dumps([asdict(card) for card in evidence], sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(f"{salt}\n{payload}".encode("utf-8")).hexdigest()
+
+
+def evidence_card_hash(card: ContextEvidenceCard) -> str:
+    """Short content hash of one evidence card, to tell new or edited cards from already-seen ones."""
+    payload = json.dumps(asdict(card), sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
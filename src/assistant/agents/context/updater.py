@@ -2,13 +2,15 @@ from __future__ import annotations
 
 import json
 import logging
+from typing import Sequence
 
 from langchain_core.messages import HumanMessage, SystemMessage
 
 from assistant.config.settings import Settings
-from assistant.llm.client import build_chat_model
+from assistant.llm.client import build_structured_model, with_response_cache
+from assistant.observability.tracing import span
 from assistant.prompts import load_prompt_versioned, resolve_prompt_version
-from assistant.schemas.context import ContextUpdateOutput
+from assistant.schemas.context import ContextUpdateOutput, StructuredUserContext
 from assistant.agents.context.evidence import ContextEvidenceCard
 
 logger = logging.getLogger(__name__)
@@ -21,20 +23,37 @@ class ContextUpdateError(RuntimeError):
 def _format_evidence(evidence: list[ContextEvidenceCard]) -> str:
     rows = []
     for c in evidence:
-        rows.append(
-            {
-                "card_id": c.card_id,
-                "card_type": c.card_type,
-                "description": c.description,
-                "assignee": c.assignee,
-                "keywords": c.keywords,
-                "due_at": c.due_at.isoformat() if c.due_at else None,
-                "envelope_id": c.envelope_id,
-                "envelope_name": c.envelope_name,
-                "created_at": c.created_at.isoformat(),
-            }
-        )
-    return json.dumps(rows, ensure_ascii=False, indent=2)
+        row = {
+            "card_id": c.card_id,
+            "card_type": c.card_type,
+            "description": c.description,
+            "assignee": c.assignee,
+            "keywords": c.keywords,
+            "due_at": c.due_at.isoformat() if c.due_at else None,
+            "envelope_id": c.envelope_id,
+            "envelope_name": c.envelope_name,
+            "created_at": c.created_at.isoformat(),
+        }
+        # Compact: empty fields and indentation only cost prompt tokens.
+        rows.append({key: value for key, value in row.items() if value not in (None, [], "")})
+    return json.dumps(rows, ensure_ascii=False, separators=(",", ":"))
+
+
+def context_digest(context_json: str) -> str:
+    """One line per context item: ``bucket | name | strength | evidence ids | last_seen_at``."""
+    try:
+        context = StructuredUserContext.model_validate_json(context_json)
+    except ValueError:
+        return context_json
+    lines: list[str] = []
+    for bucket in ("people", "organizations", "projects", "themes", "miscellaneous"):
+        for item in getattr(context, bucket):
+            seen = item.last_seen_at.strftime("%Y-%m-%dT%H:%M") if item.last_seen_at else "-"
+            ids = ",".join(str(card_id) for card_id in item.evidence_card_ids) or "-"
+            lines.append(f"{bucket} | {item.name} | {item.strength:.2f} | {ids} | {seen}")
+    for upcoming in context.important_upcoming:
+        lines.append(f"upcoming | {upcoming.card_id} | {upcoming.title} | {upcoming.reason}")
+    return "\n".join(lines) or "(empty)"
 
 
 class ContextUpdater:
@@ -54,7 +73,35 @@ class ContextUpdater:
             return False
         return True
 
-    def update(self, previous_context_json: str, evidence: list[ContextEvidenceCard]) -> ContextUpdateOutput:
+    @staticmethod
+    def build_payload(
+        previous_context_json: str,
+        evidence: list[ContextEvidenceCard],
+        seen_card_ids: Sequence[int] | None = None,
+    ) -> str:
+        """Human message for a full update, or a delta update when ``seen_card_ids`` is given.
+
+        A delta sends the previous context as a digest plus only the new or changed cards;
+        the cards behind the previous snapshot are referenced by id instead of resent.
+        """
+        if seen_card_ids is None:
+            return (
+                f"Previous context JSON:\n{previous_context_json}\n\n"
+                f"Evidence cards JSON:\n{_format_evidence(evidence)}"
+            )
+        return (
+            f"Previous context digest:\n{context_digest(previous_context_json)}\n\n"
+            f"Already-seen evidence card ids: {', '.join(str(i) for i in seen_card_ids) or '-'}\n\n"
+            f"New or changed evidence cards JSON:\n{_format_evidence(evidence)}"
+        )
+
+    def update(
+        self,
+        previous_context_json: str,
+        evidence: list[ContextEvidenceCard],
+        *,
+        seen_card_ids: Sequence[int] | None = None,
+    ) -> ContextUpdateOutput:
         if not self._llm_enabled():
             raise ContextUpdateError("LLM unavailable for context update")
         if not evidence:
@@ -64,21 +111,25 @@ class ContextUpdater:
             "context_update",
             version=self.prompt_version,
         )
-        human_payload = (
-            f"Previous context JSON:\n{previous_context_json}\n\n"
-            f"Evidence cards JSON:\n{_format_evidence(evidence)}"
-        )
+        human_payload = self.build_payload(previous_context_json, evidence, seen_card_ids)
         try:
-            llm = build_chat_model(self.settings)
+            llm = with_response_cache(
+                build_structured_model(self.settings, ContextUpdateOutput),
+                self.settings,
+                prompt_version=self.prompt_version,
+                schema=ContextUpdateOutput,
+            )
             logger.debug(
-                "ContextUpdater update: prompt_version=%s evidence_count=%s human_payload_len=%s",
+                "ContextUpdater update: prompt_version=%s evidence_count=%s delta=%s human_payload_len=%s",
                 self.prompt_version,
                 len(evidence),
+                seen_card_ids is not None,
                 len(human_payload),
             )
-            result = llm.with_structured_output(ContextUpdateOutput).invoke(
-                [SystemMessage(content=system_prompt), HumanMessage(content=human_payload)]
-            )
+            with span("llm.invoke", prompt_version=self.prompt_version):
+                result = llm.invoke(
+                    [SystemMessage(content=system_prompt), HumanMessage(content=human_payload)]
+                )
             return ContextUpdateOutput.model_validate(result)
         except Exception as exc:  # noqa: BLE001
             raise ContextUpdateError(str(exc)) from exc
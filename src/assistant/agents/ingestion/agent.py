@@ -4,8 +4,9 @@ import logging
 from typing import Optional
 
 from assistant.agents.ingestion.fallback import FallbackExtractor
-from assistant.agents.ingestion.extractor import IngestionLLMPipeline
+from assistant.agents.ingestion.extractor import get_ingestion_pipeline
 from assistant.config.settings import Settings
+from assistant.observability.tracing import traced
 from assistant.prompts import resolve_prompt_version
 from assistant.schemas.card import ExtractedCard
 
@@ -19,6 +20,7 @@ class IngestionAgent:
         self.settings = settings
         self.fallback = FallbackExtractor()
 
+    @traced("ingestion.extract")
     def extract(self, raw_text: str) -> tuple[ExtractedCard, str, str, int, bool, Optional[str]]:
         provider = self.settings.effective_llm_provider
         has_llm_key = bool(self.settings.effective_llm_api_key)
@@ -30,7 +32,7 @@ class IngestionAgent:
             return card, "fallback-rule", prompt_version, 0, True, None
 
         try:
-            llm = IngestionLLMPipeline(self.settings, prompt_version=prompt_version)
+            llm = get_ingestion_pipeline(self.settings, prompt_version)
             card, latency, resolved_prompt_version = llm.extract(raw_text)
             return card, f"{provider}:{self.settings.effective_llm_model}", resolved_prompt_version, latency, True, None
         except Exception as exc:  # noqa: BLE001
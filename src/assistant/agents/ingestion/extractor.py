@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import json
 import logging
+import threading
 import time
 from typing import Literal, Optional
 
@@ -11,8 +12,11 @@ from langchain_core.runnables import RunnableLambda
 from pydantic import BaseModel, Field
 
 from assistant.config.settings import Settings
-from assistant.llm.client import build_chat_model
+from assistant.llm.cache import LLMResponseCache
+from assistant.llm.client import build_chat_model, build_llm_config, get_llm_cache, with_response_cache
 from assistant.llm.parsing import extract_json_block
+from assistant.llm.types import LLMConfig
+from assistant.observability.tracing import span
 from assistant.prompts import load_prompt_versioned
 from assistant.schemas.card import ExtractedCard
 
@@ -34,7 +38,9 @@ class IngestionLLMPipeline:
         self.settings = settings
         self.prompt_version = prompt_version
         self.parser = PydanticOutputParser(pydantic_object=IngestionExtractedCardSchema)
-        self.llm = build_chat_model(settings)
+        # Built once per pipeline; pipelines are shared via get_ingestion_pipeline().
+        self.format_instructions = self.parser.get_format_instructions()
+        self.llm = with_response_cache(build_chat_model(settings), settings, prompt_version=prompt_version)
         self.chain = (
             RunnableLambda(self._build_prompt_inputs_node)
             | RunnableLambda(self._build_messages_node)
@@ -49,7 +55,7 @@ class IngestionLLMPipeline:
         rendered = load_prompt_versioned("ingestion", version=self.prompt_version)
         return {
             "system_prompt": rendered,
-            "format_instructions": self.parser.get_format_instructions(),
+            "format_instructions": self.format_instructions,
             "human_payload": f"Raw note:\n{raw_text}",
         }
 
@@ -68,7 +74,8 @@ class IngestionLLMPipeline:
     def _invoke_llm_node(self, messages) -> tuple[AIMessage, int]:
         logger.debug("IngestionLLM node: invoke_llm")
         start = time.perf_counter()
-        response = self.llm.invoke(messages)
+        with span("llm.invoke", prompt_version=self.prompt_version):
+            response = self.llm.invoke(messages)
         latency_ms = int((time.perf_counter() - start) * 1000)
         logger.debug("IngestionLLM node: invoke_llm_done latency_ms=%s", latency_ms)
         return response, latency_ms
@@ -112,3 +119,18 @@ class IngestionLLMPipeline:
         card, latency = self.chain.invoke({"raw_text": raw_text})
         logger.debug("IngestionLLM pipeline end")
         return card, latency, self.prompt_version
+
+
+_PIPELINES: dict[tuple[LLMConfig, str, LLMResponseCache | None], IngestionLLMPipeline] = {}
+_PIPELINES_LOCK = threading.Lock()
+
+
+def get_ingestion_pipeline(settings: Settings, prompt_version: str) -> IngestionLLMPipeline:
+    """Process-wide pipeline per (LLM config, prompt version, response cache); the chain is stateless and thread-safe."""
+    key = (build_llm_config(settings), prompt_version, get_llm_cache(settings))
+    with _PIPELINES_LOCK:
+        pipeline = _PIPELINES.get(key)
+        if pipeline is None:
+            pipeline = IngestionLLMPipeline(settings, prompt_version=prompt_version)
+            _PIPELINES[key] = pipeline
+        return pipeline
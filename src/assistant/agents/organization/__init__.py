@@ -1,11 +1,12 @@
 from assistant.agents.organization.agent import OrganizationAgent
-from assistant.agents.organization.profile import EnvelopeProfile, build_envelope_profile
+from assistant.agents.organization.profile import EnvelopeProfile, apply_card_to_profile, build_envelope_profile
 from assistant.agents.organization.refiner import EnvelopeRefineOutput, EnvelopeRefiner
 
 __all__ = [
     "OrganizationAgent",
     "EnvelopeProfile",
     "build_envelope_profile",
+    "apply_card_to_profile",
     "EnvelopeRefiner",
     "EnvelopeRefineOutput",
 ]
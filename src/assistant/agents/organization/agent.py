@@ -1,35 +1,54 @@
 from __future__ import annotations
 
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Iterator
+
 from sqlalchemy.orm import Session
 
 from assistant.config.settings import Settings
+from assistant.db.models import CardORM, EnvelopeORM
 from assistant.db.repo_cards import CardsRepository
-from assistant.db.repo_envelopes import EnvelopesRepository
+from assistant.db.repo_envelopes import EnvelopesRepository, keyword_terms, text_terms
+from assistant.observability.tracing import traced
 from assistant.schemas.card import ExtractedCard
 from assistant.schemas.envelope import EnvelopeDecision
-from assistant.agents.organization.profile import build_envelope_profile
+from assistant.agents.organization.profile import EnvelopeProfile, apply_card_to_profile, build_envelope_profile
 from assistant.agents.organization.refiner import EnvelopeRefiner
-from assistant.services.embeddings import model_embed
+from assistant.services.embeddings import model_embed, model_embed_many
+from assistant.services.envelope_index import EnvelopeIndex, flush_envelope_index, get_envelope_index
 from assistant.services.scoring import EnvelopeScorer
 
+# Rows whose transaction committed after a sync but stamped ``updated_at`` before it are
+# picked up by re-reading this far behind the last sync point.
+INDEX_SYNC_SLACK = timedelta(minutes=5)
+
 
 class OrganizationAgent:
     """Deterministic routing: choose/create envelope for a card."""
 
     def __init__(self, session: Session, settings: Settings):
         self.settings = settings
+        self.session = session
         self.envelopes = EnvelopesRepository(session)
         self.cards = CardsRepository(session)
         self.scorer = EnvelopeScorer(settings)
         self.refiner = EnvelopeRefiner(settings)
 
-    def route(self, extracted: ExtractedCard, raw_text: str) -> tuple[EnvelopeDecision, int]:
-        all_envelopes = self.envelopes.list_envelopes()
-        card_embedding = model_embed(raw_text, settings=self.settings)
+    @traced("organization.route")
+    def route(
+        self,
+        extracted: ExtractedCard,
+        raw_text: str,
+        card_embedding: list[float] | None = None,
+    ) -> tuple[EnvelopeDecision, int]:
+        if card_embedding is None:
+            card_embedding = model_embed(raw_text, settings=self.settings)
+        candidates = self._routing_candidates(extracted, card_embedding)
         match = self.scorer.choose_best(
             raw_text,
             extracted.context_keywords,
-            all_envelopes,
+            candidates,
             card_embedding=card_embedding,
             assignee=extracted.assignee,
         )
@@ -58,18 +77,148 @@ class OrganizationAgent:
         )
         return decision, envelope.id
 
-    def refresh_envelope(self, envelope_id: int) -> None:
-        envelope = self.envelopes.get_by_id(envelope_id)
-        if envelope is None:
+    def _routing_candidates(self, extracted: ExtractedCard, card_embedding: list[float]) -> list[EnvelopeORM]:
+        """Every envelope for small stores; otherwise envelopes sharing a term or near the card."""
+        if not card_embedding or self.envelopes.count_envelopes() < self.settings.envelope_index_min_envelopes:
+            return self.envelopes.list_envelopes()
+        index = self.sync_envelope_index()
+        hits = index.search(card_embedding, self.settings.envelope_index_candidates)
+        terms = keyword_terms(extracted.context_keywords) | text_terms(extracted.assignee)
+        candidate_ids = {envelope_id for envelope_id, _ in hits} | self.envelopes.find_by_terms(terms)
+        # Envelopes without a centroid are always scored exactly (text-similarity fallback).
+        return self.envelopes.list_routing_candidates(sorted(candidate_ids))
+
+    @contextmanager
+    def _committed_envelopes(self) -> Iterator[EnvelopesRepository]:
+        """Envelopes as committed, read on a separate connection.
+
+        The routing session may hold centroids that a later rollback discards; the shared
+        index must never see those. A private in-memory database has a single connection,
+        so there the routing session is the only view.
+        """
+        bind = self.session.get_bind()
+        if bind.url.database in (None, "", ":memory:"):
+            yield self.envelopes
             return
-        cards = self.cards.list_by_envelope(envelope_id)
-        profile = build_envelope_profile(cards, settings=self.settings)
+        with Session(bind=bind) as session:
+            yield EnvelopesRepository(session)
+
+    @traced("organization.sync_envelope_index")
+    def sync_envelope_index(self) -> EnvelopeIndex:
+        """Bring the process-wide index up to the committed centroids.
+
+        Any process (CLI, worker, API) may write centroids, so freshness is keyed on the
+        database's centroid stamp rather than on this process's own writes: when it moves,
+        envelopes updated since the last sync are re-read; a count mismatch afterwards
+        (deleted envelopes) forces a full rebuild.
+        """
+        index = get_envelope_index(self.settings)
+        with self._committed_envelopes() as committed:
+            stamp = committed.centroid_stamp()
+            if index.synced_at is not None and index.stamp == stamp.token:
+                return index
+            if index.synced_at is None:
+                self._rebuild_index(index, committed)
+                return index
+            synced_at = index.synced_at
+            for envelope_id, vec in committed.list_embeddings_updated_since(synced_at - INDEX_SYNC_SLACK):
+                index.upsert(envelope_id, vec)
+            if len(index) != stamp.count:
+                self._rebuild_index(index, committed)
+                return index
+            index.stamp = stamp.token
+            index.synced_at = max(synced_at, stamp.updated_at or synced_at)
+        flush_envelope_index(index, self.settings.envelope_index_path)
+        return index
+
+    @traced("organization.reindex_envelopes")
+    def reindex_envelopes(self) -> int:
+        """Rebuild the envelope ANN index from committed centroids and persist it."""
+        index = get_envelope_index(self.settings)
+        with self._committed_envelopes() as committed:
+            self._rebuild_index(index, committed)
+        return len(index)
+
+    def _rebuild_index(self, index: EnvelopeIndex, committed: EnvelopesRepository) -> None:
+        # Stamp first: rows committed while reading move the stamp again and are re-read next sync.
+        stamp = committed.centroid_stamp()
+        index.clear()
+        for envelope_id, vec in committed.list_embeddings():
+            index.upsert(envelope_id, vec)
+        index.stamp = stamp.token
+        index.synced_at = stamp.updated_at
+        flush_envelope_index(index, self.settings.envelope_index_path, force=True)
+
+    def _write_profile(self, envelope: EnvelopeORM, profile: EnvelopeProfile) -> None:
         self.envelopes.update_profile(
             envelope,
             keywords=profile.keywords,
             embedding_vector=profile.embedding_vector,
             card_count=profile.card_count,
             last_card_at=profile.last_card_at,
+            embedding_count=profile.embedding_count,
+            keyword_weights=profile.keyword_weights,
         )
+        # The shared index is not touched here: the row is not committed yet. Routing syncs
+        # the index from committed centroids (``sync_envelope_index``).
+
+    @traced("organization.add_card_to_envelope")
+    def add_card_to_envelope(self, envelope_id: int, card: CardORM) -> None:
+        """Incremental profile update for one newly assigned card (no card scan)."""
+        envelope = self.envelopes.get_by_id(envelope_id)
+        if envelope is None:
+            return
+        self._write_profile(envelope, apply_card_to_profile(envelope, card, settings=self.settings))
+
+    @traced("organization.refine_envelope")
+    def refine_envelope(self, envelope_id: int) -> None:
+        envelope = self.envelopes.get_by_id(envelope_id)
+        if envelope is None:
+            return
+        # The refiner only reads the latest cards, so never load the whole envelope.
+        cards = self.cards.list_by_envelope(envelope_id, limit=12)
         refined = self.refiner.refine(envelope, cards)
         self.envelopes.update_summary(envelope, name=refined.name, summary=refined.summary)
+
+    @traced("organization.rebuild_envelope_profile")
+    def rebuild_envelope_profile(self, envelope_id: int) -> None:
+        """Full profile recompute from every card; repair path for drifted incremental state."""
+        envelope = self.envelopes.get_by_id(envelope_id)
+        if envelope is None:
+            return
+        cards = self.cards.list_by_envelope(envelope_id)
+        self._store_missing_embeddings(cards)
+        self._write_profile(envelope, build_envelope_profile(cards, settings=self.settings, embed_missing=False))
+
+    def _store_missing_embeddings(self, cards: list[CardORM]) -> None:
+        # Vectors computed for a rebuild are kept on the cards, so the next rebuild does not pay for them again.
+        missing = [card for card in cards if card.embedding_vector is None and card.raw_text]
+        if not missing:
+            return
+        vectors = model_embed_many([card.raw_text for card in missing], settings=self.settings)
+        for card, vec in zip(missing, vectors):
+            if vec:
+                self.cards.update_embedding(card, vec)
+
+    def refresh_envelope(self, envelope_id: int) -> None:
+        self.rebuild_envelope_profile(envelope_id)
+        self.refine_envelope(envelope_id)
+
+    @traced("organization.backfill_card_embeddings")
+    def backfill_card_embeddings(self, batch_size: int | None = None) -> int:
+        """Store embeddings for cards ingested before per-card vectors existed."""
+        size = max(1, batch_size or self.settings.embedding_batch_size)
+        # Read enough cards per round for every concurrent embedding request to have a full batch.
+        page = size * max(1, self.settings.embedding_concurrency)
+        filled = 0
+        after_id = 0
+        while True:
+            cards = self.cards.list_missing_embeddings(after_id=after_id, limit=page)
+            if not cards:
+                return filled
+            vectors = model_embed_many([card.raw_text for card in cards], settings=self.settings, batch_size=size)
+            for card, vec in zip(cards, vectors):
+                if vec:
+                    self.cards.update_embedding(card, vec)
+                    filled += 1
+            after_id = cards[-1].id
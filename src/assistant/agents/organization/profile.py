@@ -1,12 +1,20 @@
 from __future__ import annotations
 
 from collections import Counter
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
+from typing import Sequence
+
+import numpy as np
 
 from assistant.config.settings import Settings
-from assistant.db.models import CardORM
-from assistant.services.embeddings import model_embed
+from assistant.db.models import CardORM, EnvelopeORM
+from assistant.services.embeddings import model_embed_many
+
+KEYWORD_LIMIT = 12
+KEYWORDS_PER_CARD = 8
+# Decayed counters kept per envelope; the tail beyond this only ever loses weight.
+KEYWORD_WEIGHTS_LIMIT = 64
 
 
 @dataclass
@@ -15,47 +23,111 @@ class EnvelopeProfile:
     embedding_vector: list[float]
     card_count: int
     last_card_at: datetime | None
+    embedding_count: int = 0
+    keyword_weights: dict[str, float] = field(default_factory=dict)
 
 
 def _normalize_keywords(keywords: list[str]) -> list[str]:
     return [k.strip().lower() for k in keywords if k and k.strip()]
 
 
-def _compute_keywords(cards: list[CardORM], limit: int = 12) -> list[str]:
-    weighted = Counter()
-    total = len(cards)
-    for idx, card in enumerate(cards):
-        recency_weight = 1.0 - (idx / max(total, 1)) * 0.5
-        for kw in _normalize_keywords(card.keywords_json or [])[:8]:
-            weighted[kw] += recency_weight
-    return [kw for kw, _ in weighted.most_common(limit)]
+def _top_keywords(weights: dict[str, float], limit: int = KEYWORD_LIMIT) -> list[str]:
+    return [kw for kw, _ in Counter(weights).most_common(limit)]
+
+
+def _decay_and_add(weights: dict[str, float], keywords: list[str], decay: float) -> dict[str, float]:
+    updated = Counter({kw: weight * decay for kw, weight in weights.items()})
+    for kw in _normalize_keywords(keywords)[:KEYWORDS_PER_CARD]:
+        updated[kw] += 1.0
+    return {kw: round(weight, 6) for kw, weight in updated.most_common(KEYWORD_WEIGHTS_LIMIT)}
+
 
+def _compute_keyword_weights(cards: list[CardORM], decay: float) -> dict[str, float]:
+    # Replay oldest -> newest so a full rebuild matches the incremental counters.
+    weights: dict[str, float] = {}
+    for card in reversed(cards):
+        weights = _decay_and_add(weights, card.keywords_json or [], decay)
+    return weights
 
-def _mean_vector(vectors: list[list[float]]) -> list[float]:
+
+def _has_vector(vec: Sequence[float] | None) -> bool:
+    return vec is not None and len(vec) > 0
+
+
+def _mean_vector(vectors: list[Sequence[float]]) -> list[float]:
     if not vectors:
         return []
     size = len(vectors[0])
     if size == 0 or any(len(v) != size for v in vectors):
         return []
-    sums = [0.0] * size
-    for vec in vectors:
-        for i, val in enumerate(vec):
-            sums[i] += float(val)
-    return [value / len(vectors) for value in sums]
+    return np.mean(np.asarray(vectors, dtype=np.float64), axis=0).tolist()
+
+
+def _card_vectors(cards: list[CardORM], settings: Settings, embed_missing: bool = True) -> list[Sequence[float]]:
+    # Prefer vectors stored at ingest; only cards that predate them hit the embedding endpoint.
+    vectors: list[Sequence[float]] = [card.embedding_vector for card in cards if _has_vector(card.embedding_vector)]
+    missing = [card.raw_text for card in cards if not _has_vector(card.embedding_vector) and card.raw_text]
+    if missing and embed_missing:
+        vectors.extend(vec for vec in model_embed_many(missing, settings=settings) if vec)
+    return vectors
 
 
-def build_envelope_profile(cards: list[CardORM], settings: Settings) -> EnvelopeProfile:
+def build_envelope_profile(cards: list[CardORM], settings: Settings, *, embed_missing: bool = True) -> EnvelopeProfile:
+    """Full rebuild from every card in the envelope (cards ordered newest first).
+
+    With ``embed_missing=False`` cards without a stored vector are left out of the centroid
+    instead of being embedded (and then discarded) here.
+    """
     if not cards:
         return EnvelopeProfile(keywords=[], embedding_vector=[], card_count=0, last_card_at=None)
 
-    keywords = _compute_keywords(cards)
-    vectors = [model_embed(card.raw_text, settings=settings) for card in cards if card.raw_text]
-    vectors = [vec for vec in vectors if vec]
+    keyword_weights = _compute_keyword_weights(cards, decay=settings.envelope_keyword_decay)
+    vectors = _card_vectors(cards, settings=settings, embed_missing=embed_missing)
     centroid = _mean_vector(vectors)
     last_card_at = max((card.created_at for card in cards if card.created_at), default=None)
     return EnvelopeProfile(
-        keywords=keywords,
+        keywords=_top_keywords(keyword_weights),
         embedding_vector=centroid,
         card_count=len(cards),
         last_card_at=last_card_at,
+        embedding_count=len(vectors) if centroid else 0,
+        keyword_weights=keyword_weights,
+    )
+
+
+def apply_card_to_profile(envelope: EnvelopeORM, card: CardORM, settings: Settings) -> EnvelopeProfile:
+    """Fold one new card into the stored profile in O(dim + keywords).
+
+    The centroid is a running mean over ``embedding_count`` vectors; keyword counters
+    are decayed by ``envelope_keyword_decay`` before the card's keywords are added.
+    """
+    weights = dict(envelope.keyword_weights_json or {})
+    if not weights and envelope.keywords_json:
+        # Envelopes profiled before decayed counters existed: seed from the ranked keywords.
+        total = len(envelope.keywords_json)
+        weights = {kw: float(total - idx) / total for idx, kw in enumerate(envelope.keywords_json)}
+    weights = _decay_and_add(weights, card.keywords_json or [], decay=settings.envelope_keyword_decay)
+
+    stored = envelope.embedding_vector
+    centroid = [] if stored is None else [float(v) for v in stored]
+    count = envelope.embedding_count or 0
+    vec = card.embedding_vector
+    if _has_vector(vec):
+        if count == 0 or len(centroid) != len(vec):
+            # First vector (or the embedding model changed dimension): restart the mean.
+            centroid, count = [float(v) for v in vec], 1
+        else:
+            count += 1
+            centroid = [c + (float(v) - c) / count for c, v in zip(centroid, vec)]
+
+    last_card_at = envelope.last_card_at
+    if card.created_at and (last_card_at is None or card.created_at > last_card_at):
+        last_card_at = card.created_at
+    return EnvelopeProfile(
+        keywords=_top_keywords(weights),
+        embedding_vector=centroid,
+        card_count=(envelope.card_count or 0) + 1,
+        last_card_at=last_card_at,
+        embedding_count=count,
+        keyword_weights=weights,
     )
@@ -7,7 +7,8 @@ from pydantic import BaseModel, Field
 
 from assistant.config.settings import Settings
 from assistant.db.models import CardORM, EnvelopeORM
-from assistant.llm.client import build_chat_model
+from assistant.llm.client import build_structured_model, with_response_cache
+from assistant.observability.tracing import span
 from assistant.prompts import load_prompt_versioned, resolve_prompt_version
 
 logger = logging.getLogger(__name__)
@@ -64,16 +65,22 @@ class EnvelopeRefiner:
             f"Recent card descriptions:\n{card_lines or '- (none)'}"
         )
         try:
-            llm = build_chat_model(self.settings)
+            llm = with_response_cache(
+                build_structured_model(self.settings, EnvelopeRefineOutput),
+                self.settings,
+                prompt_version=self.prompt_version,
+                schema=EnvelopeRefineOutput,
+            )
             logger.debug(
                 "EnvelopeRefiner refine: prompt_version=%s cards=%s human_payload_len=%s",
                 self.prompt_version,
                 len(cards),
                 len(human_payload),
             )
-            response = llm.with_structured_output(EnvelopeRefineOutput).invoke(
-                [SystemMessage(content=system_prompt), HumanMessage(content=human_payload)]
-            )
+            with span("llm.invoke", prompt_version=self.prompt_version):
+                response = llm.invoke(
+                    [SystemMessage(content=system_prompt), HumanMessage(content=human_payload)]
+                )
             logger.debug("EnvelopeRefiner: response=%s", response)
             return EnvelopeRefineOutput(name=response.name.strip(), summary=response.summary.strip())
         except Exception:
@@ -11,13 +11,54 @@ from sqlalchemy.orm import Session
 from assistant.config.settings import Settings
 from assistant.db.repo_cards import CardsRepository
 from assistant.db.repo_context_snapshot import ContextSnapshotRepository
+from assistant.db.models import CardORM, EnvelopeORM, ThinkingWatermarkORM
 from assistant.db.repo_envelopes import EnvelopesRepository
-from assistant.llm.client import build_chat_model
+from assistant.db.repo_thinking import ThinkingWatermarkRepository
+from assistant.llm.client import build_structured_model, with_response_cache
+from assistant.observability.tracing import span, traced
 from assistant.prompts import load_prompt_versioned, resolve_prompt_version
-from assistant.schemas.suggestion import ThinkingInputStats, ThinkingRunOutput, ThinkingSuggestionBatch
+from assistant.schemas.suggestion import (
+    ThinkingInputStats,
+    ThinkingRunOutput,
+    ThinkingSuggestionBatch,
+    ThinkingSuggestionItem,
+)
 
 logger = logging.getLogger(__name__)
 
+# Suggestions kept across incremental runs (in the output and the digest), newest first.
+MAX_CARRIED_SUGGESTIONS = 30
+
+
+def suggestions_digest(suggestions: list[ThinkingSuggestionItem]) -> list[str]:
+    """One line per suggestion: ``type | priority | title | card ids | envelope ids``."""
+    return [
+        " | ".join(
+            [
+                item.suggestion_type.value,
+                item.priority.value,
+                item.title,
+                ",".join(str(i) for i in item.evidence.card_ids) or "-",
+                ",".join(str(i) for i in item.evidence.envelope_ids) or "-",
+            ]
+        )
+        for item in suggestions
+    ]
+
+
+def merge_suggestions(
+    new: list[ThinkingSuggestionItem], previous: list[ThinkingSuggestionItem]
+) -> tuple[list[ThinkingSuggestionItem], int]:
+    """New suggestions first, then previous ones they do not revise (same type and title).
+
+    Returns the merged list, capped at ``MAX_CARRIED_SUGGESTIONS``, and how many previous
+    suggestions it kept.
+    """
+    revised = {(item.suggestion_type, item.title.strip().lower()) for item in new}
+    kept = [item for item in previous if (item.suggestion_type, item.title.strip().lower()) not in revised]
+    merged = (new + kept)[:MAX_CARRIED_SUGGESTIONS]
+    return merged, max(0, len(merged) - len(new))
+
 
 class ThinkingAgent:
     """LLM-first reasoning agent for proactive suggestions."""
@@ -28,6 +69,7 @@ class ThinkingAgent:
         self.cards_repo = CardsRepository(session)
         self.envelopes_repo = EnvelopesRepository(session)
         self.context_repo = ContextSnapshotRepository(session)
+        self.watermark_repo = ThinkingWatermarkRepository(session)
         self.prompt_version = resolve_prompt_version("thinking", settings.thinking_prompt_version)
         logger.debug(
             "ThinkingAgent init: prompt_version=%s llm_provider=%s llm_model=%s max_cards=%s max_envelopes=%s",
@@ -38,8 +80,8 @@ class ThinkingAgent:
             settings.thinking_max_envelopes,
         )
 
-    def _serialize_cards(self) -> list[dict]:
-        cards = self.cards_repo.list_cards(limit=max(1, self.settings.thinking_max_cards))
+    @staticmethod
+    def _serialize_cards(cards: list[CardORM]) -> list[dict]:
         return [
             {
                 "id": c.id,
@@ -54,8 +96,8 @@ class ThinkingAgent:
             for c in cards
         ]
 
-    def _serialize_envelopes(self) -> list[dict]:
-        envelopes = self.envelopes_repo.list_envelopes(limit=max(1, self.settings.thinking_max_envelopes))
+    @staticmethod
+    def _serialize_envelopes(envelopes: list[EnvelopeORM]) -> list[dict]:
         return [
             {
                 "id": e.id,
@@ -79,11 +121,63 @@ class ThinkingAgent:
             parsed = {}
         return {"context_json": parsed, "focus_summary": snapshot.focus_summary}
 
-    def run_cycle(self) -> ThinkingRunOutput:
-        cards = self._serialize_cards()
-        envelopes = self._serialize_envelopes()
-        user_context = self._serialize_context()
-        input_stats = ThinkingInputStats(cards_scanned=len(cards), envelopes_scanned=len(envelopes))
+    def _is_incremental(self, watermark: ThinkingWatermarkORM | None, force: bool) -> bool:
+        every = self.settings.thinking_full_refresh_every
+        if watermark is None or force or every <= 0 or watermark.prompt_version != self.prompt_version:
+            return False
+        if watermark.suggestions_json is None:
+            # Nothing to merge an incremental answer into.
+            return False
+        return watermark.incremental_runs_since_full < every
+
+    @traced("thinking.run_cycle")
+    def run_cycle(self, *, force: bool = False) -> ThinkingRunOutput | None:
+        """Generate suggestions, or return ``None`` when no input changed since the last run.
+
+        Changes are detected from the watermark (max card id and ``updated_at`` of cards,
+        envelopes and the context snapshot), so an idle tick costs a few indexed reads and
+        no LLM call. Runs after a change send only the changed cards and envelopes plus a
+        digest of earlier suggestions; the model's new or revised suggestions are merged
+        with the earlier ones that still hold, so every output is the complete set. Every
+        ``THINKING_FULL_REFRESH_EVERY`` runs, on a prompt change and on ``force`` the full
+        input is sent and the set is replaced.
+        """
+        # Marks are read before the data so a change landing mid-run is picked up next time.
+        marks = self.watermark_repo.current_marks()
+        watermark = self.watermark_repo.get()
+        if (
+            watermark is not None
+            and not force
+            and watermark.prompt_version == self.prompt_version
+            and self.watermark_repo.marks_of(watermark) == marks
+        ):
+            logger.debug("ThinkingAgent run_cycle skipped: no changes since %s", watermark.last_run_id)
+            return None
+
+        incremental = self._is_incremental(watermark, force)
+        max_cards = max(1, self.settings.thinking_max_cards)
+        max_envelopes = max(1, self.settings.thinking_max_envelopes)
+        if incremental:
+            card_rows = self.cards_repo.list_changed_since(
+                watermark.last_card_id, watermark.cards_updated_at, limit=max_cards
+            )
+            envelope_rows = self.envelopes_repo.list_changed_since(
+                watermark.envelopes_updated_at,
+                {c.envelope_id for c in card_rows if c.envelope_id is not None},
+                limit=max_envelopes,
+            )
+            user_context = self._serialize_context()
+            if marks.context_updated_at == watermark.context_updated_at:
+                user_context = {"focus_summary": user_context["focus_summary"]}
+        else:
+            card_rows = self.cards_repo.list_cards(limit=max_cards)
+            envelope_rows = self.envelopes_repo.list_envelopes(limit=max_envelopes)
+            user_context = self._serialize_context()
+        cards = self._serialize_cards(card_rows)
+        envelopes = self._serialize_envelopes(envelope_rows)
+        input_stats = ThinkingInputStats(
+            cards_scanned=len(cards), envelopes_scanned=len(envelopes), incremental=incremental
+        )
 
         system_prompt = load_prompt_versioned(
             "thinking",
@@ -94,24 +188,54 @@ class ThinkingAgent:
             f"Envelopes JSON:\n{json.dumps(envelopes, ensure_ascii=False, indent=2)}\n\n"
             f"User Context JSON:\n{json.dumps(user_context, ensure_ascii=False, indent=2)}"
         )
-        llm = build_chat_model(self.settings)
+        previous = (
+            [ThinkingSuggestionItem.model_validate(item) for item in watermark.suggestions_json] if incremental else []
+        )
+        if incremental:
+            digest_text = "\n".join(suggestions_digest(previous)) or "(none)"
+            human_payload = (
+                f"Incremental run: changes since {watermark.last_run_at.strftime('%Y-%m-%d %H:%M')} UTC\n\n"
+                f"Previous suggestions digest:\n{digest_text}\n\n"
+                f"{human_payload}"
+            )
+        llm = with_response_cache(
+            build_structured_model(self.settings, ThinkingSuggestionBatch),
+            self.settings,
+            prompt_version=self.prompt_version,
+            schema=ThinkingSuggestionBatch,
+        )
         logger.debug(
-            "ThinkingAgent run_cycle: prompt_version=%s cards=%s envelopes=%s human_payload_len=%s",
+            "ThinkingAgent run_cycle: prompt_version=%s incremental=%s cards=%s envelopes=%s human_payload_len=%s",
             self.prompt_version,
+            incremental,
             len(cards),
             len(envelopes),
             len(human_payload),
         )
-        parsed = llm.with_structured_output(ThinkingSuggestionBatch).invoke(
-            [SystemMessage(content=system_prompt), HumanMessage(content=human_payload)]
-        )
+        with span("llm.invoke", prompt_version=self.prompt_version):
+            parsed = llm.invoke(
+                [SystemMessage(content=system_prompt), HumanMessage(content=human_payload)]
+            )
         batch = ThinkingSuggestionBatch.model_validate(parsed)
 
+        generated_at = datetime.now(timezone.utc)
+        run_id = f"thinking-{generated_at.strftime('%Y%m%d%H%M%S')}-{uuid4().hex[:8]}"
+        suggestions, carried_forward = merge_suggestions(batch.suggestions, previous)
+        self.watermark_repo.save(
+            marks,
+            prompt_version=self.prompt_version,
+            suggestions_digest="\n".join(suggestions_digest(suggestions)) or None,
+            suggestions=[item.model_dump(mode="json") for item in suggestions],
+            incremental_runs_since_full=watermark.incremental_runs_since_full + 1 if incremental else 0,
+            run_id=run_id,
+            run_at=generated_at.replace(tzinfo=None),
+        )
         return ThinkingRunOutput(
-            run_id=f"thinking-{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')}-{uuid4().hex[:8]}",
-            generated_at=datetime.now(timezone.utc),
+            run_id=run_id,
+            generated_at=generated_at,
             model_name=f"{self.settings.effective_llm_provider}:{self.settings.effective_llm_model}",
             prompt_version=self.prompt_version,
             input_stats=input_stats,
-            suggestions=batch.suggestions,
+            suggestions=suggestions,
+            carried_forward=carried_forward,
         )
@@ -14,25 +14,87 @@ class Settings(BaseSettings):
     llm_api_key: Optional[str] = Field(default=None, alias="LLM_API_KEY")
     llm_model: str = Field(default="gpt-4o-mini", alias="LLM_MODEL")
     llm_base_url: Optional[str] = Field(default=None, alias="LLM_BASE_URL")
+    # Opt-in replay of identical temperature=0 requests (evals, re-ingestion, dataset replays).
+    llm_cache_enabled: bool = Field(default=False, alias="LLM_CACHE_ENABLED")
+    llm_cache_path: str = Field(default="data/llm_cache.sqlite3", alias="LLM_CACHE_PATH")
+    llm_cache_ttl_seconds: float = Field(default=7 * 24 * 3600, alias="LLM_CACHE_TTL_SECONDS")
+    llm_cache_max_entries: int = Field(default=10_000, alias="LLM_CACHE_MAX_ENTRIES")
     embedding_provider: str = Field(default="auto", alias="EMBEDDING_PROVIDER")
     embedding_model: str = Field(default="text-embedding-3-small", alias="EMBEDDING_MODEL")
     embedding_api_key: Optional[str] = Field(default=None, alias="EMBEDDING_API_KEY")
     embedding_base_url: Optional[str] = Field(default=None, alias="EMBEDDING_BASE_URL")
+    embedding_batch_size: int = Field(default=64, alias="EMBEDDING_BATCH_SIZE")
+    embedding_concurrency: int = Field(default=4, alias="EMBEDDING_CONCURRENCY")
+    # Vector size for EMBEDDING_PROVIDER=lexical_hashed (offline feature hashing).
+    embedding_hash_dim: int = Field(default=512, alias="EMBEDDING_HASH_DIM")
+    embedding_cache_path: str = Field(default="data/embedding_cache.sqlite3", alias="EMBEDDING_CACHE_PATH")
+    embedding_cache_max_entries: int = Field(default=100_000, alias="EMBEDDING_CACHE_MAX_ENTRIES")
+    # float32 | float16 | int8 (int8 stores a per-vector scale).
+    embedding_storage_dtype: str = Field(default="float32", alias="EMBEDDING_STORAGE_DTYPE")
+    embedding_breaker_failure_threshold: int = Field(default=3, alias="EMBEDDING_BREAKER_FAILURE_THRESHOLD")
+    embedding_breaker_cooldown_seconds: float = Field(default=5.0, alias="EMBEDDING_BREAKER_COOLDOWN_SECONDS")
+    embedding_breaker_max_cooldown_seconds: float = Field(default=300.0, alias="EMBEDDING_BREAKER_MAX_COOLDOWN_SECONDS")
+    # Routing consults the envelope ANN index once this many envelopes exist.
+    envelope_index_kind: str = Field(default="ivf", alias="ENVELOPE_INDEX_KIND")
+    envelope_index_path: str = Field(default="data/envelope_index.npz", alias="ENVELOPE_INDEX_PATH")
+    envelope_index_min_envelopes: int = Field(default=512, alias="ENVELOPE_INDEX_MIN_ENVELOPES")
+    envelope_index_candidates: int = Field(default=32, alias="ENVELOPE_INDEX_CANDIDATES")
+    envelope_index_nprobe: int = Field(default=8, alias="ENVELOPE_INDEX_NPROBE")
     ingestion_prompt_version: Optional[str] = Field(default=None, alias="INGESTION_PROMPT_VERSION")
     envelope_refine_prompt_version: Optional[str] = Field(default=None, alias="ENVELOPE_REFINE_PROMPT_VERSION")
     context_update_prompt_version: Optional[str] = Field(default=None, alias="CONTEXT_UPDATE_PROMPT_VERSION")
     thinking_prompt_version: Optional[str] = Field(default=None, alias="THINKING_PROMPT_VERSION")
+    # Context updates are debounced: at most one LLM update per window unless this many new cards arrived.
+    context_update_min_interval_seconds: float = Field(default=60.0, alias="CONTEXT_UPDATE_MIN_INTERVAL_SECONDS")
+    context_update_max_pending_cards: int = Field(default=10, alias="CONTEXT_UPDATE_MAX_PENDING_CARDS")
+    # Context updates send only new/changed evidence; every Nth update resends everything (0 = always full).
+    context_full_refresh_every: int = Field(default=10, alias="CONTEXT_FULL_REFRESH_EVERY")
+    # Context history: a full keyframe every N versions (diffs in between); keep the newest N versions (0 = all).
+    context_history_keyframe_every: int = Field(default=20, alias="CONTEXT_HISTORY_KEYFRAME_EVERY")
+    context_history_max_versions: int = Field(default=1000, alias="CONTEXT_HISTORY_MAX_VERSIONS")
+    # Derived context (`context --derived`): entity scores halve every this many days.
+    context_entity_half_life_days: float = Field(default=14.0, alias="CONTEXT_ENTITY_HALF_LIFE_DAYS")
     thinking_output_dir: str = Field(default="data/thinking_runs", alias="THINKING_OUTPUT_DIR")
     thinking_max_cards: int = Field(default=200, alias="THINKING_MAX_CARDS")
     thinking_max_envelopes: int = Field(default=100, alias="THINKING_MAX_ENVELOPES")
+    # Thinking runs are skipped when nothing changed and otherwise send only changed records;
+    # every Nth run resends the full input (0 = always full).
+    thinking_full_refresh_every: int = Field(default=24, alias="THINKING_FULL_REFRESH_EVERY")
     database_url: str = Field(default="sqlite:///assistant.db", alias="DATABASE_URL")
+    # Threads used for concurrent LLM extraction by batch ingestion.
+    ingest_workers: int = Field(default=4, alias="INGEST_WORKERS")
+    # Per-stage ingest latency rows (ingestion_stage_timings) for the `stats` command.
+    ingest_stage_timings: bool = Field(default=True, alias="INGEST_STAGE_TIMINGS")
+    # Deferred mode: ingest commits the card after one LLM call and queues envelope
+    # refinement + context update for the background worker.
+    ingest_deferred: bool = Field(default=False, alias="INGEST_DEFERRED")
+    background_poll_seconds: float = Field(default=2.0, alias="BACKGROUND_POLL_SECONDS")
+    background_batch_size: int = Field(default=100, alias="BACKGROUND_BATCH_SIZE")
+    # Job queue: claimed jobs are leased; an expired lease (crashed worker) makes the job claimable again.
+    worker_threads: int = Field(default=2, alias="WORKER_THREADS")
+    job_lease_seconds: float = Field(default=300.0, alias="JOB_LEASE_SECONDS")
+    job_max_attempts: int = Field(default=5, alias="JOB_MAX_ATTEMPTS")
+    job_retry_base_seconds: float = Field(default=5.0, alias="JOB_RETRY_BASE_SECONDS")
+    job_retry_max_seconds: float = Field(default=600.0, alias="JOB_RETRY_MAX_SECONDS")
+    # Max concurrently running jobs per kind across all workers, e.g. "thinking_run=1,update_context=1".
+    job_kind_limits: str = Field(
+        default="update_context=1,thinking_run=1,backfill_embeddings=1,reindex_envelopes=1",
+        alias="JOB_KIND_LIMITS",
+    )
     timezone: str = Field(default="UTC", alias="TIMEZONE")
     debug_mode: bool = Field(default=False, alias="DEBUG_MODE")
+    # In-process spans exported to a rotating JSONL file; read back with `assistant traces`.
+    tracing_enabled: bool = Field(default=False, alias="TRACING_ENABLED")
+    trace_path: str = Field(default="data/traces.jsonl", alias="TRACE_PATH")
+    trace_max_bytes: int = Field(default=10_000_000, alias="TRACE_MAX_BYTES")
+    trace_backup_count: int = Field(default=3, alias="TRACE_BACKUP_COUNT")
+    trace_db_queries: bool = Field(default=True, alias="TRACE_DB_QUERIES")
 
     envelope_assign_threshold: float = Field(default=0.55, alias="ENVELOPE_ASSIGN_THRESHOLD")
     embedding_weight: float = Field(default=0.40, alias="EMBEDDING_WEIGHT")
     keyword_weight: float = Field(default=0.35, alias="KEYWORD_WEIGHT")
     entity_weight: float = Field(default=0.25, alias="ENTITY_WEIGHT")
+    envelope_keyword_decay: float = Field(default=0.9, alias="ENVELOPE_KEYWORD_DECAY")
 
     @property
     def effective_llm_provider(self) -> str:
@@ -62,6 +124,15 @@ class Settings(BaseSettings):
     def effective_embedding_base_url(self) -> Optional[str]:
         return self.embedding_base_url or self.llm_base_url
 
+    @property
+    def job_kind_limit_map(self) -> dict[str, int]:
+        limits: dict[str, int] = {}
+        for item in (self.job_kind_limits or "").split(","):
+            kind, sep, value = item.partition("=")
+            if sep and kind.strip() and value.strip().isdigit():
+                limits[kind.strip()] = max(1, int(value))
+        return limits
+
 
 @lru_cache(maxsize=1)
 def get_settings() -> Settings:
@@ -1,6 +1,11 @@
-from sqlalchemy import inspect, text
+import json
+import re
+import sqlite3
 
-from assistant.db.base import Base, SessionLocal, engine
+from sqlalchemy import inspect, select, text
+
+from assistant.db.base import Base, SessionLocal, engine, settings
+from assistant.db.types import encode_vector
 
 
 def _ensure_cards_reasoning_steps_column() -> None:
@@ -17,6 +22,66 @@ def _ensure_cards_reasoning_steps_column() -> None:
         conn.execute(text("ALTER TABLE cards ADD COLUMN reasoning_steps_json JSON NOT NULL DEFAULT '[]'"))
 
 
+def _drop_column(conn, table: str, column: str) -> None:
+    if sqlite3.sqlite_version_info >= (3, 35, 0):
+        conn.execute(text(f"ALTER TABLE {table} DROP COLUMN {column}"))
+        return
+    # Older SQLite has no DROP COLUMN: rebuild the table from its own DDL minus the column
+    # (create new, copy, drop old, rename), then recreate its explicit indexes.
+    create_sql = conn.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": table}
+    ).scalar_one()
+    index_sqls = conn.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = :name AND sql IS NOT NULL"),
+        {"name": table},
+    ).scalars().all()
+    definition = rf'"?{re.escape(column)}"?\s'
+    new_sql, found = re.subn(rf"\s*{definition}[^,]*,", "", create_sql, count=1)
+    if not found:
+        # Last column (e.g. appended by ALTER TABLE ADD COLUMN).
+        new_sql = re.sub(rf",\s*{definition}[^,)]*", "", create_sql, count=1)
+    new_sql = re.sub(rf'^CREATE TABLE\s+"?{re.escape(table)}"?', f"CREATE TABLE {table}__new", new_sql, count=1)
+    keep = ", ".join(
+        row[1] for row in conn.execute(text(f"PRAGMA table_info({table})")).all() if row[1] != column
+    )
+    conn.execute(text(new_sql))
+    conn.execute(text(f"INSERT INTO {table}__new ({keep}) SELECT {keep} FROM {table}"))
+    conn.execute(text(f"DROP TABLE {table}"))
+    conn.execute(text(f"ALTER TABLE {table}__new RENAME TO {table}"))
+    for index_sql in index_sqls:
+        conn.execute(text(index_sql))
+
+
+def _ensure_vector_blob_column(table: str) -> None:
+    # Forward-only migration: add the binary ``embedding_vector`` column, convert any legacy
+    # JSON float lists into blobs, then drop ``embedding_vector_json``. The ORM no longer
+    # writes it and it is NOT NULL without a default, so leaving it breaks every INSERT.
+    if engine.dialect.name != "sqlite":
+        return
+    inspector = inspect(engine)
+    if table not in inspector.get_table_names():
+        return
+    columns = {col["name"] for col in inspector.get_columns(table)}
+    with engine.begin() as conn:
+        if "embedding_vector" not in columns:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN embedding_vector BLOB NULL"))
+            if "embedding_vector_json" in columns:
+                rows = conn.execute(
+                    text(
+                        f"SELECT id, embedding_vector_json FROM {table} "
+                        "WHERE json_array_length(embedding_vector_json) > 0"
+                    )
+                ).all()
+                for row_id, raw in rows:
+                    blob = encode_vector(json.loads(raw), settings.embedding_storage_dtype)
+                    conn.execute(
+                        text(f"UPDATE {table} SET embedding_vector = :blob WHERE id = :id"), {"blob": blob, "id": row_id}
+                    )
+        # Checked separately: databases migrated before the drop existed still carry the column.
+        if "embedding_vector_json" in columns:
+            _drop_column(conn, table, "embedding_vector_json")
+
+
 def _ensure_envelopes_profile_columns() -> None:
     # Lightweight forward-only migration for local SQLite dev DBs.
     if engine.dialect.name != "sqlite":
@@ -28,12 +93,22 @@ def _ensure_envelopes_profile_columns() -> None:
     statements: list[str] = []
     if "keywords_json" not in columns:
         statements.append("ALTER TABLE envelopes ADD COLUMN keywords_json JSON NOT NULL DEFAULT '[]'")
-    if "embedding_vector_json" not in columns:
-        statements.append("ALTER TABLE envelopes ADD COLUMN embedding_vector_json JSON NOT NULL DEFAULT '[]'")
     if "card_count" not in columns:
         statements.append("ALTER TABLE envelopes ADD COLUMN card_count INTEGER NOT NULL DEFAULT 0")
     if "last_card_at" not in columns:
         statements.append("ALTER TABLE envelopes ADD COLUMN last_card_at DATETIME NULL")
+    if "embedding_count" not in columns:
+        statements.append("ALTER TABLE envelopes ADD COLUMN embedding_count INTEGER NOT NULL DEFAULT 0")
+        # Existing centroids were full means over the envelope's cards.
+        if "embedding_vector_json" in columns:
+            statements.append(
+                "UPDATE envelopes SET embedding_count = card_count "
+                "WHERE json_array_length(embedding_vector_json) > 0"
+            )
+        elif "embedding_vector" in columns:
+            statements.append("UPDATE envelopes SET embedding_count = card_count WHERE embedding_vector IS NOT NULL")
+    if "keyword_weights_json" not in columns:
+        statements.append("ALTER TABLE envelopes ADD COLUMN keyword_weights_json JSON NOT NULL DEFAULT '{}'")
     if statements:
         with engine.begin() as conn:
             for stmt in statements:
@@ -61,6 +136,186 @@ def _ensure_user_context_table() -> None:
         )
 
 
+def _ensure_user_context_debounce_columns() -> None:
+    # Lightweight forward-only migration for local SQLite dev DBs.
+    if engine.dialect.name != "sqlite":
+        return
+    inspector = inspect(engine)
+    if "user_context" not in inspector.get_table_names():
+        return
+    columns = {col["name"] for col in inspector.get_columns("user_context")}
+    statements: list[str] = []
+    if "evidence_sha256" not in columns:
+        statements.append("ALTER TABLE user_context ADD COLUMN evidence_sha256 VARCHAR(64) NULL")
+    if "last_card_id" not in columns:
+        statements.append("ALTER TABLE user_context ADD COLUMN last_card_id INTEGER NULL")
+    if statements:
+        with engine.begin() as conn:
+            for stmt in statements:
+                conn.execute(text(stmt))
+
+
+def _ensure_user_context_delta_columns() -> None:
+    # Forward-only migration: delta-update bookkeeping on snapshots created before it existed.
+    if engine.dialect.name != "sqlite":
+        return
+    inspector = inspect(engine)
+    if "user_context" not in inspector.get_table_names():
+        return
+    columns = {col["name"] for col in inspector.get_columns("user_context")}
+    statements: list[str] = []
+    if "seen_evidence_json" not in columns:
+        statements.append("ALTER TABLE user_context ADD COLUMN seen_evidence_json JSON NULL")
+    if "delta_updates_since_full" not in columns:
+        statements.append("ALTER TABLE user_context ADD COLUMN delta_updates_since_full INTEGER NOT NULL DEFAULT 0")
+    if statements:
+        with engine.begin() as conn:
+            for stmt in statements:
+                conn.execute(text(stmt))
+
+
+def _ensure_thinking_watermark_suggestions_column() -> None:
+    # Forward-only migration: watermarks saved before suggestion sets were kept start with a full run.
+    if engine.dialect.name != "sqlite":
+        return
+    inspector = inspect(engine)
+    if "thinking_watermark" not in inspector.get_table_names():
+        return
+    columns = {col["name"] for col in inspector.get_columns("thinking_watermark")}
+    if "suggestions_json" not in columns:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE thinking_watermark ADD COLUMN suggestions_json JSON NULL"))
+
+
+def _ensure_background_jobs_queue_columns() -> None:
+    # Forward-only migration: lease/retry/dedup columns for job tables created before the queue had them.
+    # Checked per column so an interrupted run (SQLite DDL is not transactional here) resumes cleanly.
+    if engine.dialect.name != "sqlite":
+        return
+    inspector = inspect(engine)
+    if "background_jobs" not in inspector.get_table_names():
+        return
+    columns = {col["name"] for col in inspector.get_columns("background_jobs")}
+    added = {
+        "payload_json": "JSON NOT NULL DEFAULT '{}'",
+        "dedup_key": "VARCHAR(255) NULL",
+        "priority": "INTEGER NOT NULL DEFAULT 0",
+        "max_attempts": "INTEGER NOT NULL DEFAULT 5",
+        # SQLite only accepts constant defaults here; rows are re-dated from created_at below.
+        "run_after": "DATETIME NOT NULL DEFAULT '1970-01-01 00:00:00'",
+        "lease_owner": "VARCHAR(255) NULL",
+        "lease_expires_at": "DATETIME NULL",
+        "result_json": "JSON NULL",
+        "finished_at": "DATETIME NULL",
+    }
+    missing = {name: ddl for name, ddl in added.items() if name not in columns}
+    if not missing:
+        return
+    with engine.begin() as conn:
+        for name, ddl in missing.items():
+            conn.execute(text(f"ALTER TABLE background_jobs ADD COLUMN {name} {ddl}"))
+        if "run_after" in missing:
+            conn.execute(text("UPDATE background_jobs SET run_after = created_at"))
+        # Pending jobs were already coalesced one per envelope / one context update.
+        conn.execute(
+            text(
+                "UPDATE background_jobs SET dedup_key = kind || ':' || subject_id, priority = 20 "
+                "WHERE status = 'pending' AND kind = 'refine_envelope' AND dedup_key IS NULL"
+            )
+        )
+        conn.execute(
+            text(
+                "UPDATE background_jobs SET dedup_key = kind, priority = 10 "
+                "WHERE status = 'pending' AND kind = 'update_context' AND dedup_key IS NULL"
+            )
+        )
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_background_jobs_claim ON background_jobs (status, priority, run_after)"))
+        conn.execute(
+            text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS ux_background_jobs_dedup_pending "
+                "ON background_jobs (dedup_key) WHERE status = 'pending'"
+            )
+        )
+
+
+def _ensure_evidence_indexes() -> None:
+    # Forward-only migration: persisted card importance plus the indexes behind context evidence selection.
+    # create_all() only indexes tables it creates, so existing tables get them here.
+    if engine.dialect.name != "sqlite":
+        return
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    if "cards" not in tables or "envelopes" not in tables:
+        return
+    columns = {col["name"] for col in inspector.get_columns("cards")}
+    with engine.begin() as conn:
+        if "importance_score" not in columns:
+            conn.execute(text("ALTER TABLE cards ADD COLUMN importance_score FLOAT NOT NULL DEFAULT 0"))
+            # Same formula as models.card_importance_score, computed once for existing rows.
+            conn.execute(
+                text(
+                    "UPDATE cards SET importance_score = ROUND("
+                    "(CASE card_type WHEN 'task' THEN 2.0 WHEN 'reminder' THEN 1.5 ELSE 0.0 END)"
+                    " + (CASE WHEN due_at IS NOT NULL THEN 1.0 ELSE 0.0 END)"
+                    " + (CASE WHEN assignee_text IS NOT NULL THEN 0.6 ELSE 0.0 END)"
+                    " + MIN(COALESCE(json_array_length(keywords_json), 0), 5) * 0.15, 4)"
+                )
+            )
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_cards_created_at ON cards (created_at)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_cards_updated_at ON cards (updated_at)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_cards_envelope_created ON cards (envelope_id, created_at)"))
+        conn.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_cards_envelope_importance "
+                "ON cards (envelope_id, importance_score, created_at)"
+            )
+        )
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_envelopes_activity ON envelopes (card_count, updated_at)"))
+
+
+def _backfill_envelope_terms() -> None:
+    # Envelopes created before the inverted term index existed have no rows in it yet.
+    from assistant.db.models import EnvelopeORM, EnvelopeTermORM
+    from assistant.db.repo_envelopes import EnvelopesRepository
+
+    with SessionLocal() as session:
+        indexed = session.query(EnvelopeTermORM.envelope_id).distinct().subquery()
+        missing = session.query(EnvelopeORM).filter(EnvelopeORM.id.not_in(select(indexed))).all()
+        if not missing:
+            return
+        repo = EnvelopesRepository(session)
+        for envelope in missing:
+            repo.reindex_terms(envelope)
+        session.commit()
+
+
+def _backfill_context_entities() -> None:
+    # Cards ingested before context_entities existed are folded in once.
+    from assistant.db.models import CardORM, ContextEntityORM
+    from assistant.db.repo_context import ContextRepository
+
+    with SessionLocal() as session:
+        if session.query(ContextEntityORM.label).first() is not None or session.query(CardORM.id).first() is None:
+            return
+        ContextRepository(session).rebuild_context_entities()
+        session.commit()
+
+
+def _backfill_context_history() -> None:
+    # A snapshot written before user_context_versions existed becomes the first keyframe.
+    from assistant.db.models import UserContextORM, UserContextVersionORM
+    from assistant.db.repo_context_history import ContextHistoryRepository
+
+    with SessionLocal() as session:
+        snapshot = session.query(UserContextORM).filter(UserContextORM.id == 1).one_or_none()
+        if snapshot is None or session.query(UserContextVersionORM.id).first() is not None:
+            return
+        ContextHistoryRepository(session).record(
+            snapshot.context_json, snapshot.focus_summary, created_at=snapshot.updated_at
+        )
+        session.commit()
+
+
 def _drop_legacy_thinking_tables() -> None:
     # Thinking suggestions are now file artifacts; drop obsolete tables when present.
     with engine.begin() as conn:
@@ -74,5 +329,15 @@ def init_db() -> None:
     Base.metadata.create_all(bind=engine)
     _ensure_cards_reasoning_steps_column()
     _ensure_envelopes_profile_columns()
+    _ensure_vector_blob_column("cards")
+    _ensure_vector_blob_column("envelopes")
     _ensure_user_context_table()
+    _ensure_user_context_debounce_columns()
+    _ensure_user_context_delta_columns()
+    _ensure_background_jobs_queue_columns()
+    _ensure_thinking_watermark_suggestions_column()
+    _ensure_evidence_indexes()
+    _backfill_envelope_terms()
+    _backfill_context_entities()
+    _backfill_context_history()
     _drop_legacy_thinking_tables()
@@ -2,20 +2,29 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import JSON, DateTime, ForeignKey, Integer, String, Text
+import numpy as np
+
+from sqlalchemy import JSON, DateTime, Float, ForeignKey, Index, Integer, String, Text, event, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from assistant.db.base import Base
+from assistant.db.base import Base, settings
+from assistant.db.types import VectorBlob
 
 
 class EnvelopeORM(Base):
     __tablename__ = "envelopes"
+    # Serves "most active envelopes" (card_count DESC, updated_at DESC) as an index scan.
+    __table_args__ = (Index("ix_envelopes_activity", "card_count", "updated_at"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
     summary: Mapped[str | None] = mapped_column(Text, nullable=True)
     keywords_json: Mapped[list[str]] = mapped_column(JSON, default=list, nullable=False)
-    embedding_vector_json: Mapped[list[float]] = mapped_column(JSON, default=list, nullable=False)
+    embedding_vector: Mapped[np.ndarray | None] = mapped_column(
+        VectorBlob(settings.embedding_storage_dtype), nullable=True
+    )
+    embedding_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    keyword_weights_json: Mapped[dict[str, float]] = mapped_column(JSON, default=dict, nullable=False)
     card_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     last_card_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
@@ -24,8 +33,37 @@ class EnvelopeORM(Base):
     cards: Mapped[list["CardORM"]] = relationship(back_populates="envelope")
 
 
+class EnvelopeTermORM(Base):
+    """Inverted index row: one lowercased term of an envelope, by source (``keyword`` or ``text``)."""
+
+    __tablename__ = "envelope_terms"
+    __table_args__ = (Index("ix_envelope_terms_term", "term"),)
+
+    envelope_id: Mapped[int] = mapped_column(ForeignKey("envelopes.id", ondelete="CASCADE"), primary_key=True)
+    source: Mapped[str] = mapped_column(String(20), primary_key=True)
+    term: Mapped[str] = mapped_column(String(255), primary_key=True)
+
+
+def card_importance_score(card_type: str, due_at: datetime | None, assignee_text: str | None, keywords: list[str] | None) -> float:
+    """Static evidence weight of a card: type, due date, assignee and (capped) keyword count."""
+    score = {"task": 2.0, "reminder": 1.5}.get(card_type, 0.0)
+    if due_at is not None:
+        score += 1.0
+    if assignee_text is not None:
+        score += 0.6
+    return round(score + min(len(keywords or []), 5) * 0.15, 4)
+
+
 class CardORM(Base):
     __tablename__ = "cards"
+    __table_args__ = (
+        Index("ix_cards_created_at", "created_at"),
+        # Thinking watermark: max(updated_at) and "changed since" are index reads.
+        Index("ix_cards_updated_at", "updated_at"),
+        Index("ix_cards_envelope_created", "envelope_id", "created_at"),
+        # Top-evidence card per envelope is a single index seek.
+        Index("ix_cards_envelope_importance", "envelope_id", "importance_score", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     raw_text: Mapped[str] = mapped_column(Text, nullable=False)
@@ -35,13 +73,24 @@ class CardORM(Base):
     assignee_text: Mapped[str | None] = mapped_column(String(255), nullable=True)
     keywords_json: Mapped[list[str]] = mapped_column(JSON, default=list, nullable=False)
     reasoning_steps_json: Mapped[list[str]] = mapped_column(JSON, default=list, nullable=False)
+    embedding_vector: Mapped[np.ndarray | None] = mapped_column(
+        VectorBlob(settings.embedding_storage_dtype), nullable=True
+    )
     envelope_id: Mapped[int | None] = mapped_column(ForeignKey("envelopes.id"), nullable=True)
+    # Persisted card_importance_score(); kept current by the ORM write hooks below.
+    importance_score: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
     envelope: Mapped[EnvelopeORM | None] = relationship(back_populates="cards")
 
 
+@event.listens_for(CardORM, "before_insert")
+@event.listens_for(CardORM, "before_update")
+def _set_card_importance_score(mapper, connection, card: CardORM) -> None:
+    card.importance_score = card_importance_score(card.card_type, card.due_at, card.assignee_text, card.keywords_json)
+
+
 class IngestionEventORM(Base):
     __tablename__ = "ingestion_events"
 
@@ -55,6 +104,66 @@ class IngestionEventORM(Base):
     latency_ms: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
+    stage_timings: Mapped[list["IngestionStageTimingORM"]] = relationship(
+        back_populates="event", cascade="all, delete-orphan"
+    )
+
+
+class IngestionStageTimingORM(Base):
+    """Wall-clock time one ingest spent in one pipeline stage (extract, embed, route, ..., commit)."""
+
+    __tablename__ = "ingestion_stage_timings"
+    __table_args__ = (Index("ix_ingestion_stage_timings_stage_created", "stage", "created_at"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    event_id: Mapped[int] = mapped_column(ForeignKey("ingestion_events.id"), index=True, nullable=False)
+    stage: Mapped[str] = mapped_column(String(32), nullable=False)
+    duration_ms: Mapped[float] = mapped_column(Float, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    event: Mapped[IngestionEventORM] = relationship(back_populates="stage_timings")
+
+
+class BackgroundJobORM(Base):
+    """Durable background work item claimed by workers under a time-limited lease.
+
+    ``dedup_key`` is unique among pending rows only, so "refine envelope 7" queued twice
+    collapses into one job while a copy may still be running with older inputs.
+    """
+
+    __tablename__ = "background_jobs"
+    __table_args__ = (
+        Index("ix_background_jobs_status_kind", "status", "kind"),
+        Index("ix_background_jobs_claim", "status", "priority", "run_after"),
+        Index(
+            "ux_background_jobs_dedup_pending",
+            "dedup_key",
+            unique=True,
+            sqlite_where=text("status = 'pending'"),
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    kind: Mapped[str] = mapped_column(String(50), nullable=False)
+    # envelope id for refine jobs, latest card id for context jobs.
+    subject_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    payload_json: Mapped[dict] = mapped_column(JSON, default=dict, nullable=False)
+    dedup_key: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    # Higher runs first.
+    priority: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    status: Mapped[str] = mapped_column(String(20), default="pending", nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=5, nullable=False)
+    run_after: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    lease_owner: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    error_text: Mapped[str | None] = mapped_column(Text, nullable=True)
+    result_json: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
 
 class UserContextORM(Base):
     __tablename__ = "user_context"
@@ -63,11 +172,83 @@ class UserContextORM(Base):
     context_json: Mapped[str] = mapped_column(Text, nullable=False)
     focus_summary: Mapped[str | None] = mapped_column(Text, nullable=True)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    # sha256 of the evidence set the snapshot was last checked against, and the newest card it has seen.
+    evidence_sha256: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    last_card_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # Delta updates: evidence card id -> content hash already folded into the snapshot, and how
+    # many delta updates ran since the last full refresh.
+    seen_evidence_json: Mapped[dict[str, str] | None] = mapped_column(JSON, nullable=True)
+    delta_updates_since_full: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
+class UserContextVersionORM(Base):
+    """Append-only history of the user context snapshot, one row per change.
+
+    ``payload_json`` holds the full ``{"context", "focus_summary"}`` document for a
+    ``keyframe`` and RFC 6902 operations against the previous version for a ``diff``;
+    a version is rebuilt from the nearest keyframe at or before it.
+    """
+
+    __tablename__ = "user_context_versions"
+    __table_args__ = (Index("ix_user_context_versions_kind_id", "kind", "id"), {"sqlite_autoincrement": True})
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    kind: Mapped[str] = mapped_column(String(10), nullable=False)
+    payload_json: Mapped[dict | list] = mapped_column(JSON, nullable=False)
+    # "update" for LLM updates, "rollback" when an older version was restored.
+    source: Mapped[str] = mapped_column(String(20), default="update", nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ThinkingWatermarkORM(Base):
+    """Singleton (``id=1``) high-water marks of the inputs the last thinking run saw.
+
+    A run is skipped while cards, envelopes and the context snapshot are all unchanged;
+    otherwise only records past these marks are sent, with ``suggestions_digest``
+    summarizing earlier suggestions. ``suggestions_json`` holds the current suggestion
+    set, which incremental runs (returning only new or revised items) are merged into.
+    """
+
+    __tablename__ = "thinking_watermark"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    last_card_id: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    cards_updated_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    envelopes_updated_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    context_updated_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    prompt_version: Mapped[str] = mapped_column(String(50), nullable=False)
+    suggestions_digest: Mapped[str | None] = mapped_column(Text, nullable=True)
+    suggestions_json: Mapped[list | None] = mapped_column(JSON, nullable=True)
+    incremental_runs_since_full: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    last_run_id: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    last_run_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ContextEntityORM(Base):
+    """Running, exponentially time-decayed mention score of one person/theme across all cards.
+
+    ``log_score`` is ``log(sum(weight * exp(rate * (t - epoch))))``: every score decays by the
+    same factor as time passes, so ranking by ``log_score`` needs no decay at read time.
+    """
+
+    __tablename__ = "context_entities"
+    __table_args__ = (Index("ix_context_entities_log_score", "log_score"),)
+
+    label: Mapped[str] = mapped_column(String(300), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)
+    log_score: Mapped[float] = mapped_column(Float, nullable=False)
+    mention_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    last_seen_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
 
 
 __all__ = [
     "EnvelopeORM",
     "CardORM",
     "IngestionEventORM",
+    "IngestionStageTimingORM",
     "UserContextORM",
+    "UserContextVersionORM",
+    "ContextEntityORM",
+    "ThinkingWatermarkORM",
+    "BackgroundJobORM",
 ]
@@ -2,9 +2,11 @@ from __future__ import annotations
 
 from datetime import datetime
 
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
 
 from assistant.db.models import CardORM
+from assistant.db.repo_context import ContextRepository
 
 
 class CardsRepository:
@@ -21,6 +23,7 @@ class CardsRepository:
         keywords: list[str],
         reasoning_steps: list[str],
         envelope_id: int | None,
+        embedding_vector: list[float] | None = None,
     ) -> CardORM:
         card = CardORM(
             raw_text=raw_text,
@@ -30,10 +33,12 @@ class CardsRepository:
             assignee_text=assignee_text,
             keywords_json=keywords,
             reasoning_steps_json=reasoning_steps,
+            embedding_vector=embedding_vector,
             envelope_id=envelope_id,
         )
         self.session.add(card)
         self.session.flush()
+        ContextRepository(self.session).record_card(card)
         return card
 
     def list_cards(self, limit: int | None = None) -> list[CardORM]:
@@ -42,8 +47,43 @@ class CardsRepository:
             query = query.limit(limit)
         return query.all()
 
+    def list_changed_since(
+        self, after_id: int, updated_after: datetime | None, limit: int | None = None
+    ) -> list[CardORM]:
+        """Cards created after ``after_id`` or updated after ``updated_after``, newest first."""
+        changed = CardORM.id > after_id
+        if updated_after is not None:
+            changed = or_(changed, CardORM.updated_at > updated_after)
+        query = self.session.query(CardORM).filter(changed).order_by(CardORM.created_at.desc())
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
     def list_by_envelope(self, envelope_id: int, limit: int | None = None) -> list[CardORM]:
         query = self.session.query(CardORM).filter(CardORM.envelope_id == envelope_id).order_by(CardORM.created_at.desc())
         if limit is not None:
             query = query.limit(limit)
         return query.all()
+
+    def list_missing_embeddings(self, after_id: int = 0, limit: int | None = None) -> list[CardORM]:
+        # Empty vectors are stored as NULL, which marks a card as "not embedded yet".
+        query = (
+            self.session.query(CardORM)
+            .filter(CardORM.id > after_id)
+            .filter(CardORM.embedding_vector.is_(None))
+            .order_by(CardORM.id.asc())
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    def update_embedding(self, card: CardORM, embedding_vector: list[float]) -> CardORM:
+        card.embedding_vector = embedding_vector
+        self.session.flush()
+        return card
+
+    def max_id(self) -> int:
+        return int(self.session.query(func.max(CardORM.id)).scalar() or 0)
+
+    def count_after(self, card_id: int) -> int:
+        return int(self.session.query(func.count(CardORM.id)).filter(CardORM.id > card_id).scalar() or 0)
@@ -1,15 +1,24 @@
 from __future__ import annotations
 
 import json
-from collections import Counter
+import math
 from dataclasses import dataclass
+from datetime import datetime
 
 from sqlalchemy.orm import Session
 
-from assistant.db.models import CardORM
+from assistant.db.base import settings
+from assistant.db.models import CardORM, ContextEntityORM
 from assistant.db.repo_context_snapshot import ContextSnapshotRepository
 
 
+# Scores decay from a fixed epoch, so stored log-scores never need rewriting as time passes.
+DECAY_EPOCH = datetime(2020, 1, 1)
+PERSON_WEIGHT = 1.2
+THEME_WEIGHT = 0.8
+MAX_THEMES_PER_CARD = 5
+
+
 @dataclass
 class DerivedContextItem:
     label: str
@@ -17,36 +26,107 @@ class DerivedContextItem:
     mention_count: int
 
 
+def card_entity_weights(assignee_text: str | None, keywords: list[str] | None) -> dict[str, tuple[str, float]]:
+    """label -> (kind, weight) for one card; a label counts once per card."""
+    weights: dict[str, tuple[str, float]] = {}
+    if assignee_text:
+        weights[f"person:{assignee_text}"] = ("person", PERSON_WEIGHT)
+    for keyword in (keywords or [])[:MAX_THEMES_PER_CARD]:
+        weights.setdefault(f"theme:{keyword}", ("theme", THEME_WEIGHT))
+    return weights
+
+
+def _log_add(a: float, b: float) -> float:
+    high, low = (a, b) if a >= b else (b, a)
+    return high + math.log1p(math.exp(low - high))
+
+
 class ContextRepository:
-    def __init__(self, session: Session):
+    def __init__(self, session: Session, half_life_days: float | None = None):
         self.session = session
+        days = settings.context_entity_half_life_days if half_life_days is None else half_life_days
+        self.decay_rate = math.log(2) / (max(days, 1e-6) * 86400.0)
 
-    def top_context_entities(self, limit: int = 10) -> list[DerivedContextItem]:
-        """Derive context from cards only (assignees + keywords), no entity tables."""
-        cards = self.session.query(CardORM).order_by(CardORM.created_at.desc()).limit(500).all()
+    def _decay_exponent(self, at: datetime) -> float:
+        return self.decay_rate * (at - DECAY_EPOCH).total_seconds()
 
-        weighted_counts: Counter[str] = Counter()
-        mentions: Counter[str] = Counter()
+    def record_card(self, card: CardORM) -> None:
+        """Fold one new card's assignee and keywords into ``context_entities`` (same transaction)."""
+        weights = card_entity_weights(card.assignee_text, card.keywords_json)
+        if not weights:
+            return
+        seen_at = card.created_at or datetime.utcnow()
+        exponent = self._decay_exponent(seen_at)
+        existing = {
+            row.label: row
+            for row in self.session.query(ContextEntityORM).filter(ContextEntityORM.label.in_(list(weights)))
+        }
+        for label, (kind, weight) in weights.items():
+            log_weight = math.log(weight) + exponent
+            row = existing.get(label)
+            if row is None:
+                self.session.add(
+                    ContextEntityORM(label=label, kind=kind, log_score=log_weight, mention_count=1, last_seen_at=seen_at)
+                )
+                continue
+            row.log_score = _log_add(row.log_score, log_weight)
+            row.mention_count += 1
+            row.last_seen_at = max(row.last_seen_at, seen_at)
+        self.session.flush()
 
-        # Recency-aware weighting: latest cards contribute higher signal.
-        total = len(cards)
-        for idx, card in enumerate(cards):
-            recency_weight = 1.0 - (idx / max(total, 1)) * 0.5
+    def rebuild_context_entities(self, batch_size: int = 1000) -> int:
+        """Recompute every entity from all cards (backfill, or after changing the half-life)."""
+        totals: dict[str, list] = {}
+        last_id = 0
+        while True:
+            rows = (
+                self.session.query(CardORM.id, CardORM.assignee_text, CardORM.keywords_json, CardORM.created_at)
+                .filter(CardORM.id > last_id)
+                .order_by(CardORM.id.asc())
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+            for _, assignee_text, keywords, created_at in rows:
+                exponent = self._decay_exponent(created_at)
+                for label, (kind, weight) in card_entity_weights(assignee_text, keywords).items():
+                    log_weight = math.log(weight) + exponent
+                    entry = totals.get(label)
+                    if entry is None:
+                        totals[label] = [kind, log_weight, 1, created_at]
+                    else:
+                        entry[1] = _log_add(entry[1], log_weight)
+                        entry[2] += 1
+                        entry[3] = max(entry[3], created_at)
+            last_id = rows[-1][0]
 
-            if card.assignee_text:
-                label = f"person:{card.assignee_text}"
-                weighted_counts[label] += 1.2 * recency_weight
-                mentions[label] += 1
+        self.session.query(ContextEntityORM).delete(synchronize_session=False)
+        self.session.bulk_insert_mappings(
+            ContextEntityORM,
+            [
+                {"label": label, "kind": kind, "log_score": log_score, "mention_count": count, "last_seen_at": seen_at}
+                for label, (kind, log_score, count, seen_at) in totals.items()
+            ],
+        )
+        self.session.flush()
+        return len(totals)
 
-            for keyword in (card.keywords_json or [])[:5]:
-                label = f"theme:{keyword}"
-                weighted_counts[label] += 0.8 * recency_weight
-                mentions[label] += 1
+    def top_context_entities(self, limit: int = 10, now: datetime | None = None) -> list[DerivedContextItem]:
+        """Strongest people/themes over the whole card history, by decayed mention weight.
 
-        top = weighted_counts.most_common(limit)
+        One indexed top-N read: ranking by ``log_score`` equals ranking by decayed score, and
+        the decay to ``now`` is applied only to the returned rows.
+        """
+        offset = self._decay_exponent(now or datetime.utcnow())
+        rows = self.session.query(ContextEntityORM).order_by(ContextEntityORM.log_score.desc()).limit(limit).all()
         return [
-            DerivedContextItem(label=label, strength=float(strength), mention_count=int(mentions[label]))
-            for label, strength in top
+            DerivedContextItem(
+                label=row.label,
+                strength=math.exp(row.log_score - offset),
+                mention_count=int(row.mention_count),
+            )
+            for row in rows
         ]
 
     def get_persisted_context(self) -> dict | None:
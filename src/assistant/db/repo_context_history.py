@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from assistant.db.base import settings
+from assistant.db.models import UserContextVersionORM
+from assistant.services.json_patch import apply_patch, json_diff
+
+KIND_KEYFRAME = "keyframe"
+KIND_DIFF = "diff"
+
+
+def context_document(context_json: str, focus_summary: str | None) -> dict[str, Any]:
+    return {"context": json.loads(context_json), "focus_summary": focus_summary}
+
+
+class ContextHistoryRepository:
+    def __init__(
+        self,
+        session: Session,
+        *,
+        keyframe_every: int | None = None,
+        max_versions: int | None = None,
+    ):
+        self.session = session
+        self.keyframe_every = settings.context_history_keyframe_every if keyframe_every is None else keyframe_every
+        self.max_versions = settings.context_history_max_versions if max_versions is None else max_versions
+
+    def latest(self) -> UserContextVersionORM | None:
+        return self.session.query(UserContextVersionORM).order_by(UserContextVersionORM.id.desc()).first()
+
+    def list_versions(self, limit: int = 20) -> list[UserContextVersionORM]:
+        return (
+            self.session.query(UserContextVersionORM)
+            .order_by(UserContextVersionORM.id.desc())
+            .limit(max(0, limit))
+            .all()
+        )
+
+    def _keyframe_id(self, version: int) -> int | None:
+        return (
+            self.session.query(func.max(UserContextVersionORM.id))
+            .filter(UserContextVersionORM.kind == KIND_KEYFRAME, UserContextVersionORM.id <= version)
+            .scalar()
+        )
+
+    def get_document(self, version: int) -> dict[str, Any] | None:
+        """Rebuild one version: its nearest keyframe plus at most ``keyframe_every - 1`` diffs."""
+        keyframe_id = self._keyframe_id(version)
+        if keyframe_id is None:
+            return None
+        rows = (
+            self.session.query(UserContextVersionORM)
+            .filter(UserContextVersionORM.id >= keyframe_id, UserContextVersionORM.id <= version)
+            .order_by(UserContextVersionORM.id.asc())
+            .all()
+        )
+        if not rows or rows[-1].id != version:
+            return None
+        document = rows[0].payload_json
+        for row in rows[1:]:
+            document = apply_patch(document, row.payload_json)
+        return document
+
+    def record(
+        self,
+        context_json: str,
+        focus_summary: str | None,
+        *,
+        created_at: datetime | None = None,
+        source: str = "update",
+    ) -> UserContextVersionORM | None:
+        """Append a version unless the document equals the latest one; compacts old versions."""
+        document = context_document(context_json, focus_summary)
+        latest = self.latest()
+        previous = self.get_document(latest.id) if latest is not None else None
+        if previous == document:
+            return None
+        kind, payload = KIND_DIFF, None
+        if previous is None:
+            kind = KIND_KEYFRAME
+        else:
+            keyframe_id = self._keyframe_id(latest.id)
+            chain = (
+                self.session.query(func.count(UserContextVersionORM.id))
+                .filter(UserContextVersionORM.id > keyframe_id)
+                .scalar()
+            )
+            if self.keyframe_every <= 1 or chain + 1 >= self.keyframe_every:
+                kind = KIND_KEYFRAME
+            else:
+                payload = json_diff(previous, document)
+        row = UserContextVersionORM(
+            kind=kind,
+            payload_json=document if kind == KIND_KEYFRAME else payload,
+            source=source,
+            created_at=created_at or datetime.utcnow(),
+        )
+        self.session.add(row)
+        self.session.flush()
+        if self.max_versions > 0:
+            self.compact(self.max_versions)
+        return row
+
+    def compact(self, max_versions: int) -> int:
+        """Drop all but the newest ``max_versions`` versions; the oldest kept one becomes a keyframe."""
+        cutoff = (
+            self.session.query(UserContextVersionORM)
+            .order_by(UserContextVersionORM.id.desc())
+            .offset(max(1, max_versions) - 1)
+            .first()
+        )
+        if cutoff is None:
+            return 0
+        older = self.session.query(UserContextVersionORM).filter(UserContextVersionORM.id < cutoff.id)
+        if older.first() is None:
+            return 0
+        if cutoff.kind != KIND_KEYFRAME:
+            cutoff.payload_json = self.get_document(cutoff.id)
+            cutoff.kind = KIND_KEYFRAME
+        deleted = older.delete(synchronize_session=False)
+        self.session.flush()
+        return deleted
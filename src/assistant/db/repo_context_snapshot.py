@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import json
 from datetime import datetime
 
 from sqlalchemy.orm import Session
 
 from assistant.db.models import UserContextORM
+from assistant.db.repo_context_history import ContextHistoryRepository
 
 
 class ContextSnapshotRepository:
@@ -14,7 +16,19 @@ class ContextSnapshotRepository:
     def get_snapshot(self) -> UserContextORM | None:
         return self.session.query(UserContextORM).filter(UserContextORM.id == 1).one_or_none()
 
-    def upsert_snapshot(self, *, context_json: str, focus_summary: str | None, updated_at: datetime) -> UserContextORM:
+    def upsert_snapshot(
+        self,
+        *,
+        context_json: str,
+        focus_summary: str | None,
+        updated_at: datetime,
+        evidence_sha256: str | None = None,
+        last_card_id: int | None = None,
+        seen_evidence: dict[str, str] | None = None,
+        delta_updates_since_full: int = 0,
+        source: str = "update",
+    ) -> UserContextORM:
+        """Overwrite the snapshot row and append the change to ``user_context_versions``."""
         row = self.get_snapshot()
         if row is None:
             row = UserContextORM(id=1, context_json=context_json, focus_summary=focus_summary, updated_at=updated_at)
@@ -23,5 +37,36 @@ class ContextSnapshotRepository:
             row.context_json = context_json
             row.focus_summary = focus_summary
             row.updated_at = updated_at
+        row.evidence_sha256 = evidence_sha256
+        row.last_card_id = last_card_id
+        row.seen_evidence_json = seen_evidence
+        row.delta_updates_since_full = delta_updates_since_full
         self.session.flush()
+        ContextHistoryRepository(self.session).record(
+            context_json, focus_summary, created_at=updated_at, source=source
+        )
         return row
+
+    def restore_version(self, version: int, *, now: datetime | None = None) -> UserContextORM | None:
+        """Make an older history version current again (recorded as a new ``rollback`` version).
+
+        The evidence hash and seen-card map are cleared, so the next update is a full refresh.
+        """
+        document = ContextHistoryRepository(self.session).get_document(version)
+        if document is None:
+            return None
+        current = self.get_snapshot()
+        return self.upsert_snapshot(
+            context_json=json.dumps(document["context"], ensure_ascii=False, separators=(",", ":")),
+            focus_summary=document["focus_summary"],
+            updated_at=now or datetime.utcnow(),
+            last_card_id=current.last_card_id if current is not None else None,
+            source="rollback",
+        )
+
+    def mark_seen(self, row: UserContextORM, *, last_card_id: int, evidence_sha256: str | None = None) -> None:
+        """Record that cards up to ``last_card_id`` were checked without changing the context."""
+        row.last_card_id = last_card_id
+        if evidence_sha256 is not None:
+            row.evidence_sha256 = evidence_sha256
+        self.session.flush()
@@ -1,10 +1,39 @@
 from __future__ import annotations
 
+import re
+from dataclasses import dataclass
 from datetime import datetime
 
+import numpy as np
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
 
-from assistant.db.models import EnvelopeORM
+from assistant.db.models import EnvelopeORM, EnvelopeTermORM
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def keyword_terms(keywords: list[str] | None) -> set[str]:
+    return {kw.lower() for kw in (keywords or []) if kw}
+
+
+def text_terms(*texts: str | None) -> set[str]:
+    """Whitespace words (the scorer's keyword fallback) plus bare word tokens (assignee lookups)."""
+    joined = " ".join(t for t in texts if t).lower()
+    return set(joined.split()) | set(_WORD_RE.findall(joined))
+
+
+@dataclass(frozen=True)
+class CentroidStamp:
+    """Summary of the stored centroids; it moves whenever one is added, rewritten or removed."""
+
+    count: int
+    card_total: int
+    updated_at: datetime | None
+
+    @property
+    def token(self) -> str:
+        return f"{self.count}:{self.card_total}:{self.updated_at.isoformat() if self.updated_at else ''}"
 
 
 class EnvelopesRepository:
@@ -17,6 +46,95 @@ class EnvelopesRepository:
             query = query.limit(limit)
         return query.all()
 
+    def list_changed_since(
+        self, updated_after: datetime | None, envelope_ids: set[int], limit: int | None = None
+    ) -> list[EnvelopeORM]:
+        """Envelopes updated after ``updated_after`` plus ``envelope_ids``, most recently updated first."""
+        changed = EnvelopeORM.id.in_(sorted(envelope_ids))
+        if updated_after is not None:
+            changed = or_(changed, EnvelopeORM.updated_at > updated_after)
+        query = self.session.query(EnvelopeORM).filter(changed).order_by(EnvelopeORM.updated_at.desc())
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    def count_envelopes(self) -> int:
+        return self.session.query(func.count(EnvelopeORM.id)).scalar() or 0
+
+    def count_with_embedding(self) -> int:
+        query = self.session.query(func.count(EnvelopeORM.id)).filter(EnvelopeORM.embedding_vector.is_not(None))
+        return query.scalar() or 0
+
+    def centroid_stamp(self) -> CentroidStamp:
+        count, card_total, updated_at = self.session.query(
+            func.count(EnvelopeORM.embedding_vector),
+            func.coalesce(func.sum(EnvelopeORM.card_count), 0),
+            func.max(EnvelopeORM.updated_at),
+        ).one()
+        return CentroidStamp(count=int(count or 0), card_total=int(card_total or 0), updated_at=updated_at)
+
+    def list_embeddings_updated_since(self, updated_at: datetime) -> list[tuple[int, np.ndarray | None]]:
+        """(id, centroid) of envelopes updated at or after ``updated_at``; None marks a dropped centroid."""
+        rows = (
+            self.session.query(EnvelopeORM.id, EnvelopeORM.embedding_vector)
+            .filter(EnvelopeORM.updated_at >= updated_at)
+            .all()
+        )
+        return [(row.id, row.embedding_vector) for row in rows]
+
+    def list_embeddings(self) -> list[tuple[int, np.ndarray]]:
+        rows = (
+            self.session.query(EnvelopeORM.id, EnvelopeORM.embedding_vector)
+            .filter(EnvelopeORM.embedding_vector.is_not(None))
+            .all()
+        )
+        return [(row.id, row.embedding_vector) for row in rows]
+
+    def list_routing_candidates(self, envelope_ids: list[int]) -> list[EnvelopeORM]:
+        """Envelopes in ``envelope_ids`` plus any without a centroid, in ``list_envelopes`` order."""
+        return (
+            self.session.query(EnvelopeORM)
+            .filter(or_(EnvelopeORM.id.in_(envelope_ids), EnvelopeORM.embedding_vector.is_(None)))
+            .order_by(EnvelopeORM.updated_at.desc())
+            .all()
+        )
+
+    def find_by_terms(self, terms: set[str]) -> set[int]:
+        """Envelope ids with any of ``terms`` as a keyword or name/summary word."""
+        if not terms:
+            return set()
+        rows = (
+            self.session.query(EnvelopeTermORM.envelope_id)
+            .filter(EnvelopeTermORM.term.in_(sorted(terms)))
+            .distinct()
+            .all()
+        )
+        return {row.envelope_id for row in rows}
+
+    def _sync_terms(self, envelope: EnvelopeORM, source: str, terms: set[str]) -> None:
+        # Only the difference is written, so unchanged profiles cost one indexed read.
+        existing = {
+            row.term
+            for row in self.session.query(EnvelopeTermORM.term).filter(
+                EnvelopeTermORM.envelope_id == envelope.id, EnvelopeTermORM.source == source
+            )
+        }
+        stale = existing - terms
+        if stale:
+            self.session.query(EnvelopeTermORM).filter(
+                EnvelopeTermORM.envelope_id == envelope.id,
+                EnvelopeTermORM.source == source,
+                EnvelopeTermORM.term.in_(sorted(stale)),
+            ).delete(synchronize_session=False)
+        self.session.add_all(
+            EnvelopeTermORM(envelope_id=envelope.id, source=source, term=term) for term in sorted(terms - existing)
+        )
+
+    def reindex_terms(self, envelope: EnvelopeORM) -> None:
+        self._sync_terms(envelope, "keyword", keyword_terms(envelope.keywords_json))
+        self._sync_terms(envelope, "text", text_terms(envelope.name, envelope.summary))
+        self.session.flush()
+
     def get_by_name(self, name: str) -> EnvelopeORM | None:
         return self.session.query(EnvelopeORM).filter(EnvelopeORM.name == name).one_or_none()
 
@@ -28,12 +146,16 @@ class EnvelopesRepository:
             name=name,
             summary=summary,
             keywords_json=[],
-            embedding_vector_json=[],
+            embedding_vector=None,
+            embedding_count=0,
+            keyword_weights_json={},
             card_count=0,
             last_card_at=None,
         )
         self.session.add(envelope)
         self.session.flush()
+        self._sync_terms(envelope, "text", text_terms(name, summary))
+        self.session.flush()
         return envelope
 
     def update_profile(
@@ -44,16 +166,24 @@ class EnvelopesRepository:
         embedding_vector: list[float],
         card_count: int,
         last_card_at: datetime | None,
+        embedding_count: int | None = None,
+        keyword_weights: dict[str, float] | None = None,
     ) -> EnvelopeORM:
         envelope.keywords_json = keywords
-        envelope.embedding_vector_json = embedding_vector
+        envelope.embedding_vector = embedding_vector
+        if embedding_count is not None:
+            envelope.embedding_count = embedding_count
+        if keyword_weights is not None:
+            envelope.keyword_weights_json = keyword_weights
         envelope.card_count = card_count
         envelope.last_card_at = last_card_at
+        self._sync_terms(envelope, "keyword", keyword_terms(keywords))
         self.session.flush()
         return envelope
 
     def update_summary(self, envelope: EnvelopeORM, *, name: str, summary: str | None) -> EnvelopeORM:
         envelope.name = name
         envelope.summary = summary
+        self._sync_terms(envelope, "text", text_terms(name, summary))
         self.session.flush()
         return envelope
@@ -1,8 +1,22 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
+from datetime import datetime
+
 from sqlalchemy.orm import Session
 
-from assistant.db.models import IngestionEventORM
+from assistant.db.models import IngestionEventORM, IngestionStageTimingORM
+from assistant.observability.timings import INGEST_STAGES, percentile
+
+
+@dataclass
+class StageLatencyStats:
+    stage: str
+    count: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
 
 
 class EventsRepository:
@@ -18,7 +32,8 @@ class EventsRepository:
         latency_ms: int,
         card_id: int | None = None,
         error_text: str | None = None,
-    ) -> None:
+        stage_timings: dict[str, float] | None = None,
+    ) -> IngestionEventORM:
         event = IngestionEventORM(
             card_id=card_id,
             model_name=model_name,
@@ -29,3 +44,36 @@ class EventsRepository:
             error_text=error_text,
         )
         self.session.add(event)
+        if stage_timings:
+            self.add_stage_timings(event, stage_timings)
+        return event
+
+    def add_stage_timings(self, event: IngestionEventORM, stage_timings: dict[str, float]) -> None:
+        event.stage_timings.extend(
+            IngestionStageTimingORM(stage=stage, duration_ms=round(duration_ms, 3))
+            for stage, duration_ms in stage_timings.items()
+        )
+
+    def stage_latency_stats(self, since: datetime, until: datetime | None = None) -> list[StageLatencyStats]:
+        """p50/p95/p99/max per stage for timings recorded in ``[since, until)``."""
+        query = self.session.query(IngestionStageTimingORM.stage, IngestionStageTimingORM.duration_ms).filter(
+            IngestionStageTimingORM.created_at >= since
+        )
+        if until is not None:
+            query = query.filter(IngestionStageTimingORM.created_at < until)
+        durations: dict[str, list[float]] = {}
+        for stage, duration_ms in query.order_by(IngestionStageTimingORM.stage, IngestionStageTimingORM.duration_ms):
+            durations.setdefault(stage, []).append(float(duration_ms))
+
+        order = {stage: idx for idx, stage in enumerate(INGEST_STAGES)}
+        return [
+            StageLatencyStats(
+                stage=stage,
+                count=len(values),
+                p50_ms=percentile(values, 50),
+                p95_ms=percentile(values, 95),
+                p99_ms=percentile(values, 99),
+                max_ms=values[-1],
+            )
+            for stage, values in sorted(durations.items(), key=lambda item: (order.get(item[0], len(order)), item[0]))
+        ]
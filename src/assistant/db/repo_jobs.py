@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Any, Iterable
+
+from sqlalchemy import String, and_, cast, func, literal, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, aliased
+
+from assistant.db.models import BackgroundJobORM
+
+JOB_REFINE_ENVELOPE = "refine_envelope"
+JOB_UPDATE_CONTEXT = "update_context"
+JOB_THINKING_RUN = "thinking_run"
+JOB_BACKFILL_EMBEDDINGS = "backfill_embeddings"
+JOB_REINDEX_ENVELOPES = "reindex_envelopes"
+
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+# A failed attempt whose retry was absorbed by a newer pending job with the same dedup key.
+STATUS_SUPERSEDED = "superseded"
+
+# Refinement before the context update that reads refined envelope names; maintenance last.
+DEFAULT_PRIORITIES = {
+    JOB_REFINE_ENVELOPE: 20,
+    JOB_UPDATE_CONTEXT: 10,
+    JOB_THINKING_RUN: 0,
+    JOB_BACKFILL_EMBEDDINGS: -10,
+    JOB_REINDEX_ENVELOPES: -10,
+}
+
+
+def retry_delay_seconds(attempts: int, base_seconds: float, max_seconds: float) -> float:
+    """Exponential backoff after the ``attempts``-th failure: base, 2*base, 4*base, ... capped."""
+    return min(max_seconds, base_seconds * (2 ** max(0, attempts - 1)))
+
+
+class JobsRepository:
+    def __init__(self, session: Session):
+        self.session = session
+
+    def _pending_by_dedup_key(self, dedup_key: str) -> BackgroundJobORM | None:
+        return (
+            self.session.query(BackgroundJobORM)
+            .filter(BackgroundJobORM.status == STATUS_PENDING, BackgroundJobORM.dedup_key == dedup_key)
+            .populate_existing()
+            .one_or_none()
+        )
+
+    def _insert_ignoring_duplicate(self, values: dict[str, Any]) -> int | None:
+        dialect = self.session.get_bind().dialect.name
+        if dialect == "sqlite":
+            stmt = sqlite.insert(BackgroundJobORM).values(**values)
+        elif dialect == "postgresql":
+            stmt = postgresql.insert(BackgroundJobORM).values(**values)
+        else:
+            self.session.add(BackgroundJobORM(**values))
+            self.session.flush()
+            return self._pending_by_dedup_key(values["dedup_key"]).id
+        # Another writer (thread or process) may have queued the same job since our lookup.
+        stmt = stmt.on_conflict_do_nothing(
+            index_elements=[BackgroundJobORM.dedup_key],
+            index_where=BackgroundJobORM.status == STATUS_PENDING,
+        )
+        result = self.session.execute(stmt)
+        return result.inserted_primary_key[0] if result.rowcount == 1 else None
+
+    def enqueue(
+        self,
+        kind: str,
+        subject_id: int | None = None,
+        *,
+        payload: dict[str, Any] | None = None,
+        dedup_key: str | None = None,
+        priority: int | None = None,
+        max_attempts: int = 5,
+        run_after: datetime | None = None,
+        now: datetime | None = None,
+    ) -> BackgroundJobORM:
+        """Queue a job, or merge it into the pending job with the same ``dedup_key``.
+
+        A merged job takes the newest subject and payload, the higher priority and the
+        earlier ``run_after``; jobs already running are left alone, so work queued while
+        a copy runs still gets its own pass.
+        """
+        now = now or datetime.utcnow()
+        values = {
+            "kind": kind,
+            "subject_id": subject_id,
+            "payload_json": payload or {},
+            "dedup_key": dedup_key,
+            "priority": DEFAULT_PRIORITIES.get(kind, 0) if priority is None else priority,
+            "status": STATUS_PENDING,
+            "attempts": 0,
+            "max_attempts": max(1, max_attempts),
+            "run_after": run_after or now,
+            "created_at": now,
+            "updated_at": now,
+        }
+        if dedup_key is None:
+            job = BackgroundJobORM(**values)
+            self.session.add(job)
+            self.session.flush()
+            return job
+
+        for _ in range(2):
+            existing = self._pending_by_dedup_key(dedup_key)
+            if existing is not None:
+                existing.subject_id = subject_id
+                existing.payload_json = values["payload_json"]
+                existing.priority = max(existing.priority, values["priority"])
+                existing.run_after = min(existing.run_after, values["run_after"])
+                existing.updated_at = now
+                self.session.flush()
+                return existing
+            job_id = self._insert_ignoring_duplicate(values)
+            if job_id is not None:
+                return self.session.get(BackgroundJobORM, job_id)
+        raise RuntimeError(f"could not enqueue job with dedup_key '{dedup_key}'")
+
+    def enqueue_refine(self, envelope_id: int, **kwargs: Any) -> BackgroundJobORM:
+        return self.enqueue(JOB_REFINE_ENVELOPE, envelope_id, dedup_key=f"{JOB_REFINE_ENVELOPE}:{envelope_id}", **kwargs)
+
+    def enqueue_context_update(self, card_id: int, **kwargs: Any) -> BackgroundJobORM:
+        # One pending context update absorbs a whole burst of cards; it runs for the newest one.
+        return self.enqueue(JOB_UPDATE_CONTEXT, card_id, dedup_key=JOB_UPDATE_CONTEXT, **kwargs)
+
+    def enqueue_singleton(self, kind: str, **kwargs: Any) -> BackgroundJobORM:
+        """Queue a whole-store job (thinking run, backfill, reindex); at most one is pending."""
+        return self.enqueue(kind, dedup_key=kind, **kwargs)
+
+    def _lease_expired(self, now: datetime):
+        return and_(BackgroundJobORM.status == STATUS_RUNNING, BackgroundJobORM.lease_expires_at < now)
+
+    def _claimable(self, now: datetime):
+        return or_(
+            and_(BackgroundJobORM.status == STATUS_PENDING, BackgroundJobORM.run_after <= now),
+            and_(self._lease_expired(now), BackgroundJobORM.attempts < BackgroundJobORM.max_attempts),
+        )
+
+    def fail_expired_leases(self, now: datetime | None = None) -> int:
+        """Dead-letter running jobs whose lease expired on their last allowed attempt.
+
+        A job that keeps killing its worker (crash, OOM, hang past the lease) would
+        otherwise be leased again forever.
+        """
+        now = now or datetime.utcnow()
+        stmt = (
+            update(BackgroundJobORM)
+            .where(self._lease_expired(now), BackgroundJobORM.attempts >= BackgroundJobORM.max_attempts)
+            .values(
+                status=STATUS_FAILED,
+                error_text=literal("lease expired after ") + cast(BackgroundJobORM.attempts, String) + " attempts",
+                lease_owner=None,
+                lease_expires_at=None,
+                finished_at=now,
+                updated_at=now,
+            )
+        )
+        return self.session.execute(stmt, execution_options={"synchronize_session": False}).rowcount
+
+    def claim(
+        self,
+        worker_id: str,
+        *,
+        lease_seconds: float,
+        limit: int = 1,
+        kinds: Iterable[str] | None = None,
+        kind_limits: dict[str, int] | None = None,
+        now: datetime | None = None,
+    ) -> list[BackgroundJobORM]:
+        """Lease up to ``limit`` due jobs, highest priority first.
+
+        Jobs whose lease expired (the worker died) are claimable again while they have
+        attempts left; those on their last attempt are failed instead. Each claim is a
+        single conditional UPDATE, so concurrent workers never lease the same job and a
+        kind never exceeds its ``kind_limits`` running jobs. The caller commits.
+        """
+        now = now or datetime.utcnow()
+        kind_limits = kind_limits or {}
+        self.fail_expired_leases(now)
+        query = self.session.query(BackgroundJobORM.id, BackgroundJobORM.kind).filter(self._claimable(now))
+        if kinds is not None:
+            query = query.filter(BackgroundJobORM.kind.in_(list(kinds)))
+        candidates = query.order_by(BackgroundJobORM.priority.desc(), BackgroundJobORM.id).limit(limit * 4 + 16).all()
+
+        running = aliased(BackgroundJobORM)
+        lease_until = now + timedelta(seconds=lease_seconds)
+        claimed: list[int] = []
+        for job_id, kind in candidates:
+            if len(claimed) >= limit:
+                break
+            stmt = update(BackgroundJobORM).where(BackgroundJobORM.id == job_id, self._claimable(now))
+            kind_limit = kind_limits.get(kind)
+            if kind_limit is not None:
+                active = (
+                    select(func.count(running.id))
+                    .where(
+                        running.kind == kind,
+                        running.status == STATUS_RUNNING,
+                        running.lease_expires_at >= now,
+                        running.id != job_id,
+                    )
+                    .scalar_subquery()
+                )
+                stmt = stmt.where(active < kind_limit)
+            stmt = stmt.values(
+                status=STATUS_RUNNING,
+                lease_owner=worker_id,
+                lease_expires_at=lease_until,
+                attempts=BackgroundJobORM.attempts + 1,
+                updated_at=now,
+            )
+            if self.session.execute(stmt, execution_options={"synchronize_session": False}).rowcount == 1:
+                claimed.append(job_id)
+        if not claimed:
+            return []
+        return (
+            self.session.query(BackgroundJobORM)
+            .filter(BackgroundJobORM.id.in_(claimed))
+            .populate_existing()
+            .order_by(BackgroundJobORM.priority.desc(), BackgroundJobORM.id)
+            .all()
+        )
+
+    def extend_leases(
+        self, worker_id: str, job_ids: Iterable[int], *, lease_seconds: float, now: datetime | None = None
+    ) -> int:
+        ids = list(job_ids)
+        if not ids:
+            return 0
+        now = now or datetime.utcnow()
+        stmt = (
+            update(BackgroundJobORM)
+            .where(
+                BackgroundJobORM.id.in_(ids),
+                BackgroundJobORM.status == STATUS_RUNNING,
+                BackgroundJobORM.lease_owner == worker_id,
+            )
+            .values(lease_expires_at=now + timedelta(seconds=lease_seconds), updated_at=now)
+        )
+        return self.session.execute(stmt, execution_options={"synchronize_session": False}).rowcount
+
+    def _owned(self, job: BackgroundJobORM, worker_id: str):
+        return update(BackgroundJobORM).where(
+            BackgroundJobORM.id == job.id,
+            BackgroundJobORM.status == STATUS_RUNNING,
+            BackgroundJobORM.lease_owner == worker_id,
+        )
+
+    def complete(
+        self, job: BackgroundJobORM, worker_id: str, result: dict[str, Any] | None = None, now: datetime | None = None
+    ) -> bool:
+        """Mark a leased job done; False if the lease was lost to another worker."""
+        now = now or datetime.utcnow()
+        stmt = self._owned(job, worker_id).values(
+            status=STATUS_DONE,
+            result_json=result,
+            error_text=None,
+            lease_owner=None,
+            lease_expires_at=None,
+            finished_at=now,
+            updated_at=now,
+        )
+        return self.session.execute(stmt, execution_options={"synchronize_session": False}).rowcount == 1
+
+    def fail(
+        self,
+        job: BackgroundJobORM,
+        worker_id: str,
+        error_text: str,
+        *,
+        retry_base_seconds: float,
+        retry_max_seconds: float,
+        now: datetime | None = None,
+    ) -> str | None:
+        """Record a failed attempt and return the job's new status (None if the lease was lost).
+
+        The job goes back to pending with exponential backoff until ``max_attempts`` is
+        reached, then stays failed.
+        """
+        now = now or datetime.utcnow()
+        # The attempt counter was bumped at claim time; read it fresh.
+        attempts, max_attempts, dedup_key = self.session.execute(
+            select(BackgroundJobORM.attempts, BackgroundJobORM.max_attempts, BackgroundJobORM.dedup_key).where(
+                BackgroundJobORM.id == job.id
+            )
+        ).one()
+        values: dict[str, Any] = {
+            "error_text": error_text[:2000],
+            "lease_owner": None,
+            "lease_expires_at": None,
+            "updated_at": now,
+        }
+        if attempts >= max_attempts:
+            status = STATUS_FAILED
+            values["finished_at"] = now
+        elif dedup_key is not None and self._pending_by_dedup_key(dedup_key) is not None:
+            status = STATUS_SUPERSEDED
+            values["finished_at"] = now
+        else:
+            status = STATUS_PENDING
+            delay = retry_delay_seconds(attempts, retry_base_seconds, retry_max_seconds)
+            values["run_after"] = now + timedelta(seconds=delay)
+        values["status"] = status
+        updated = self.session.execute(
+            self._owned(job, worker_id).values(**values), execution_options={"synchronize_session": False}
+        ).rowcount
+        return status if updated == 1 else None
+
+    def requeue_failed(self, kind: str | None = None, now: datetime | None = None) -> int:
+        """Give dead jobs a fresh set of attempts."""
+        now = now or datetime.utcnow()
+        failed = self.session.query(BackgroundJobORM).filter(BackgroundJobORM.status == STATUS_FAILED)
+        if kind is not None:
+            failed = failed.filter(BackgroundJobORM.kind == kind)
+        requeued = 0
+        for job in failed.all():
+            if job.dedup_key is not None and self._pending_by_dedup_key(job.dedup_key) is not None:
+                continue
+            job.status = STATUS_PENDING
+            job.attempts = 0
+            job.run_after = now
+            job.finished_at = None
+            job.updated_at = now
+            self.session.flush()
+            requeued += 1
+        return requeued
+
+    def get(self, job_id: int) -> BackgroundJobORM | None:
+        return self.session.get(BackgroundJobORM, job_id, populate_existing=True)
+
+    def list_pending(self, limit: int = 100) -> list[BackgroundJobORM]:
+        return (
+            self.session.query(BackgroundJobORM)
+            .filter(BackgroundJobORM.status == STATUS_PENDING)
+            .order_by(BackgroundJobORM.priority.desc(), BackgroundJobORM.id)
+            .limit(limit)
+            .all()
+        )
+
+    def count_by_status(self) -> dict[str, int]:
+        rows = (
+            self.session.query(BackgroundJobORM.status, func.count(BackgroundJobORM.id))
+            .group_by(BackgroundJobORM.status)
+            .all()
+        )
+        return {status: int(count) for status, count in rows}
+
+    def count_by_kind_and_status(self) -> dict[tuple[str, str], int]:
+        rows = (
+            self.session.query(BackgroundJobORM.kind, BackgroundJobORM.status, func.count(BackgroundJobORM.id))
+            .group_by(BackgroundJobORM.kind, BackgroundJobORM.status)
+            .all()
+        )
+        return {(kind, status): int(count) for kind, status, count in rows}
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from assistant.db.models import CardORM, EnvelopeORM, ThinkingWatermarkORM, UserContextORM
+
+
+@dataclass(frozen=True)
+class ThinkingMarks:
+    """High-water marks of the thinking inputs; equal marks mean nothing changed."""
+
+    last_card_id: int
+    cards_updated_at: datetime | None
+    envelopes_updated_at: datetime | None
+    context_updated_at: datetime | None
+
+
+class ThinkingWatermarkRepository:
+    def __init__(self, session: Session):
+        self.session = session
+
+    def current_marks(self) -> ThinkingMarks:
+        """Three aggregate reads: max card id/updated_at (indexed), envelopes and the context row."""
+        last_card_id, cards_updated_at = self.session.query(func.max(CardORM.id), func.max(CardORM.updated_at)).one()
+        envelopes_updated_at = self.session.query(func.max(EnvelopeORM.updated_at)).scalar()
+        context_updated_at = (
+            self.session.query(UserContextORM.updated_at).filter(UserContextORM.id == 1).scalar()
+        )
+        return ThinkingMarks(
+            last_card_id=int(last_card_id or 0),
+            cards_updated_at=cards_updated_at,
+            envelopes_updated_at=envelopes_updated_at,
+            context_updated_at=context_updated_at,
+        )
+
+    def get(self) -> ThinkingWatermarkORM | None:
+        return self.session.query(ThinkingWatermarkORM).filter(ThinkingWatermarkORM.id == 1).one_or_none()
+
+    @staticmethod
+    def marks_of(row: ThinkingWatermarkORM) -> ThinkingMarks:
+        return ThinkingMarks(
+            last_card_id=row.last_card_id,
+            cards_updated_at=row.cards_updated_at,
+            envelopes_updated_at=row.envelopes_updated_at,
+            context_updated_at=row.context_updated_at,
+        )
+
+    def save(
+        self,
+        marks: ThinkingMarks,
+        *,
+        prompt_version: str,
+        suggestions_digest: str | None,
+        suggestions: list[dict],
+        incremental_runs_since_full: int,
+        run_id: str,
+        run_at: datetime,
+    ) -> ThinkingWatermarkORM:
+        row = self.get()
+        if row is None:
+            row = ThinkingWatermarkORM(id=1)
+            self.session.add(row)
+        row.last_card_id = marks.last_card_id
+        row.cards_updated_at = marks.cards_updated_at
+        row.envelopes_updated_at = marks.envelopes_updated_at
+        row.context_updated_at = marks.context_updated_at
+        row.prompt_version = prompt_version
+        row.suggestions_digest = suggestions_digest
+        row.suggestions_json = suggestions
+        row.incremental_runs_since_full = incremental_runs_since_full
+        row.last_run_id = run_id
+        row.last_run_at = run_at
+        self.session.flush()
+        return row
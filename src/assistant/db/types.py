@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import struct
+from typing import Any, Sequence
+
+import numpy as np
+from sqlalchemy import LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+# Blob layout: 1-byte dtype code, 3 pad bytes, little-endian float32 scale, payload.
+# The 8-byte header keeps the payload aligned so float32 rows decode as a zero-copy view.
+_HEADER = struct.Struct("<c3xf")
+_DTYPES: dict[str, tuple[bytes, np.dtype]] = {
+    "float32": (b"f", np.dtype("<f4")),
+    "float16": (b"e", np.dtype("<f2")),
+    "int8": (b"b", np.dtype("i1")),
+}
+_BY_CODE = {code: (name, dtype) for name, (code, dtype) in _DTYPES.items()}
+
+
+def encode_vector(vec: Sequence[float] | np.ndarray, dtype: str = "float32") -> bytes:
+    if dtype not in _DTYPES:
+        raise ValueError(f"Unsupported vector storage dtype '{dtype}'. Supported: {', '.join(_DTYPES)}")
+    code, np_dtype = _DTYPES[dtype]
+    arr = np.asarray(vec, dtype=np.float32).reshape(-1)
+    scale = 1.0
+    if dtype == "int8":
+        peak = float(np.max(np.abs(arr))) if arr.size else 0.0
+        scale = peak / 127.0 if peak > 0 else 1.0
+        payload = np.clip(np.rint(arr / scale), -127, 127).astype(np_dtype)
+    else:
+        payload = arr.astype(np_dtype, copy=False)
+    return _HEADER.pack(code, scale) + payload.tobytes()
+
+
+def decode_vector(blob: bytes) -> np.ndarray:
+    """Decode a stored vector; float32 blobs are returned as a read-only view of ``blob``."""
+    code, scale = _HEADER.unpack_from(blob)
+    if code not in _BY_CODE:
+        raise ValueError(f"Unknown vector storage code {code!r}")
+    name, np_dtype = _BY_CODE[code]
+    arr = np.frombuffer(blob, dtype=np_dtype, offset=_HEADER.size)
+    if name == "int8":
+        return arr.astype(np.float32) * np.float32(scale)
+    return arr
+
+
+class VectorBlob(TypeDecorator):
+    """Dense embedding stored as a compact binary blob; empty vectors are stored as NULL."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def __init__(self, dtype: str = "float32", *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        if dtype not in _DTYPES:
+            raise ValueError(f"Unsupported vector storage dtype '{dtype}'. Supported: {', '.join(_DTYPES)}")
+        self.dtype = dtype
+
+    def process_bind_param(self, value: Any, dialect: Any) -> bytes | None:
+        if value is None or len(value) == 0:
+            return None
+        return encode_vector(value, self.dtype)
+
+    def compare_values(self, x: Any, y: Any) -> bool:
+        # Default ``==`` is ambiguous for arrays; the ORM calls this to detect changes.
+        if x is None or y is None:
+            return x is y
+        return bool(np.array_equal(np.asarray(x), np.asarray(y)))
+
+    def process_result_value(self, value: Any, dialect: Any) -> np.ndarray | None:
+        if value is None:
+            return None
+        return decode_vector(bytes(value))
@@ -1,21 +1,30 @@
 import json
 import shlex
 import threading
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Optional
 
 import typer
 from sqlalchemy import MetaData, create_engine, text
 
-from assistant.agents.thinking.artifacts import list_artifacts, write_run
+from assistant.agents.organization.agent import OrganizationAgent
+from assistant.agents.thinking.artifacts import list_artifacts
 from assistant.config.logging import configure_logging
 from assistant.config.settings import Settings, get_settings
 from assistant.db.base import Base
 from assistant.db.connection import SessionLocal, init_db
 from assistant.db.models import CardORM, EnvelopeORM
 from assistant.db.repo_context import ContextRepository
+from assistant.db.repo_context_history import ContextHistoryRepository
+from assistant.db.repo_context_snapshot import ContextSnapshotRepository
+from assistant.db.repo_events import EventsRepository, StageLatencyStats
+from assistant.db.repo_jobs import JOB_REFINE_ENVELOPE, JOB_THINKING_RUN, JOB_UPDATE_CONTEXT, JobsRepository
+from assistant.observability.tracing import configure_tracing, read_spans, render_trace, slowest_traces
 from assistant.pipeline.orchestrator import AssistantOrchestrator
+from assistant.pipeline.worker import JOB_HANDLERS, BackgroundWorker, DrainResult, JobOutcome, WorkerPool
+from assistant.services.embeddings import embedding_breaker_stats, embedding_cache_stats
 
 app = typer.Typer(help="Contextual Personal Assistant CLI")
 
@@ -23,6 +32,7 @@ app = typer.Typer(help="Contextual Personal Assistant CLI")
 @app.callback()
 def main() -> None:
     configure_logging()
+    configure_tracing(get_settings())
     init_db()
 
 
@@ -42,9 +52,9 @@ def _err(msg: str) -> None:
     typer.secho(msg, fg=typer.colors.RED, bold=True)
 
 
-def _run_ingest(settings: Settings, note: str) -> dict:
+def _run_ingest(settings: Settings, note: str, *, background_worker: bool = False) -> dict:
     with SessionLocal() as session:
-        orchestrator = AssistantOrchestrator(session, settings)
+        orchestrator = AssistantOrchestrator(session, settings, background_worker=background_worker)
         result = orchestrator.ingest_note(note)
     payload = result.model_dump(mode="json")
     _ok("Card Created")
@@ -52,6 +62,49 @@ def _run_ingest(settings: Settings, note: str) -> dict:
     return payload
 
 
+def _read_notes_jsonl(path: Path) -> list[str]:
+    notes: list[str] = []
+    for line_no, line in enumerate(path.read_text(encoding="utf-8").splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"{path}:{line_no}: invalid JSON ({exc.msg})") from exc
+        note = row.get("note") if isinstance(row, dict) else None
+        if not isinstance(note, str) or not note.strip():
+            raise ValueError(f"{path}:{line_no}: expected an object with a non-empty \"note\" string")
+        notes.append(note)
+    return notes
+
+
+def _run_ingest_batch(
+    settings: Settings, file: Path, workers: Optional[int] = None, *, background_worker: bool = False
+) -> list[dict]:
+    if not file.exists():
+        _err(f"file not found: {file}")
+        raise typer.Exit(code=1)
+    try:
+        notes = _read_notes_jsonl(file)
+    except ValueError as exc:
+        _err(str(exc))
+        raise typer.Exit(code=2) from exc
+    started = time.perf_counter()
+    with SessionLocal() as session:
+        orchestrator = AssistantOrchestrator(session, settings, background_worker=background_worker)
+        results = orchestrator.ingest_notes(notes, workers=workers)
+    elapsed = time.perf_counter() - started
+    for result in results:
+        typer.echo(
+            f"[{result.card.id}] {result.card.card_type.value} | {_truncate(result.card.description, 60)} "
+            f"-> {result.envelope_name} (score={result.match_score:.2f})"
+        )
+    if results and results[-1].context_updates:
+        _info("; ".join(results[-1].context_updates))
+    _ok(f"Ingested {len(results)} notes into {len({r.card.envelope_id for r in results})} envelopes in {elapsed:.1f}s")
+    return [result.model_dump(mode="json") for result in results]
+
+
 def _run_cards_list(limit: int) -> None:
     with SessionLocal() as session:
         rows = session.query(CardORM).order_by(CardORM.created_at.desc()).limit(limit).all()
@@ -62,6 +115,207 @@ def _run_cards_list(limit: int) -> None:
         )
 
 
+def _run_backfill_embeddings(settings: Settings, batch_size: Optional[int] = None) -> int:
+    with SessionLocal() as session:
+        filled = OrganizationAgent(session, settings).backfill_card_embeddings(batch_size=batch_size)
+        session.commit()
+    _ok(f"Backfilled embeddings for {filled} cards")
+    return filled
+
+
+def _run_envelopes_rebuild(settings: Settings, envelope_id: Optional[int] = None, refine: bool = False) -> int:
+    with SessionLocal() as session:
+        agent = OrganizationAgent(session, settings)
+        if envelope_id is not None:
+            envelope_ids = [envelope_id]
+        else:
+            envelope_ids = [row[0] for row in session.query(EnvelopeORM.id).order_by(EnvelopeORM.id.asc()).all()]
+            # Embed every legacy card up front with concurrent batches instead of per envelope.
+            agent.backfill_card_embeddings()
+        for env_id in envelope_ids:
+            if refine:
+                agent.refresh_envelope(env_id)
+            else:
+                agent.rebuild_envelope_profile(env_id)
+        session.commit()
+    _ok(f"Rebuilt profiles for {len(envelope_ids)} envelopes")
+    return len(envelope_ids)
+
+
+def _run_envelopes_reindex(settings: Settings) -> int:
+    with SessionLocal() as session:
+        indexed = OrganizationAgent(session, settings).reindex_envelopes()
+    _ok(f"Indexed {indexed} envelope centroids ({settings.envelope_index_kind})")
+    return indexed
+
+
+def _run_embeddings_status(settings: Settings, *, show_circuits: bool = False) -> None:
+    _info(
+        f"provider={settings.effective_embedding_provider} model={settings.effective_embedding_model or '-'} "
+        f"base_url={settings.effective_embedding_base_url or '-'}"
+    )
+    cache = embedding_cache_stats(settings)
+    lookups = cache.hits + cache.misses
+    hit_rate = f"{cache.hits / lookups:.0%}" if lookups else "-"
+    typer.echo(
+        f"cache: entries={cache.entries} hits={cache.hits} misses={cache.misses} hit_rate={hit_rate} "
+        f"writes={cache.writes} evictions={cache.evictions} path={cache.path or 'memory'}"
+    )
+    if not show_circuits:
+        # Breakers live in the process that makes the calls; a one-shot command has made none.
+        return
+    breakers = embedding_breaker_stats()
+    if not breakers:
+        typer.echo("circuit: no embedding calls made in this process yet")
+        return
+    for row in breakers:
+        line = (
+            f"circuit {row.name}: state={row.state} successes={row.successes} failures={row.failures} "
+            f"rejected={row.rejected} opened={row.times_opened} cooldown={row.cooldown_seconds:.0f}s"
+        )
+        if row.state == "closed":
+            _ok(line)
+        else:
+            _warn(f"{line} retry_in={row.retry_in_seconds:.0f}s last_error={row.last_error or '-'}")
+
+
+def _report_drain(result: DrainResult, *, prefix: str = "") -> None:
+    line = f"{prefix}jobs={result.jobs} failed={result.failed} refined_envelopes={len(result.refined_envelopes)}"
+    if result.failed:
+        _warn(line)
+    else:
+        _ok(line)
+    if result.context_messages:
+        _info(prefix.lstrip() + "; ".join(result.context_messages))
+    for outcome in result.outcomes:
+        if outcome.status != "done":
+            _warn(f"{prefix.lstrip()}job {outcome.id_label()} -> {outcome.status}: {outcome.error or '-'}")
+
+
+def _report_job(outcome: JobOutcome) -> None:
+    """Interactive-shell callback for jobs finished by the in-process worker pool."""
+    if outcome.status != "done":
+        _err(f"\n[worker] job {outcome.id_label()} -> {outcome.status}: {outcome.error or '-'}")
+        return
+    result = outcome.result or {}
+    if outcome.kind == JOB_THINKING_RUN and result.get("skipped"):
+        _info("\n[thinking-trigger] skipped: no new or changed cards, envelopes or context since the last run")
+    elif outcome.kind == JOB_THINKING_RUN:
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        _ok(f"\n[thinking-trigger] Thinking Agent triggered at {now}. suggestions={result.get('suggestions', 0)}")
+        _info(f"[thinking-trigger] latest suggestions file: {result.get('artifact_path')}")
+        _info(f"[thinking-trigger] run: show {result.get('artifact_path')}")
+        top = result.get("top")
+        if top:
+            _warn(f"[thinking-trigger] top={top.get('suggestion_type')} | {top.get('title')}")
+    elif outcome.kind == JOB_UPDATE_CONTEXT and result.get("messages"):
+        _info("\n[worker] " + "; ".join(result["messages"]))
+
+
+def _run_jobs_status() -> dict[tuple[str, str], int]:
+    with SessionLocal() as session:
+        counts = JobsRepository(session).count_by_kind_and_status()
+    if not counts:
+        typer.echo("no jobs queued")
+        return counts
+    statuses = ("pending", "running", "done", "failed", "superseded")
+    for kind in sorted({kind for kind, _ in counts}):
+        typer.echo(f"{kind}: " + " ".join(f"{status}={counts.get((kind, status), 0)}" for status in statuses))
+    return counts
+
+
+def _run_stats(hours: float) -> list[StageLatencyStats]:
+    since = datetime.utcnow() - timedelta(hours=hours)
+    with SessionLocal() as session:
+        rows = EventsRepository(session).stage_latency_stats(since)
+    if not rows:
+        typer.echo(f"no ingest stage timings in the last {hours:g}h")
+        return rows
+    _info(f"ingest stage latency over the last {hours:g}h (ms)")
+    typer.echo(f"{'stage':<10} {'n':>6} {'p50':>10} {'p95':>10} {'p99':>10} {'max':>10}")
+    for row in rows:
+        typer.echo(
+            f"{row.stage:<10} {row.count:>6} {row.p50_ms:>10.1f} {row.p95_ms:>10.1f} {row.p99_ms:>10.1f} {row.max_ms:>10.1f}"
+        )
+    return rows
+
+
+def _run_traces(settings: Settings, limit: int, name: Optional[str] = None, min_ms: float = 0.0) -> int:
+    traces = slowest_traces(read_spans(settings.trace_path), limit=limit, name=name)
+    if not traces:
+        hint = "" if settings.tracing_enabled else " (set TRACING_ENABLED=true to record spans)"
+        typer.echo(f"no traces in {settings.trace_path}{hint}")
+        return 0
+    for trace in traces:
+        started = datetime.fromtimestamp(float(trace.root.get("start") or 0.0)).strftime("%Y-%m-%d %H:%M:%S")
+        _info(f"trace {trace.trace_id} {trace.name} {trace.duration_ms:.1f}ms at {started} spans={len(trace.spans)}")
+        for line in render_trace(trace, min_ms=min_ms):
+            typer.echo(line)
+        typer.echo("")
+    return len(traces)
+
+
+def _parse_kinds(kinds: Optional[str]) -> Optional[list[str]]:
+    if not kinds:
+        return None
+    parsed = [kind.strip() for kind in kinds.split(",") if kind.strip()]
+    unknown = [kind for kind in parsed if kind not in JOB_HANDLERS]
+    if unknown:
+        _err(f"unknown job kind(s): {', '.join(unknown)}. Known: {', '.join(JOB_HANDLERS)}")
+        raise typer.Exit(code=2)
+    return parsed
+
+
+def _single_outcome(outcome: JobOutcome) -> DrainResult:
+    result = DrainResult()
+    result.add(outcome)
+    return result
+
+
+def _run_worker_once(settings: Settings, kinds: Optional[list[str]] = None) -> DrainResult:
+    with SessionLocal() as session:
+        result = BackgroundWorker(session, settings).drain_all(kinds=kinds)
+    _report_drain(result)
+    return result
+
+
+def _run_jobs_enqueue(
+    settings: Settings,
+    kind: str,
+    subject_id: Optional[int] = None,
+    priority: Optional[int] = None,
+    batch_size: Optional[int] = None,
+) -> int:
+    if kind not in JOB_HANDLERS:
+        _err(f"unknown job kind: {kind}. Known: {', '.join(JOB_HANDLERS)}")
+        raise typer.Exit(code=2)
+    if kind in {JOB_REFINE_ENVELOPE, JOB_UPDATE_CONTEXT} and subject_id is None:
+        _err(f"{kind} needs --subject-id (envelope id / card id)")
+        raise typer.Exit(code=2)
+    with SessionLocal() as session:
+        repo = JobsRepository(session)
+        options = {"priority": priority, "max_attempts": settings.job_max_attempts}
+        if kind == JOB_REFINE_ENVELOPE:
+            job = repo.enqueue_refine(int(subject_id), **options)
+        elif kind == JOB_UPDATE_CONTEXT:
+            job = repo.enqueue_context_update(int(subject_id), **options)
+        else:
+            payload = {"batch_size": batch_size} if batch_size else None
+            job = repo.enqueue_singleton(kind, payload=payload, **options)
+        session.commit()
+        job_id = job.id
+    _ok(f"queued job {job_id} ({kind})")
+    return job_id
+
+
+def _run_jobs_retry_failed(kind: Optional[str] = None) -> int:
+    with SessionLocal() as session:
+        requeued = JobsRepository(session).requeue_failed(kind)
+        session.commit()
+    _ok(f"requeued {requeued} failed jobs")
+    return requeued
+
+
 def _truncate(text: str, max_len: int = 100) -> str:
     if len(text) <= max_len:
         return text
@@ -114,11 +368,52 @@ def _run_context_show(limit: int, derived: bool) -> None:
         typer.echo(f"{row.label} | strength={row.strength:.2f} | mentions={row.mention_count}")
 
 
-def _run_thinking_cycle(settings: Settings, *, emit_header: bool = True) -> dict:
+def _run_context_history(limit: int) -> None:
+    with SessionLocal() as session:
+        versions = ContextHistoryRepository(session).list_versions(limit=limit)
+        if not versions:
+            typer.echo("No context history yet")
+            return
+        for row in versions:
+            size = f"{len(row.payload_json)} ops" if row.kind == "diff" else "full"
+            typer.echo(f"v{row.id} | {row.created_at:%Y-%m-%d %H:%M:%S} | {row.kind} ({size}) | {row.source}")
+
+
+def _run_context_version_show(version: int) -> None:
+    with SessionLocal() as session:
+        document = ContextHistoryRepository(session).get_document(version)
+    if document is None:
+        typer.echo("Context version not found")
+        raise typer.Exit(code=1)
+    typer.echo(json.dumps(document, indent=2, default=str))
+
+
+def _run_context_rollback(version: int) -> None:
+    with SessionLocal() as session:
+        restored = ContextSnapshotRepository(session).restore_version(version)
+        if restored is None:
+            _err(f"Context version {version} not found")
+            raise typer.Exit(code=1)
+        session.commit()
+    _ok(f"Context restored to version {version}")
+
+
+def _run_context_entities_rebuild() -> int:
+    with SessionLocal() as session:
+        rebuilt = ContextRepository(session).rebuild_context_entities()
+        session.commit()
+    _ok(f"Rebuilt {rebuilt} context entities from all cards")
+    return rebuilt
+
+
+def _run_thinking_cycle(settings: Settings, *, emit_header: bool = True, force: bool = False) -> dict:
     with SessionLocal() as session:
         orchestrator = AssistantOrchestrator(session, settings)
-        output = orchestrator.run_thinking_cycle()
-    artifact_path = write_run(output, settings.thinking_output_dir)
+        run = orchestrator.run_thinking_cycle(force=force)
+    if run is None:
+        _info("thinking skipped: nothing changed since the last run (use --force to run anyway)")
+        return {"skipped": True}
+    output, artifact_path = run
     payload = output.model_dump(mode="json")
     payload["artifact_path"] = str(artifact_path)
     if emit_header:
@@ -206,11 +501,38 @@ def ingest(note: str) -> None:
     _run_ingest(get_settings(), note)
 
 
+@app.command("ingest-batch")
+def ingest_batch(
+    file: Path,
+    workers: Optional[int] = typer.Option(
+        None,
+        "--workers",
+        min=1,
+        help="Concurrent LLM extraction threads. Defaults to INGEST_WORKERS.",
+    ),
+) -> None:
+    """Ingest a JSONL file of {"note": ...} lines (e.g. data/sample_notes.jsonl) in one batch."""
+    _run_ingest_batch(get_settings(), file, workers=workers)
+
+
 @app.command("cards-list")
 def cards_list(limit: int = 20) -> None:
     _run_cards_list(limit)
 
 
+@app.command("cards-backfill-embeddings")
+def cards_backfill_embeddings(
+    batch_size: Optional[int] = typer.Option(
+        None,
+        "--batch-size",
+        min=1,
+        help="Texts per embedding request. Defaults to EMBEDDING_BATCH_SIZE.",
+    )
+) -> None:
+    """Store embeddings for cards that were ingested without one."""
+    _run_backfill_embeddings(get_settings(), batch_size=batch_size)
+
+
 @app.command("envelopes-list")
 def envelopes_list(
     cards_per_envelope: int = typer.Option(
@@ -223,6 +545,97 @@ def envelopes_list(
     _run_envelopes_list(cards_per_envelope)
 
 
+@app.command("envelopes-rebuild")
+def envelopes_rebuild(
+    envelope_id: Optional[int] = typer.Option(None, "--envelope-id", help="Rebuild one envelope only."),
+    refine: bool = typer.Option(False, "--refine/--no-refine", help="Also re-run LLM name/summary refinement."),
+) -> None:
+    """Recompute envelope profiles (centroid, keywords, counts) from all of their cards."""
+    _run_envelopes_rebuild(get_settings(), envelope_id=envelope_id, refine=refine)
+
+
+@app.command("envelopes-reindex")
+def envelopes_reindex() -> None:
+    """Rebuild the envelope ANN routing index from stored centroids."""
+    _run_envelopes_reindex(get_settings())
+
+
+@app.command("embeddings-status")
+def embeddings_status() -> None:
+    """Show embedding cache counters; circuit breakers are per process, see `embeddings` in interactive mode."""
+    _run_embeddings_status(get_settings())
+
+
+@app.command("worker")
+def worker(
+    once: bool = typer.Option(False, "--once", help="Run every due job and exit instead of polling."),
+    threads: Optional[int] = typer.Option(None, "--threads", min=1, help="Worker threads. Defaults to WORKER_THREADS."),
+    kinds: Optional[str] = typer.Option(None, "--kinds", help="Comma-separated job kinds to run (default: all)."),
+) -> None:
+    """Run queued background jobs (refinement, context updates, thinking runs, backfills)."""
+    settings = get_settings()
+    kind_list = _parse_kinds(kinds)
+    if once:
+        _run_worker_once(settings, kinds=kind_list)
+        return
+    pool = WorkerPool(
+        SessionLocal,
+        settings,
+        threads=threads,
+        kinds=kind_list,
+        on_job=lambda outcome: _report_drain(_single_outcome(outcome)),
+    ).start()
+    _info(f"worker pool: threads={pool.threads} polling every {settings.background_poll_seconds:g}s (Ctrl+C to stop)")
+    try:
+        while pool.running:
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    pool.stop()
+    _ok("worker stopped")
+
+
+@app.command("jobs-status")
+def jobs_status() -> None:
+    """Show background job counts by kind and status."""
+    _run_jobs_status()
+
+
+@app.command("stats")
+def stats(
+    hours: float = typer.Option(24.0, "--hours", min=0.0, help="Time window, counted back from now."),
+) -> None:
+    """Show p50/p95/p99 ingest latency per pipeline stage."""
+    _run_stats(hours)
+
+
+@app.command("traces")
+def traces(
+    limit: int = typer.Option(5, "--limit", min=1, help="Number of slowest traces to show."),
+    name: Optional[str] = typer.Option(None, "--name", help="Only traces whose root span has this name, e.g. ingest_note."),
+    min_ms: float = typer.Option(0.0, "--min-ms", min=0.0, help="Hide child spans faster than this."),
+) -> None:
+    """Print a flame-style breakdown of the slowest recorded traces."""
+    _run_traces(get_settings(), limit=limit, name=name, min_ms=min_ms)
+
+
+@app.command("jobs-enqueue")
+def jobs_enqueue(
+    kind: str,
+    subject_id: Optional[int] = typer.Option(None, "--subject-id", help="Envelope id (refine) or card id (context)."),
+    priority: Optional[int] = typer.Option(None, "--priority", help="Higher runs first. Defaults per kind."),
+    batch_size: Optional[int] = typer.Option(None, "--batch-size", min=1, help="backfill_embeddings batch size."),
+) -> None:
+    """Queue a background job; a pending job with the same dedup key absorbs it."""
+    _run_jobs_enqueue(get_settings(), kind, subject_id=subject_id, priority=priority, batch_size=batch_size)
+
+
+@app.command("jobs-retry-failed")
+def jobs_retry_failed(kind: Optional[str] = typer.Option(None, "--kind", help="Only this job kind.")) -> None:
+    """Give jobs that exhausted their attempts a fresh set of retries."""
+    _run_jobs_retry_failed(kind)
+
+
 @app.command("envelope-show")
 def envelope_show(envelope_id: int) -> None:
     _run_envelope_show(envelope_id)
@@ -233,6 +646,30 @@ def context_show(limit: int = 10, derived: bool = False) -> None:
     _run_context_show(limit=limit, derived=derived)
 
 
+@app.command("context-history")
+def context_history(
+    limit: int = 20,
+    version: Optional[int] = typer.Option(None, "--version", help="Show the full context at this version."),
+) -> None:
+    """List user-context versions (newest first), or rebuild one with --version."""
+    if version is not None:
+        _run_context_version_show(version)
+    else:
+        _run_context_history(limit)
+
+
+@app.command("context-rollback")
+def context_rollback(version: int) -> None:
+    """Restore the user context to an earlier version; the next update resends all evidence."""
+    _run_context_rollback(version)
+
+
+@app.command("context-entities-rebuild")
+def context_entities_rebuild() -> None:
+    """Recompute derived-context entity scores from every card (e.g. after changing the half-life)."""
+    _run_context_entities_rebuild()
+
+
 @app.command("thinking-sample")
 def thinking_sample() -> None:
     """Show sample outputs from Thinking Agent examples."""
@@ -252,9 +689,11 @@ def thinking_sample() -> None:
 
 
 @app.command("thinking-run")
-def thinking_run() -> None:
+def thinking_run(
+    force: bool = typer.Option(False, "--force", help="Run with the full input even if nothing changed."),
+) -> None:
     """Execute one thinking cycle and persist the output as a JSON artifact."""
-    _run_thinking_cycle(get_settings())
+    _run_thinking_cycle(get_settings(), force=force)
 
 
 @app.command("thinking-artifacts-list")
@@ -277,11 +716,16 @@ def _interactive_help() -> None:
                 "  help",
                 "  db-reset",
                 "  ingest <note>",
+                "  ingest-batch <file.jsonl>",
                 "  cards [limit]",
                 "  envelopes [cards_per_envelope]",
                 "  envelope <id>",
                 "  context [--derived] [limit]",
-                "  thinking-run",
+                "  embeddings",
+                "  jobs",
+                "  stats [hours]",
+                "  traces [limit]",
+                "  thinking-run [--force]",
                 "  thinking-start [interval_seconds]",
                 "  thinking-stop",
                 "  thinking-status",
@@ -300,26 +744,15 @@ def _start_thinking_trigger(
     interval_seconds: int,
     stop_event: threading.Event,
 ) -> threading.Thread:
+    # The trigger only queues the run; the interactive worker pool executes it and reports via _report_job.
     def _worker() -> None:
         while not stop_event.wait(interval_seconds):
             try:
-                payload = _run_thinking_cycle(settings, emit_header=False)
-                suggestions = payload.get("suggestions", [])
-                artifact_path = payload.get("artifact_path")
-                now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                _ok(
-                    f"\n[thinking-trigger] Thinking Agent triggered at {now}. "
-                    f"suggestions={len(suggestions)}"
-                )
-                _info(f"[thinking-trigger] latest suggestions file: {artifact_path}")
-                _info(f"[thinking-trigger] run: show {artifact_path}")
-                if suggestions:
-                    top = suggestions[0]
-                    _warn(
-                        f"[thinking-trigger] top={top.get('suggestion_type')} | {top.get('title')}"
-                    )
+                with SessionLocal() as session:
+                    JobsRepository(session).enqueue_singleton(JOB_THINKING_RUN, max_attempts=settings.job_max_attempts)
+                    session.commit()
             except Exception as exc:  # noqa: BLE001
-                _err(f"\n[thinking-trigger] failed: {exc}")
+                _err(f"\n[thinking-trigger] failed to queue thinking run: {exc}")
 
     thread = threading.Thread(target=_worker, daemon=True, name="thinking-trigger")
     thread.start()
@@ -386,6 +819,9 @@ def interactive(
     if thinking_trigger:
         _trigger_start(thinking_interval_seconds)
 
+    # Runs queued jobs: deferred refinement/context updates and thinking-trigger runs.
+    pool = WorkerPool(SessionLocal, settings, on_job=_report_job, name="interactive-worker").start()
+
     typer.clear()
     _ok("Interactive mode started.")
     _info("Welcome to Contextual Assistant interactive shell.")
@@ -422,7 +858,12 @@ def interactive(
                 if not args:
                     _warn("usage: ingest <note>")
                     continue
-                _run_ingest(settings, " ".join(args))
+                _run_ingest(settings, " ".join(args), background_worker=True)
+            elif cmd == "ingest-batch":
+                if len(args) != 1:
+                    _warn("usage: ingest-batch <file.jsonl>")
+                    continue
+                _run_ingest_batch(settings, Path(args[0]), background_worker=True)
             elif cmd == "cards":
                 limit = int(args[0]) if args else 20
                 _run_cards_list(limit)
@@ -446,8 +887,16 @@ def interactive(
                 clean_args = [a for a in args if a != "--derived"]
                 limit = int(clean_args[0]) if clean_args else 10
                 _run_context_show(limit=limit, derived=derived)
+            elif cmd == "embeddings":
+                _run_embeddings_status(settings, show_circuits=True)
+            elif cmd == "jobs":
+                _run_jobs_status()
+            elif cmd == "stats":
+                _run_stats(float(args[0]) if args else 24.0)
+            elif cmd == "traces":
+                _run_traces(settings, limit=int(args[0]) if args else 5)
             elif cmd == "thinking-run":
-                _run_thinking_cycle(settings)
+                _run_thinking_cycle(settings, force="--force" in args)
             elif cmd == "thinking-start":
                 interval = int(args[0]) if args else int(trigger_state["interval_seconds"])
                 if interval < 30:
@@ -480,6 +929,7 @@ def interactive(
             _err(f"command failed: {exc}")
 
     _trigger_stop(quiet=True)
+    pool.stop()
     _ok("Interactive mode exited.")
 
 
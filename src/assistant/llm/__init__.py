@@ -1,6 +1,25 @@
 """Shared LLM runtime utilities."""
 
-from assistant.llm.client import build_chat_model, build_llm_config
+from assistant.llm.cache import CachedLLM, LLMResponseCache
+from assistant.llm.client import (
+    build_chat_model,
+    build_llm_config,
+    build_structured_model,
+    get_llm_cache,
+    llm_cache_stats,
+    with_response_cache,
+)
 from assistant.llm.parsing import extract_json_block, parse_structured_content
 
-__all__ = ["build_llm_config", "build_chat_model", "extract_json_block", "parse_structured_content"]
+__all__ = [
+    "build_llm_config",
+    "build_chat_model",
+    "build_structured_model",
+    "with_response_cache",
+    "get_llm_cache",
+    "llm_cache_stats",
+    "CachedLLM",
+    "LLMResponseCache",
+    "extract_json_block",
+    "parse_structured_content",
+]
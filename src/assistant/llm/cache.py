@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_response_cache (
+    cache_key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    schema_name TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_llm_response_cache_last_used ON llm_response_cache (last_used_at);
+"""
+
+
+@dataclass
+class LLMCacheStats:
+    hits: int
+    misses: int
+    writes: int
+    expired: int
+    evictions: int
+    entries: int
+    path: str
+
+
+def _schema_fingerprint(schema: type[BaseModel] | None) -> str:
+    if schema is None:
+        return "text"
+    # Field changes alter the JSON schema, so stale structured responses are never replayed.
+    digest = hashlib.sha256(json.dumps(schema.model_json_schema(), sort_keys=True).encode("utf-8")).hexdigest()
+    return f"{schema.__name__}:{digest[:16]}"
+
+
+def response_cache_key(
+    model: str, prompt_version: str, messages: Sequence[BaseMessage], schema: type[BaseModel] | None = None
+) -> str:
+    """sha256 over (model, prompt_version, schema, role+content of every message)."""
+    payload = json.dumps(
+        {
+            "model": model,
+            "prompt_version": prompt_version,
+            "schema": _schema_fingerprint(schema),
+            "messages": [[m.type, m.content] for m in messages],
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Persistent store of deterministic (temperature=0) LLM responses.
+
+    Entries older than ``ttl_seconds`` (0 disables expiry) are treated as misses and
+    dropped; the table is trimmed back to ``max_entries`` by least-recent use. Writes
+    go straight to disk: a response costs seconds to produce, a row insert does not.
+    """
+
+    def __init__(self, path: str, *, ttl_seconds: float, max_entries: int, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.ttl_seconds = max(0.0, ttl_seconds)
+        self.max_entries = max(1, max_entries)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._writes = 0
+        self._expired = 0
+        self._evictions = 0
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def get(self, key: str) -> str | None:
+        now = self._clock()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_response_cache WHERE cache_key=?", (key,)
+            ).fetchone()
+            if row is None:
+                self._misses += 1
+                return None
+            response, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_response_cache WHERE cache_key=?", (key,))
+                self._expired += 1
+                self._misses += 1
+                return None
+            self._conn.execute("UPDATE llm_response_cache SET last_used_at=? WHERE cache_key=?", (now, key))
+            self._hits += 1
+            return str(response)
+
+    def put(self, key: str, response: str, *, model: str, prompt_version: str, schema_name: str) -> None:
+        now = self._clock()
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_response_cache "
+                    "(cache_key, model, prompt_version, schema_name, response, created_at, last_used_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, model, prompt_version, schema_name, response, now, now),
+                )
+            except sqlite3.Error:
+                logger.warning("LLM response cache write failed", exc_info=True)
+                return
+            self._writes += 1
+            self._evict()
+
+    def _evict(self) -> None:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_response_cache").fetchone()
+        overflow = count - self.max_entries
+        if overflow <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM llm_response_cache WHERE rowid IN "
+            "(SELECT rowid FROM llm_response_cache ORDER BY last_used_at ASC LIMIT ?)",
+            (overflow,),
+        )
+        self._evictions += overflow
+
+    def stats(self) -> LLMCacheStats:
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM llm_response_cache").fetchone()
+            return LLMCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                writes=self._writes,
+                expired=self._expired,
+                evictions=self._evictions,
+                entries=int(entries),
+                path=self.path,
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachedLLM:
+    """``invoke(messages)`` wrapper that replays cached responses for identical requests.
+
+    With ``schema`` set the wrapped runnable is a structured-output model and responses
+    round-trip as the schema's JSON; otherwise it is a chat model and the message text
+    is stored. Failures and non-text responses are never cached.
+    """
+
+    def __init__(
+        self,
+        llm: Any,
+        cache: LLMResponseCache,
+        *,
+        model: str,
+        prompt_version: str,
+        schema: type[BaseModel] | None = None,
+    ):
+        self.llm = llm
+        self.cache = cache
+        self.model = model
+        self.prompt_version = prompt_version
+        self.schema = schema
+        self.schema_name = schema.__name__ if schema is not None else "text"
+
+    def invoke(self, messages: Sequence[BaseMessage], config: Any = None) -> Any:
+        key = response_cache_key(self.model, self.prompt_version, messages, self.schema)
+        cached = self.cache.get(key)
+        if cached is not None:
+            try:
+                return self._decode(cached)
+            except Exception:
+                logger.debug("LLM cache entry for %s is unreadable; calling the model", self.prompt_version)
+
+        response = self.llm.invoke(messages) if config is None else self.llm.invoke(messages, config)
+        encoded = self._encode(response)
+        if encoded is not None:
+            self.cache.put(
+                key, encoded, model=self.model, prompt_version=self.prompt_version, schema_name=self.schema_name
+            )
+        return response
+
+    def _encode(self, response: Any) -> str | None:
+        if self.schema is not None:
+            return response.model_dump_json() if isinstance(response, BaseModel) else None
+        content = getattr(response, "content", None)
+        return content if isinstance(content, str) else None
+
+    def _decode(self, cached: str) -> Any:
+        if self.schema is not None:
+            return self.schema.model_validate_json(cached)
+        return AIMessage(content=cached)
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
 import logging
+from functools import lru_cache
+from typing import Any
 
+from langchain_core.runnables import Runnable
 from langchain_openai import ChatOpenAI
+from pydantic import BaseModel
 
 from assistant.config.settings import Settings
+from assistant.llm.cache import CachedLLM, LLMCacheStats, LLMResponseCache
 from assistant.llm.types import LLMConfig
 
 logger = logging.getLogger(__name__)
@@ -35,8 +40,8 @@ def build_llm_config(settings: Settings) -> LLMConfig:
     return LLMConfig(provider=provider, model=model, api_key=api_key, base_url=base_url)
 
 
-def build_chat_model(settings: Settings) -> ChatOpenAI:
-    cfg = build_llm_config(settings)
+@lru_cache(maxsize=16)
+def _chat_model_for(cfg: LLMConfig) -> ChatOpenAI:
     logger.debug("Building chat model provider=%s model=%s base_url=%s", cfg.provider, cfg.model, cfg.base_url)
     return ChatOpenAI(
         model=cfg.model,
@@ -45,3 +50,62 @@ def build_chat_model(settings: Settings) -> ChatOpenAI:
         temperature=0,
         max_retries=1,
     )
+
+
+@lru_cache(maxsize=64)
+def _structured_model_for(cfg: LLMConfig, schema: type[BaseModel]) -> Runnable:
+    return _chat_model_for(cfg).with_structured_output(schema)
+
+
+def build_chat_model(settings: Settings) -> ChatOpenAI:
+    """Process-wide chat model for the settings' ``LLMConfig``.
+
+    Instances are shared (and thread-safe to invoke), so the underlying HTTP
+    connection pool stays warm across calls instead of being rebuilt per request.
+    """
+    return _chat_model_for(build_llm_config(settings))
+
+
+def build_structured_model(settings: Settings, schema: type[BaseModel]) -> Runnable:
+    """Shared ``with_structured_output(schema)`` runnable over ``build_chat_model``."""
+    return _structured_model_for(build_llm_config(settings), schema)
+
+
+@lru_cache(maxsize=4)
+def _get_llm_cache(path: str, ttl_seconds: float, max_entries: int) -> LLMResponseCache:
+    return LLMResponseCache(path, ttl_seconds=ttl_seconds, max_entries=max_entries)
+
+
+def get_llm_cache(settings: Settings) -> LLMResponseCache | None:
+    """Process-wide response cache, or None unless LLM_CACHE_ENABLED and LLM_CACHE_PATH are set."""
+    if not settings.llm_cache_enabled or not settings.llm_cache_path:
+        return None
+    return _get_llm_cache(settings.llm_cache_path, settings.llm_cache_ttl_seconds, settings.llm_cache_max_entries)
+
+
+def llm_cache_stats(settings: Settings) -> LLMCacheStats | None:
+    cache = get_llm_cache(settings)
+    return cache.stats() if cache is not None else None
+
+
+def with_response_cache(
+    llm: Any, settings: Settings, *, prompt_version: str, schema: type[BaseModel] | None = None
+) -> Any:
+    """Wrap a chat/structured model so identical requests are served from the response cache.
+
+    Returns ``llm`` unchanged when the cache is disabled. Pass ``schema`` for runnables
+    built by ``build_structured_model``.
+    """
+    cache = get_llm_cache(settings)
+    if cache is None:
+        return llm
+    cfg = build_llm_config(settings)
+    # Different servers may serve the same model name; never replay one server's answers for another.
+    endpoint = (cfg.base_url or "default").rstrip("/")
+    model = f"{cfg.provider}:{cfg.model}@{endpoint}"
+    return CachedLLM(llm, cache, model=model, prompt_version=prompt_version, schema=schema)
+
+
+def clear_llm_registry() -> None:
+    _structured_model_for.cache_clear()
+    _chat_model_for.cache_clear()
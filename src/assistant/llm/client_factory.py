@@ -1,3 +1,3 @@
-from assistant.llm.client import build_chat_model, build_llm_config
+from assistant.llm.client import build_chat_model, build_llm_config, build_structured_model
 
-__all__ = ["build_llm_config", "build_chat_model"]
+__all__ = ["build_llm_config", "build_chat_model", "build_structured_model"]
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import math
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Sequence
+
+from assistant.observability.tracing import span
+
+# Ingest stages in pipeline order; `stats` reports them in this order, unknown stages last.
+INGEST_STAGES = ("extract", "embed", "route", "store", "profile", "refine", "context", "enqueue", "commit", "total")
+
+
+class StageTimer:
+    """Accumulates wall-clock milliseconds per named stage.
+
+    Re-entering a stage adds to its total, so a loop over envelopes reports one
+    ``refine`` figure. Each stage is also a ``stage.<name>`` tracing span. Not
+    thread-safe: use one timer per request.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self._clock = clock
+        self._started = clock()
+        self.stages: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = self._clock()
+        try:
+            with span(f"stage.{name}"):
+                yield
+        finally:
+            self.add(name, (self._clock() - start) * 1000.0)
+
+    def add(self, name: str, duration_ms: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + max(0.0, float(duration_ms))
+
+    def elapsed_ms(self) -> float:
+        return (self._clock() - self._started) * 1000.0
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile (``q`` in 0..100) of an ascending sequence."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100.0 * len(sorted_values)))
+    return float(sorted_values[min(rank, len(sorted_values)) - 1])
@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+import contextvars
+import functools
+import json
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Any, Callable, Iterator, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from assistant.config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar("assistant_current_span", default=None)
+_exporter: JsonlSpanExporter | None = None
+_trace_db_queries = False
+_sqlalchemy_hooks_installed = False
+_config_lock = threading.Lock()
+
+
+def _new_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start_time: float
+    attributes: dict[str, Any] = field(default_factory=dict)
+    duration_ms: float = 0.0
+    status: str = "ok"
+    error: str | None = None
+    thread: str = field(default_factory=lambda: threading.current_thread().name)
+    _start_perf: float = field(default_factory=time.perf_counter, repr=False)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_record(self) -> dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start_time, 6),
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "error": self.error,
+            "thread": self.thread,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Stand-in yielded while tracing is off, so call sites never branch."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        return None
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class JsonlSpanExporter:
+    """Appends finished spans as JSON lines, rotating at ``max_bytes`` (``backup_count`` old files kept)."""
+
+    def __init__(self, path: str, *, max_bytes: int, backup_count: int):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._handler = RotatingFileHandler(
+            path, maxBytes=max(0, max_bytes), backupCount=max(0, backup_count), encoding="utf-8", delay=True
+        )
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+        # A private logger: span lines must not reach the root handlers, and the handler's lock serializes threads.
+        self._logger = logging.Logger("assistant.traces", level=logging.INFO)
+        self._logger.propagate = False
+        self._logger.addHandler(self._handler)
+
+    def export(self, span: Span) -> None:
+        self._logger.info(json.dumps(span.to_record(), ensure_ascii=False, default=str))
+
+    def close(self) -> None:
+        self._logger.removeHandler(self._handler)
+        self._handler.close()
+
+
+def set_exporter(exporter: JsonlSpanExporter | None, *, trace_db_queries: bool = False) -> None:
+    """Install (or with ``None`` remove) the process-wide span exporter."""
+    global _exporter, _trace_db_queries
+    with _config_lock:
+        previous, _exporter = _exporter, exporter
+        _trace_db_queries = trace_db_queries and exporter is not None
+    if previous is not None and previous is not exporter:
+        previous.close()
+    if _trace_db_queries:
+        install_sqlalchemy_tracing()
+
+
+def configure_tracing(settings: Settings) -> JsonlSpanExporter | None:
+    if not settings.tracing_enabled:
+        set_exporter(None)
+        return None
+    exporter = JsonlSpanExporter(
+        settings.trace_path, max_bytes=settings.trace_max_bytes, backup_count=settings.trace_backup_count
+    )
+    set_exporter(exporter, trace_db_queries=settings.trace_db_queries)
+    logger.debug("tracing enabled: path=%s db_queries=%s", settings.trace_path, settings.trace_db_queries)
+    return exporter
+
+
+def tracing_enabled() -> bool:
+    return _exporter is not None
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | _NoopSpan]:
+    """Time the enclosed block as a child of the current span (or as a new trace root)."""
+    exporter = _exporter
+    if exporter is None:
+        yield NOOP_SPAN
+        return
+    parent = _current_span.get()
+    current = Span(
+        name=name,
+        trace_id=parent.trace_id if parent else _new_id(),
+        span_id=_new_id(),
+        parent_id=parent.span_id if parent else None,
+        start_time=time.time(),
+        attributes=attributes,
+    )
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as exc:
+        current.status = "error"
+        current.error = f"{type(exc).__name__}: {exc}"[:500]
+        raise
+    finally:
+        _current_span.reset(token)
+        current.duration_ms = (time.perf_counter() - current._start_perf) * 1000.0
+        exporter.export(current)
+
+
+def traced(name: str | None = None) -> Callable[[F], F]:
+    """Decorator form of :func:`span`; the span is named after the function by default."""
+
+    def decorate(fn: F) -> F:
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _exporter is None:
+                return fn(*args, **kwargs)
+            with span(span_name):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def propagate(fn: F) -> F:
+    """Bind ``fn`` to the caller's span so work submitted to a thread pool nests under it."""
+    context = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        # Each call gets its own copy: one Context cannot be entered by two threads at once.
+        return context.copy().run(fn, *args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
+
+
+def _record_finished(name: str, start_perf: float, attributes: dict[str, Any]) -> None:
+    exporter = _exporter
+    parent = _current_span.get()
+    if exporter is None or parent is None:
+        return
+    duration_ms = (time.perf_counter() - start_perf) * 1000.0
+    exporter.export(
+        Span(
+            name=name,
+            trace_id=parent.trace_id,
+            span_id=_new_id(),
+            parent_id=parent.span_id,
+            start_time=time.time() - duration_ms / 1000.0,
+            attributes=attributes,
+            duration_ms=duration_ms,
+        )
+    )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    # Queries are only traced inside an existing span; stray queries never start traces of their own.
+    if not _trace_db_queries or _current_span.get() is None:
+        return
+    conn.info.setdefault("trace_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    starts = conn.info.get("trace_query_start")
+    if not starts:
+        return
+    start = starts.pop()
+    sql = " ".join(statement.split())
+    _record_finished(
+        "db.query",
+        start,
+        {"sql": sql[:200], "rows": getattr(cursor, "rowcount", -1), "executemany": bool(executemany)},
+    )
+
+
+def _handle_error(exception_context) -> None:
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("trace_query_start"):
+        conn.info["trace_query_start"].pop()
+
+
+def install_sqlalchemy_tracing() -> None:
+    """Attach query timing hooks to every SQLAlchemy engine (idempotent)."""
+    global _sqlalchemy_hooks_installed
+    with _config_lock:
+        if _sqlalchemy_hooks_installed:
+            return
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+        _sqlalchemy_hooks_installed = True
+
+
+@dataclass
+class TraceSummary:
+    trace_id: str
+    root: dict[str, Any]
+    spans: list[dict[str, Any]]
+
+    @property
+    def name(self) -> str:
+        return str(self.root.get("name"))
+
+    @property
+    def duration_ms(self) -> float:
+        return float(self.root.get("duration_ms") or 0.0)
+
+
+def read_spans(path: str) -> list[dict[str, Any]]:
+    """Span records from ``path`` and its rotated backups (``path.1`` ...), oldest first."""
+    base = Path(path)
+    rotated = sorted(
+        (p for p in base.parent.glob(f"{base.name}.*") if p.suffix.lstrip(".").isdigit()),
+        key=lambda p: int(p.suffix.lstrip(".")),
+        reverse=True,
+    )
+    records: list[dict[str, Any]] = []
+    for file in [*rotated, base]:
+        if not file.exists():
+            continue
+        with file.open(encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # a line cut short by rotation or a crash
+    return records
+
+
+def slowest_traces(spans: list[dict[str, Any]], *, limit: int = 5, name: str | None = None) -> list[TraceSummary]:
+    by_trace: dict[str, list[dict[str, Any]]] = {}
+    for record in spans:
+        by_trace.setdefault(str(record.get("trace_id")), []).append(record)
+    traces = []
+    for trace_id, members in by_trace.items():
+        root = next((r for r in members if r.get("parent_id") is None), None)
+        # Rotation can drop a trace's root; only complete traces are summarized.
+        if root is None or (name and root.get("name") != name):
+            continue
+        traces.append(TraceSummary(trace_id=trace_id, root=root, spans=members))
+    traces.sort(key=lambda t: t.duration_ms, reverse=True)
+    return traces[: max(0, limit)]
+
+
+def render_trace(trace: TraceSummary, *, min_ms: float = 0.0) -> list[str]:
+    """Flame-style tree: same-named siblings are merged (``xN``) with their children aggregated."""
+    children: dict[str | None, list[dict[str, Any]]] = {}
+    for record in trace.spans:
+        children.setdefault(record.get("parent_id"), []).append(record)
+    total = trace.duration_ms or 1.0
+    lines: list[str] = []
+
+    def walk(group: list[dict[str, Any]], depth: int) -> None:
+        merged: dict[str, list[dict[str, Any]]] = {}
+        for record in sorted(group, key=lambda r: r.get("start") or 0.0):
+            merged.setdefault(str(record.get("name")), []).append(record)
+        for span_name, records in sorted(
+            merged.items(), key=lambda item: -sum(r.get("duration_ms") or 0.0 for r in item[1])
+        ):
+            duration = sum(float(r.get("duration_ms") or 0.0) for r in records)
+            if depth and duration < min_ms:
+                continue
+            count = f" x{len(records)}" if len(records) > 1 else ""
+            errors = sum(1 for r in records if r.get("status") == "error")
+            flag = f" [{errors} error]" if errors else ""
+            lines.append(f"{'  ' * depth}{duration:10.1f}ms {duration / total:6.1%}  {span_name}{count}{flag}")
+            walk([child for r in records for child in children.get(r.get("span_id"), [])], depth + 1)
+
+    walk([trace.root], 0)
+    return lines
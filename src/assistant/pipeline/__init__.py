@@ -1,3 +1,4 @@
 from assistant.pipeline.orchestrator import AssistantOrchestrator
+from assistant.pipeline.worker import BackgroundWorker, DrainResult, JobOutcome, WorkerPool
 
-__all__ = ["AssistantOrchestrator"]
+__all__ = ["AssistantOrchestrator", "BackgroundWorker", "DrainResult", "JobOutcome", "WorkerPool"]
@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable
+
+from sqlalchemy.orm import Session
+
+from assistant.agents.context.agent import ContextAgent
+from assistant.agents.organization.agent import OrganizationAgent
+from assistant.agents.thinking.agent import ThinkingAgent
+from assistant.agents.thinking.artifacts import write_run
+from assistant.config.settings import Settings
+from assistant.db.models import BackgroundJobORM
+from assistant.db.repo_jobs import (
+    JOB_BACKFILL_EMBEDDINGS,
+    JOB_REFINE_ENVELOPE,
+    JOB_REINDEX_ENVELOPES,
+    JOB_THINKING_RUN,
+    JOB_UPDATE_CONTEXT,
+    STATUS_DONE,
+    JobsRepository,
+)
+from assistant.observability.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Handlers run inside the worker's session; their writes commit together with the job's completion.
+JobHandler = Callable[[Session, Settings, BackgroundJobORM], "dict[str, Any] | None"]
+
+
+def _refine_envelope(session: Session, settings: Settings, job: BackgroundJobORM) -> dict[str, Any]:
+    OrganizationAgent(session, settings).refine_envelope(int(job.subject_id or 0))
+    return {"envelope_id": job.subject_id}
+
+
+def _update_context(session: Session, settings: Settings, job: BackgroundJobORM) -> dict[str, Any]:
+    result = ContextAgent(session, settings).update_context(int(job.subject_id or 0))
+    if result.retry_after is not None:
+        # Debounced: queue the trailing update for when the window closes.
+        JobsRepository(session).enqueue_context_update(
+            job.subject_id, run_after=result.retry_after, max_attempts=settings.job_max_attempts
+        )
+    return {"updated": result.updated, "evidence_count": result.evidence_count, "messages": result.messages}
+
+
+def _thinking_run(session: Session, settings: Settings, job: BackgroundJobORM) -> dict[str, Any]:
+    output = ThinkingAgent(session, settings).run_cycle()
+    if output is None:
+        return {"skipped": True, "suggestions": 0, "artifact_path": None, "top": None}
+    artifact_path = write_run(output, settings.thinking_output_dir)
+    top = output.suggestions[0] if output.suggestions else None
+    return {
+        "run_id": output.run_id,
+        "artifact_path": str(artifact_path),
+        "suggestions": len(output.suggestions),
+        "top": {"suggestion_type": top.suggestion_type.value, "title": top.title} if top else None,
+    }
+
+
+def _backfill_embeddings(session: Session, settings: Settings, job: BackgroundJobORM) -> dict[str, Any]:
+    filled = OrganizationAgent(session, settings).backfill_card_embeddings(job.payload_json.get("batch_size"))
+    return {"filled": filled}
+
+
+def _reindex_envelopes(session: Session, settings: Settings, job: BackgroundJobORM) -> dict[str, Any]:
+    return {"indexed": OrganizationAgent(session, settings).reindex_envelopes()}
+
+
+JOB_HANDLERS: dict[str, JobHandler] = {
+    JOB_REFINE_ENVELOPE: _refine_envelope,
+    JOB_UPDATE_CONTEXT: _update_context,
+    JOB_THINKING_RUN: _thinking_run,
+    JOB_BACKFILL_EMBEDDINGS: _backfill_embeddings,
+    JOB_REINDEX_ENVELOPES: _reindex_envelopes,
+}
+
+
+def default_worker_id(suffix: str = "") -> str:
+    base = f"{socket.gethostname()}:{os.getpid()}"
+    return f"{base}:{suffix}" if suffix else base
+
+
+@dataclass
+class JobOutcome:
+    job_id: int
+    kind: str
+    subject_id: int | None
+    # done | pending (retry scheduled) | failed | superseded | lost (lease taken over)
+    status: str
+    result: dict[str, Any] | None = None
+    error: str | None = None
+
+    def id_label(self) -> str:
+        return f"{self.job_id} ({self.kind})"
+
+
+@dataclass
+class DrainResult:
+    jobs: int = 0
+    failed: int = 0
+    refined_envelopes: list[int] = field(default_factory=list)
+    context_messages: list[str] = field(default_factory=list)
+    outcomes: list[JobOutcome] = field(default_factory=list)
+
+    def add(self, outcome: JobOutcome) -> None:
+        self.outcomes.append(outcome)
+        if outcome.status != STATUS_DONE:
+            self.failed += 1
+            return
+        self.jobs += 1
+        if outcome.kind == JOB_REFINE_ENVELOPE and outcome.subject_id is not None:
+            self.refined_envelopes.append(outcome.subject_id)
+        elif outcome.kind == JOB_UPDATE_CONTEXT and outcome.result:
+            self.context_messages = list(outcome.result.get("messages") or [])
+
+
+class BackgroundWorker:
+    """Claims jobs from the ``background_jobs`` queue and runs them in this session.
+
+    Duplicate work is collapsed when it is queued (dedup keys), so a drain runs one
+    refine per dirty envelope and one context update per burst of cards. A handler's
+    writes commit together with its job's completion; if the lease was lost meanwhile
+    they are rolled back and the other worker's run wins.
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        settings: Settings,
+        *,
+        worker_id: str | None = None,
+        handlers: dict[str, JobHandler] | None = None,
+    ):
+        self.session = session
+        self.settings = settings
+        self.worker_id = worker_id or default_worker_id()
+        self.handlers = handlers or JOB_HANDLERS
+        self.jobs = JobsRepository(session)
+
+    def claim(self, limit: int = 1, kinds: Iterable[str] | None = None) -> list[BackgroundJobORM]:
+        claimed = self.jobs.claim(
+            self.worker_id,
+            lease_seconds=self.settings.job_lease_seconds,
+            limit=limit,
+            kinds=kinds,
+            kind_limits=self.settings.job_kind_limit_map,
+        )
+        # Make the lease visible to other workers before running anything.
+        self.session.commit()
+        return claimed
+
+    def run(self, job: BackgroundJobORM) -> JobOutcome:
+        job_id, kind, subject_id = job.id, job.kind, job.subject_id
+        handler = self.handlers.get(kind)
+        try:
+            if handler is None:
+                raise LookupError(f"no handler for job kind '{kind}'")
+            with span(f"job.{kind}", job_id=job_id, subject_id=subject_id, attempt=job.attempts):
+                result = handler(self.session, self.settings, job)
+            if not self.jobs.complete(job, self.worker_id, result):
+                self.session.rollback()
+                logger.warning("Job %s (%s) lost its lease; discarding this run", job_id, kind)
+                return JobOutcome(job_id, kind, subject_id, "lost")
+            self.session.commit()
+            return JobOutcome(job_id, kind, subject_id, STATUS_DONE, result=result)
+        except Exception as exc:  # noqa: BLE001
+            self.session.rollback()
+            error = str(exc) or type(exc).__name__
+            logger.warning("Job %s (%s) failed: %s", job_id, kind, error, exc_info=True)
+            status = self.jobs.fail(
+                job,
+                self.worker_id,
+                error,
+                retry_base_seconds=self.settings.job_retry_base_seconds,
+                retry_max_seconds=self.settings.job_retry_max_seconds,
+            )
+            self.session.commit()
+            return JobOutcome(job_id, kind, subject_id, status or "lost", error=error)
+
+    def drain(self, limit: int | None = None, kinds: Iterable[str] | None = None) -> DrainResult:
+        """Run up to ``limit`` due jobs (default ``BACKGROUND_BATCH_SIZE``), one lease at a time."""
+        result = DrainResult()
+        kinds = list(kinds) if kinds is not None else None
+        for _ in range(limit or self.settings.background_batch_size):
+            claimed = self.claim(kinds=kinds)
+            if not claimed:
+                break
+            result.add(self.run(claimed[0]))
+        if result.outcomes:
+            logger.info(
+                "background drain: jobs=%s failed=%s envelopes=%s",
+                result.jobs,
+                result.failed,
+                len(result.refined_envelopes),
+            )
+        return result
+
+    def drain_all(self, kinds: Iterable[str] | None = None) -> DrainResult:
+        """Drain until no job is due; retries scheduled for later are left queued."""
+        total = DrainResult()
+        while True:
+            batch = self.drain(kinds=kinds)
+            if not batch.outcomes:
+                return total
+            for outcome in batch.outcomes:
+                total.add(outcome)
+
+
+class WorkerPool:
+    """Worker threads polling the queue, plus a heartbeat that renews in-flight leases.
+
+    Several pools (threads here, other processes elsewhere) can share one database: the
+    queue's leases and per-kind limits keep them from running the same job twice.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        settings: Settings,
+        *,
+        threads: int | None = None,
+        kinds: Iterable[str] | None = None,
+        on_job: Callable[[JobOutcome], None] | None = None,
+        handlers: dict[str, JobHandler] | None = None,
+        name: str = "worker",
+    ):
+        self.session_factory = session_factory
+        self.settings = settings
+        self.threads = max(1, threads or settings.worker_threads)
+        self.kinds = list(kinds) if kinds is not None else None
+        self.on_job = on_job
+        self.handlers = handlers
+        self.name = name
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._inflight: dict[int, str] = {}
+        self._inflight_lock = threading.Lock()
+
+    def start(self) -> WorkerPool:
+        self._stop.clear()
+        for idx in range(self.threads):
+            worker_id = default_worker_id(f"{self.name}-{idx}")
+            thread = threading.Thread(target=self._loop, args=(worker_id,), daemon=True, name=f"{self.name}-{idx}")
+            thread.start()
+            self._threads.append(thread)
+        heartbeat = threading.Thread(target=self._heartbeat, daemon=True, name=f"{self.name}-heartbeat")
+        heartbeat.start()
+        self._threads.append(heartbeat)
+        return self
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+
+    @property
+    def running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def _loop(self, worker_id: str) -> None:
+        while not self._stop.is_set():
+            outcome: JobOutcome | None = None
+            try:
+                with self.session_factory() as session:
+                    worker = BackgroundWorker(session, self.settings, worker_id=worker_id, handlers=self.handlers)
+                    claimed = worker.claim(kinds=self.kinds)
+                    if claimed:
+                        job = claimed[0]
+                        with self._inflight_lock:
+                            self._inflight[job.id] = worker_id
+                        try:
+                            outcome = worker.run(job)
+                        finally:
+                            with self._inflight_lock:
+                                self._inflight.pop(job.id, None)
+            except Exception:  # noqa: BLE001
+                logger.exception("%s iteration failed", worker_id)
+            if outcome is None:
+                self._stop.wait(self.settings.background_poll_seconds)
+            elif self.on_job is not None:
+                try:
+                    self.on_job(outcome)
+                except Exception:  # noqa: BLE001
+                    logger.exception("on_job callback failed")
+
+    def _heartbeat(self) -> None:
+        interval = max(1.0, self.settings.job_lease_seconds / 3)
+        while not self._stop.wait(interval):
+            with self._inflight_lock:
+                inflight = dict(self._inflight)
+            if not inflight:
+                continue
+            try:
+                with self.session_factory() as session:
+                    repo = JobsRepository(session)
+                    for worker_id in set(inflight.values()):
+                        ids = [job_id for job_id, owner in inflight.items() if owner == worker_id]
+                        repo.extend_leases(worker_id, ids, lease_seconds=self.settings.job_lease_seconds)
+                    session.commit()
+            except Exception:  # noqa: BLE001
+                logger.exception("lease heartbeat failed")
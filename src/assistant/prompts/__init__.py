@@ -1,3 +1,21 @@
-from assistant.prompts.loader import file_sha256, load_prompt, load_prompt_versioned, load_registry, resolve_prompt_version
+from assistant.prompts.loader import (
+    CompiledTemplate,
+    clear_prompt_cache,
+    compile_prompt,
+    file_sha256,
+    load_prompt,
+    load_prompt_versioned,
+    load_registry,
+    resolve_prompt_version,
+)
 
-__all__ = ["load_prompt", "load_prompt_versioned", "load_registry", "resolve_prompt_version", "file_sha256"]
+__all__ = [
+    "load_prompt",
+    "load_prompt_versioned",
+    "load_registry",
+    "resolve_prompt_version",
+    "file_sha256",
+    "compile_prompt",
+    "clear_prompt_cache",
+    "CompiledTemplate",
+]
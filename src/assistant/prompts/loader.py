@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import copy
 import hashlib
 import re
+import threading
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Generic, TypeVar
 
 import yaml
 
@@ -11,27 +14,96 @@ PROMPTS_DIR = Path(__file__).resolve().parent
 REGISTRY_PATH = PROMPTS_DIR / "registry.yaml"
 
 
-def load_prompt(template_name: str, **kwargs: object) -> str:
+_VAR_RE = re.compile(r"\{\{\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*\}\}")
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """Template pre-split into literal text and ``{{ var }}`` slots (``literals`` has one more item)."""
+
+    name: str
+    literals: tuple[str, ...]
+    variables: tuple[str, ...]
+
+    @classmethod
+    def compile(cls, name: str, text: str) -> CompiledTemplate:
+        parts = _VAR_RE.split(text)
+        return cls(name=name, literals=tuple(parts[0::2]), variables=tuple(parts[1::2]))
+
+    def render(self, **kwargs: object) -> str:
+        if not self.variables:
+            return self.literals[0]
+        out = [self.literals[0]]
+        for key, literal in zip(self.variables, self.literals[1:]):
+            if key not in kwargs:
+                raise ValueError(f"Missing template variable '{key}' for {self.name}")
+            value = kwargs[key]
+            out.append("" if value is None else str(value))
+            out.append(literal)
+        return "".join(out)
+
+
+@dataclass
+class _CachedFile(Generic[T]):
+    mtime_ns: int
+    size: int
+    sha256: str
+    value: T
+
+
+_FILE_CACHE: dict[tuple[Path, str], _CachedFile[Any]] = {}
+_FILE_CACHE_LOCK = threading.Lock()
+
+
+def _cached_file(path: Path, kind: str, build: Callable[[str], T]) -> T:
+    """Return ``build(text)`` for ``path``, recompiling only when its mtime/size and sha256 change."""
+    stat = path.stat()
+    key = (path, kind)
+    with _FILE_CACHE_LOCK:
+        cached = _FILE_CACHE.get(key)
+    if cached is not None and cached.mtime_ns == stat.st_mtime_ns and cached.size == stat.st_size:
+        return cached.value
+    raw = path.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    if cached is not None and cached.sha256 == digest:
+        # Touched but unchanged (e.g. checkout or copy): keep the compiled value.
+        value = cached.value
+    else:
+        value = build(raw.decode("utf-8"))
+    with _FILE_CACHE_LOCK:
+        _FILE_CACHE[key] = _CachedFile(mtime_ns=stat.st_mtime_ns, size=stat.st_size, sha256=digest, value=value)
+    return value
+
+
+def clear_prompt_cache() -> None:
+    with _FILE_CACHE_LOCK:
+        _FILE_CACHE.clear()
+
+
+def compile_prompt(template_name: str) -> CompiledTemplate:
     path = PROMPTS_DIR / template_name
-    if not path.exists():
-        raise FileNotFoundError(f"Prompt template not found: {template_name}")
+    try:
+        return _cached_file(path, "template", lambda text: CompiledTemplate.compile(template_name, text))
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Prompt template not found: {template_name}") from None
 
-    text = path.read_text(encoding="utf-8")
 
-    def replace_var(match: re.Match[str]) -> str:
-        key = match.group(1).strip()
-        if key not in kwargs:
-            raise ValueError(f"Missing template variable '{key}' for {template_name}")
-        value = kwargs[key]
-        return "" if value is None else str(value)
+def load_prompt(template_name: str, **kwargs: object) -> str:
+    return compile_prompt(template_name).render(**kwargs)
+
 
-    return re.sub(r"\{\{\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*\}\}", replace_var, text)
+def _registry_data() -> dict[str, Any]:
+    try:
+        return _cached_file(REGISTRY_PATH, "registry", lambda text: yaml.safe_load(text) or {})
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Prompt registry not found: {REGISTRY_PATH}") from None
 
 
 def load_registry(prompt_id: str = "ingestion") -> dict[str, Any]:
-    if not REGISTRY_PATH.exists():
-        raise FileNotFoundError(f"Prompt registry not found: {REGISTRY_PATH}")
-    data = yaml.safe_load(REGISTRY_PATH.read_text(encoding="utf-8")) or {}
+    # Callers get their own copy; the parsed YAML stays shared in the cache.
+    data = copy.deepcopy(_registry_data())
     # Backward-compatible read: old single-prompt registry shape.
     if "prompts" not in data:
         if data.get("prompt_id") != prompt_id:
@@ -49,7 +121,7 @@ def load_registry(prompt_id: str = "ingestion") -> dict[str, Any]:
     return normalized
 
 
-def resolve_prompt_version(prompt_id: str, requested_version: str | None = None) -> str:
+def _resolve_version_entry(prompt_id: str, requested_version: str | None) -> tuple[str, str]:
     registry = load_registry(prompt_id=prompt_id)
     versions = registry.get("versions")
     if not isinstance(versions, list):
@@ -79,20 +151,16 @@ def resolve_prompt_version(prompt_id: str, requested_version: str | None = None)
         raise FileNotFoundError(
             f"Prompt template file '{template_name}' not found for version '{requested_version}' (prompt_id '{prompt_id}')"
         )
-    return str(requested_version)
+    return str(requested_version), template_name
+
+
+def resolve_prompt_version(prompt_id: str, requested_version: str | None = None) -> str:
+    return _resolve_version_entry(prompt_id, requested_version)[0]
 
 
 def load_prompt_versioned(prompt_id: str, version: str | None = None, **kwargs: object) -> str:
-    registry = load_registry(prompt_id=prompt_id)
-    versions = registry.get("versions", [])
-    resolved_version = resolve_prompt_version(prompt_id=prompt_id, requested_version=version)
-    match = next((entry for entry in versions if entry.get("version") == resolved_version), None)
-    if not match:
-        raise ValueError(f"Version '{resolved_version}' not found for prompt_id '{prompt_id}'")
-    template_name = match.get("template_file")
-    if not template_name:
-        raise ValueError(f"Version '{resolved_version}' missing template_file")
-    return load_prompt(str(template_name), **kwargs)
+    _, template_name = _resolve_version_entry(prompt_id, version)
+    return load_prompt(template_name, **kwargs)
 
 
 def file_sha256(path: Path) -> str:
@@ -38,6 +38,8 @@ class ThinkingSuggestionItem(BaseModel):
 class ThinkingInputStats(BaseModel):
     cards_scanned: int = 0
     envelopes_scanned: int = 0
+    # True when only records changed since the previous run were sent.
+    incremental: bool = False
 
 
 class ThinkingRunOutput(BaseModel):
@@ -47,6 +49,8 @@ class ThinkingRunOutput(BaseModel):
     prompt_version: str
     input_stats: ThinkingInputStats
     suggestions: list[ThinkingSuggestionItem] = Field(default_factory=list)
+    # How many of ``suggestions`` were carried over unchanged from earlier runs (incremental runs only).
+    carried_forward: int = 0
 
 
 class ThinkingSuggestionBatch(BaseModel):
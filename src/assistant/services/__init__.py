@@ -1,5 +1,12 @@
 from assistant.services.datetime import parse_due_at
-from assistant.services.embeddings import embed, model_embed, semantic_similarity, similarity
+from assistant.services.embeddings import (
+    embed,
+    hashed_embed,
+    model_embed,
+    model_embed_many,
+    semantic_similarity,
+    similarity,
+)
 from assistant.services.keywords import extract_keywords
 from assistant.services.scoring import EnvelopeScorer
 
@@ -7,7 +14,9 @@ __all__ = [
     "parse_due_at",
     "extract_keywords",
     "embed",
+    "hashed_embed",
     "model_embed",
+    "model_embed_many",
     "similarity",
     "semantic_similarity",
     "EnvelopeScorer",
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+@dataclass
+class CircuitBreakerStats:
+    name: str
+    state: str
+    consecutive_failures: int
+    successes: int
+    failures: int
+    rejected: int
+    times_opened: int
+    cooldown_seconds: float
+    retry_in_seconds: float
+    last_error: str | None
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker with exponential cool-down.
+
+    ``failure_threshold`` consecutive failures open the circuit for ``base_cooldown``
+    seconds. Once the cool-down elapses a single probe call is let through (half-open);
+    success closes the circuit and resets the cool-down, failure re-opens it with the
+    cool-down doubled up to ``max_cooldown``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_threshold: int = 3,
+        base_cooldown: float = 5.0,
+        max_cooldown: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_cooldown = max(0.0, base_cooldown)
+        self.max_cooldown = max(self.base_cooldown, max_cooldown)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._cooldown = self.base_cooldown
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._consecutive_failures = 0
+        self._successes = 0
+        self._failures = 0
+        self._rejected = 0
+        self._times_opened = 0
+        self._last_error: str | None = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self._cooldown:
+            return HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        """Return True if a call may proceed; rejected calls are counted."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._state = HALF_OPEN
+                self._probe_in_flight = True
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._successes += 1
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+            self._state = CLOSED
+            self._cooldown = self.base_cooldown
+
+    def record_failure(self, error: BaseException | str | None = None) -> None:
+        with self._lock:
+            self._failures += 1
+            self._consecutive_failures += 1
+            if error is not None:
+                self._last_error = str(error) or type(error).__name__
+            if self._state == HALF_OPEN:
+                # The probe failed: back off further before the next one.
+                self._cooldown = min(self._cooldown * 2, self.max_cooldown)
+                self._open()
+            elif self._state == CLOSED and self._consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._probe_in_flight = False
+        self._times_opened += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._cooldown = self.base_cooldown
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def stats(self) -> CircuitBreakerStats:
+        with self._lock:
+            state = self._current_state()
+            retry_in = 0.0
+            if state == OPEN:
+                retry_in = max(0.0, self._cooldown - (self._clock() - self._opened_at))
+            return CircuitBreakerStats(
+                name=self.name,
+                state=state,
+                consecutive_failures=self._consecutive_failures,
+                successes=self._successes,
+                failures=self._failures,
+                rejected=self._rejected,
+                times_opened=self._times_opened,
+                cooldown_seconds=self._cooldown,
+                retry_in_seconds=retry_in,
+                last_error=self._last_error,
+            )
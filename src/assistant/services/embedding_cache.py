@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import atexit
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+_MEMORY_FRONT_MAX_ENTRIES = 2048
+_FLUSH_EVERY = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    provider TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    model TEXT NOT NULL,
+    text_sha256 TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    dim INTEGER NOT NULL,
+    last_used_at REAL NOT NULL,
+    PRIMARY KEY (provider, endpoint, model, text_sha256)
+);
+CREATE INDEX IF NOT EXISTS ix_embedding_cache_last_used ON embedding_cache (last_used_at);
+"""
+
+CacheKey = tuple[str, str, str, str]
+
+
+@dataclass
+class EmbeddingCacheStats:
+    hits: int
+    misses: int
+    writes: int
+    evictions: int
+    entries: int
+    path: str | None
+
+
+def _text_key(provider: str, endpoint: str, model: str, text: str) -> CacheKey:
+    # Same model name on two OpenAI-compatible servers can be different weights: key on the endpoint too.
+    return provider, endpoint.rstrip("/"), model, hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _pack(vec: tuple[float, ...]) -> bytes:
+    return array("f", vec).tobytes()
+
+
+def _unpack(blob: bytes) -> tuple[float, ...]:
+    values = array("f")
+    values.frombytes(blob)
+    return tuple(values)
+
+
+class EmbeddingCache:
+    """Read-through, write-behind embedding store keyed by (provider, endpoint, model, sha256(text)).
+
+    A small in-memory LRU sits in front of an optional SQLite file. New vectors and
+    recency touches are buffered and flushed in one transaction every ``flush_every``
+    writes (and at interpreter exit); the file is trimmed back to ``max_entries`` by
+    least-recent use after each flush.
+    """
+
+    def __init__(self, path: str | None, *, max_entries: int, flush_every: int = _FLUSH_EVERY):
+        self.path = path or None
+        self.max_entries = max(1, max_entries)
+        self.flush_every = max(1, flush_every)
+        self._lock = threading.RLock()
+        self._memory: OrderedDict[CacheKey, tuple[float, ...]] = OrderedDict()
+        self._pending: dict[CacheKey, tuple[float, ...]] = {}
+        self._touched: dict[CacheKey, float] = {}
+        self._hits = 0
+        self._misses = 0
+        self._writes = 0
+        self._evictions = 0
+        self._conn: sqlite3.Connection | None = None
+        if self.path:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(embedding_cache)")}
+            if columns and "endpoint" not in columns:
+                # Pre-endpoint cache file: entries cannot be attributed to an endpoint, so start over.
+                self._conn.execute("DROP TABLE embedding_cache")
+            self._conn.executescript(_SCHEMA)
+            atexit.register(self.flush)
+
+    def _remember(self, key: CacheKey, vec: tuple[float, ...]) -> None:
+        self._memory[key] = vec
+        self._memory.move_to_end(key)
+        while len(self._memory) > _MEMORY_FRONT_MAX_ENTRIES:
+            self._memory.popitem(last=False)
+
+    def get_many(
+        self, provider: str, model: str, texts: list[str], *, endpoint: str = ""
+    ) -> dict[str, tuple[float, ...]]:
+        found: dict[str, tuple[float, ...]] = {}
+        now = time.time()
+        with self._lock:
+            disk_lookup: dict[CacheKey, str] = {}
+            for text in texts:
+                key = _text_key(provider, endpoint, model, text)
+                vec = self._memory.get(key) or self._pending.get(key)
+                if vec is not None:
+                    self._remember(key, vec)
+                    if self._conn is not None:
+                        self._touched[key] = now
+                    found[text] = vec
+                else:
+                    disk_lookup[key] = text
+
+            if disk_lookup and self._conn is not None:
+                for key in disk_lookup:
+                    row = self._conn.execute(
+                        "SELECT vector FROM embedding_cache WHERE provider=? AND endpoint=? AND model=? AND text_sha256=?",
+                        key,
+                    ).fetchone()
+                    if row is None:
+                        continue
+                    vec = _unpack(row[0])
+                    self._remember(key, vec)
+                    self._touched[key] = now
+                    found[disk_lookup[key]] = vec
+
+            self._hits += len(found)
+            self._misses += len(texts) - len(found)
+        return found
+
+    def get(self, provider: str, model: str, text: str, *, endpoint: str = "") -> tuple[float, ...] | None:
+        return self.get_many(provider, model, [text], endpoint=endpoint).get(text)
+
+    def put(self, provider: str, model: str, text: str, vec: tuple[float, ...], *, endpoint: str = "") -> None:
+        if not vec:
+            return
+        key = _text_key(provider, endpoint, model, text)
+        with self._lock:
+            self._remember(key, vec)
+            if self._conn is None:
+                return
+            self._pending[key] = vec
+            if len(self._pending) >= self.flush_every:
+                self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._conn is None or (not self._pending and not self._touched):
+                return
+            now = time.time()
+            pending, self._pending = self._pending, {}
+            touched, self._touched = self._touched, {}
+            try:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embedding_cache "
+                    "(provider, endpoint, model, text_sha256, vector, dim, last_used_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(*key, _pack(vec), len(vec), now) for key, vec in pending.items()],
+                )
+                self._conn.executemany(
+                    "UPDATE embedding_cache SET last_used_at=? WHERE provider=? AND endpoint=? AND model=? AND text_sha256=?",
+                    [(ts, *key) for key, ts in touched.items() if key not in pending],
+                )
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                logger.warning("Embedding cache flush failed; dropping %s buffered vectors", len(pending), exc_info=True)
+                return
+            self._writes += len(pending)
+            self._evict()
+
+    def _evict(self) -> None:
+        assert self._conn is not None
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()
+        overflow = count - self.max_entries
+        if overflow <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM embedding_cache WHERE rowid IN "
+            "(SELECT rowid FROM embedding_cache ORDER BY last_used_at ASC LIMIT ?)",
+            (overflow,),
+        )
+        self._evictions += overflow
+
+    def stats(self) -> EmbeddingCacheStats:
+        with self._lock:
+            if self._conn is not None:
+                (entries,) = self._conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()
+                entries += len(self._pending)
+            else:
+                entries = len(self._memory)
+            return EmbeddingCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                writes=self._writes,
+                evictions=self._evictions,
+                entries=int(entries),
+                path=self.path,
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -1,20 +1,34 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import math
 import re
+import threading
+import zlib
 from collections import Counter
 from functools import lru_cache
 from typing import Sequence
 
-from openai import OpenAI
+import httpx
+import numpy as np
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, OpenAI
 
 from assistant.config.settings import Settings, get_settings
+from assistant.observability.tracing import traced
+from assistant.services.circuit_breaker import CircuitBreaker, CircuitBreakerStats
+from assistant.services.embedding_cache import EmbeddingCache, EmbeddingCacheStats
 
 logger = logging.getLogger(__name__)
 
 MODEL_PROVIDERS = {"openai", "openai_compatible", "deepseek", "ollama"}
-_MODEL_FAILURE_CACHE: set[tuple[str, str, str, str]] = set()
+# The hashed provider builds dense vectors in-process: no network, cache or circuit breaker.
+HASHED_PROVIDER = "lexical_hashed"
+_WORD_BIGRAM_WEIGHT = 0.5
+_CHAR_NGRAM_WEIGHT = 0.5
+_CHAR_NGRAM_SIZE = 3
+_BREAKERS: dict[tuple[str, str, str, str], CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
 
 
 def embed(text: str) -> Counter:
@@ -22,6 +36,32 @@ def embed(text: str) -> Counter:
     return Counter(tokens)
 
 
+def _hashed_features(text: str) -> list[tuple[str, float]]:
+    tokens = re.findall(r"[a-z0-9]+", text.lower())
+    features = [(f"w:{tok}", 1.0) for tok in tokens]
+    features.extend((f"b:{a} {b}", _WORD_BIGRAM_WEIGHT) for a, b in zip(tokens, tokens[1:]))
+    for tok in tokens:
+        padded = f"<{tok}>"
+        features.extend(
+            (f"c:{padded[i : i + _CHAR_NGRAM_SIZE]}", _CHAR_NGRAM_WEIGHT)
+            for i in range(max(1, len(padded) - _CHAR_NGRAM_SIZE + 1))
+        )
+    return features
+
+
+def hashed_embed(text: str, dim: int = 512) -> np.ndarray:
+    """Unit-length dense vector from signed feature hashing over words, word bigrams and char trigrams.
+
+    Uses crc32 (not ``hash()``) so vectors are identical across processes and can be stored.
+    """
+    vec = np.zeros(max(1, dim), dtype=np.float32)
+    for feature, weight in _hashed_features(text):
+        h = zlib.crc32(feature.encode("utf-8"))
+        vec[h % vec.shape[0]] += weight if h & 0x80000000 else -weight
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm > 0.0 else vec
+
+
 def _cosine_sparse(vec_a: Counter, vec_b: Counter) -> float:
     if not vec_a or not vec_b:
         return 0.0
@@ -93,24 +133,154 @@ def _build_client(api_key: str, base_url: str) -> OpenAI:
     return OpenAI(api_key=api_key)
 
 
-@lru_cache(maxsize=2048)
-def _embed_text_model(provider: str, model: str, api_key: str, base_url: str, text: str) -> tuple[float, ...]:
-    failure_key = (provider, model, api_key[:8], base_url)
-    if failure_key in _MODEL_FAILURE_CACHE:
-        return tuple()
+@lru_cache(maxsize=4)
+def _get_cache(path: str, max_entries: int) -> EmbeddingCache:
+    return EmbeddingCache(path or None, max_entries=max_entries)
+
+
+def get_embedding_cache(settings: Settings | None = None) -> EmbeddingCache:
+    runtime_settings = settings or get_settings()
+    return _get_cache(runtime_settings.embedding_cache_path, runtime_settings.embedding_cache_max_entries)
+
+
+def embedding_cache_stats(settings: Settings | None = None) -> EmbeddingCacheStats:
+    return get_embedding_cache(settings).stats()
+
+
+def _breaker_for(provider: str, model: str, api_key: str, base_url: str, settings: Settings) -> CircuitBreaker:
+    # One breaker per endpoint for the life of the process, tuned from the settings of its first caller.
+    key = (provider, model, api_key[:8], base_url)
+    with _BREAKERS_LOCK:
+        breaker = _BREAKERS.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                f"{provider}:{model}@{base_url or 'default'}",
+                failure_threshold=settings.embedding_breaker_failure_threshold,
+                base_cooldown=settings.embedding_breaker_cooldown_seconds,
+                max_cooldown=settings.embedding_breaker_max_cooldown_seconds,
+            )
+            _BREAKERS[key] = breaker
+        return breaker
+
+
+def embedding_breaker_stats() -> list[CircuitBreakerStats]:
+    with _BREAKERS_LOCK:
+        breakers = list(_BREAKERS.values())
+    return [breaker.stats() for breaker in breakers]
+
+
+def _embed_batch_model(
+    provider: str,
+    model: str,
+    api_key: str,
+    base_url: str,
+    texts: tuple[str, ...],
+    settings: Settings | None = None,
+) -> list[tuple[float, ...]]:
+    if not texts:
+        return []
+    breaker = _breaker_for(provider, model, api_key, base_url, settings or get_settings())
+    if not breaker.allow():
+        # Open circuit: skip the call and let callers fall back to lexical similarity.
+        return [tuple() for _ in texts]
     try:
         client = _build_client(api_key=api_key, base_url=base_url)
-        response = client.embeddings.create(model=model, input=text)
-        return tuple(response.data[0].embedding)
-    except Exception:
-        logger.warning("Model embedding failed; falling back to lexical similarity", exc_info=True)
-        _MODEL_FAILURE_CACHE.add(failure_key)
-        return tuple()
+        response = client.embeddings.create(model=model, input=list(texts))
+        # Providers are expected to echo `index`; sort defensively to keep input order.
+        items = sorted(response.data, key=lambda item: item.index)
+        if len(items) != len(texts):
+            raise ValueError(f"Embedding response size mismatch: expected {len(texts)}, got {len(items)}")
+    except Exception as exc:
+        breaker.record_failure(exc)
+        logger.warning(
+            "Model embedding failed (circuit %s is %s); falling back to lexical similarity",
+            breaker.name,
+            breaker.state,
+            exc_info=True,
+        )
+        return [tuple() for _ in texts]
+    breaker.record_success()
+    return [tuple(item.embedding) for item in items]
+
+
+async def _aembed_batch_model(
+    client: AsyncOpenAI,
+    semaphore: asyncio.Semaphore,
+    provider: str,
+    model: str,
+    api_key: str,
+    base_url: str,
+    texts: tuple[str, ...],
+    settings: Settings,
+) -> list[tuple[float, ...]]:
+    breaker = _breaker_for(provider, model, api_key, base_url, settings)
+    async with semaphore:
+        if not breaker.allow():
+            return [tuple() for _ in texts]
+        try:
+            response = await client.embeddings.create(model=model, input=list(texts))
+            items = sorted(response.data, key=lambda item: item.index)
+            if len(items) != len(texts):
+                raise ValueError(f"Embedding response size mismatch: expected {len(texts)}, got {len(items)}")
+        except Exception as exc:
+            breaker.record_failure(exc)
+            logger.warning("Async model embedding failed (circuit %s is %s)", breaker.name, breaker.state, exc_info=True)
+            return [tuple() for _ in texts]
+    breaker.record_success()
+    return [tuple(item.embedding) for item in items]
+
+
+def _build_async_client(api_key: str, base_url: str, concurrency: int) -> AsyncOpenAI:
+    # One pooled HTTP client per bulk run; keep-alive connections are capped at the concurrency.
+    http_client = DefaultAsyncHttpxClient(
+        limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    )
+    if base_url:
+        return AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
+    return AsyncOpenAI(api_key=api_key, http_client=http_client)
+
+
+async def _aembed_chunks(
+    provider: str, model: str, api_key: str, base_url: str, chunks: list[tuple[str, ...]], settings: Settings
+) -> list[list[tuple[float, ...]]]:
+    concurrency = max(1, settings.embedding_concurrency)
+    client = _build_async_client(api_key, base_url, concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    try:
+        return await asyncio.gather(
+            *(
+                _aembed_batch_model(client, semaphore, provider, model, api_key, base_url, chunk, settings)
+                for chunk in chunks
+            )
+        )
+    finally:
+        await client.close()
+
+
+def _embed_chunks(
+    provider: str, model: str, api_key: str, base_url: str, chunks: list[tuple[str, ...]], settings: Settings
+) -> list[list[tuple[float, ...]]]:
+    """Embed chunks, overlapping requests when there is more than one and no loop is running."""
+    if settings.embedding_concurrency > 1 and len(chunks) > 1:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(_aembed_chunks(provider, model, api_key, base_url, chunks, settings))
+    return [_embed_batch_model(provider, model, api_key, base_url, chunk, settings) for chunk in chunks]
+
+
+def _embed_text_model(
+    provider: str, model: str, api_key: str, base_url: str, text: str, settings: Settings | None = None
+) -> tuple[float, ...]:
+    return _embed_batch_model(provider, model, api_key, base_url, (text,), settings)[0]
 
 
 def semantic_similarity(text_a: str, text_b: str, settings: Settings | None = None) -> float:
     runtime_settings = settings or get_settings()
     provider = _resolve_provider(runtime_settings)
+    if provider == HASHED_PROVIDER:
+        dim = runtime_settings.embedding_hash_dim
+        return float(hashed_embed(text_a, dim) @ hashed_embed(text_b, dim))
     if _should_use_model(provider, runtime_settings):
         vec_a = model_embed(text_a, settings=runtime_settings)
         vec_b = model_embed(text_b, settings=runtime_settings)
@@ -119,13 +289,68 @@ def semantic_similarity(text_a: str, text_b: str, settings: Settings | None = No
     return similarity(embed(text_a), embed(text_b))
 
 
+@traced("embeddings.model_embed")
 def model_embed(text: str, settings: Settings | None = None) -> list[float]:
     runtime_settings = settings or get_settings()
     provider = _resolve_provider(runtime_settings)
+    if provider == HASHED_PROVIDER:
+        vec = hashed_embed(text, runtime_settings.embedding_hash_dim)
+        return vec.tolist() if vec.any() else []
     if not _should_use_model(provider, runtime_settings):
         return []
     model = runtime_settings.effective_embedding_model
     api_key = runtime_settings.effective_embedding_api_key or "unused"
     base_url = _resolve_endpoint(provider, runtime_settings)
-    vec = _embed_text_model(provider, model, api_key, base_url, text)
+    cache = get_embedding_cache(runtime_settings)
+    vec = cache.get(provider, model, text, endpoint=base_url)
+    if vec is None:
+        vec = _embed_text_model(provider, model, api_key, base_url, text, runtime_settings)
+        cache.put(provider, model, text, vec, endpoint=base_url)
     return [float(v) for v in vec] if vec else []
+
+
+@traced("embeddings.model_embed_many")
+def model_embed_many(
+    texts: Sequence[str],
+    settings: Settings | None = None,
+    batch_size: int | None = None,
+) -> list[list[float]]:
+    """Embed many texts with as few provider requests as possible.
+
+    Cached texts are served locally; the remaining (deduplicated) texts are sent in
+    chunks of ``batch_size``, up to ``EMBEDDING_CONCURRENCY`` chunks in flight at once.
+    Output order always matches ``texts``; texts that could not be embedded map to
+    ``[]`` exactly like ``model_embed``.
+    """
+    runtime_settings = settings or get_settings()
+    provider = _resolve_provider(runtime_settings)
+    if provider == HASHED_PROVIDER:
+        return [model_embed(text, settings=runtime_settings) for text in texts]
+    if not texts or not _should_use_model(provider, runtime_settings):
+        return [[] for _ in texts]
+    model = runtime_settings.effective_embedding_model
+    api_key = runtime_settings.effective_embedding_api_key or "unused"
+    base_url = _resolve_endpoint(provider, runtime_settings)
+    size = max(1, batch_size or runtime_settings.embedding_batch_size)
+
+    cache = get_embedding_cache(runtime_settings)
+    unique_texts = list(dict.fromkeys(texts))
+    resolved = cache.get_many(provider, model, unique_texts, endpoint=base_url)
+    misses = [text for text in unique_texts if text not in resolved]
+
+    chunks = [tuple(misses[start : start + size]) for start in range(0, len(misses), size)]
+    concurrency = max(1, runtime_settings.embedding_concurrency)
+    logger.debug(
+        "model_embed_many: provider=%s model=%s misses=%s batches=%s concurrency=%s",
+        provider,
+        model,
+        len(misses),
+        len(chunks),
+        concurrency,
+    )
+    for chunk, vectors in zip(chunks, _embed_chunks(provider, model, api_key, base_url, chunks, runtime_settings)):
+        for text, vec in zip(chunk, vectors):
+            cache.put(provider, model, text, vec, endpoint=base_url)
+            resolved[text] = vec
+
+    return [[float(v) for v in resolved[text]] if resolved.get(text) else [] for text in texts]
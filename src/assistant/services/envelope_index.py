@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import threading
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+
+from assistant.config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+_FLUSH_EVERY = 64
+_KMEANS_ITERATIONS = 8
+_KMEANS_SAMPLE_PER_LIST = 64
+
+
+def _unit(vec: Sequence[float]) -> np.ndarray | None:
+    arr = np.asarray(vec, dtype=np.float32).reshape(-1)
+    norm = float(np.linalg.norm(arr))
+    if arr.size == 0 or norm == 0.0:
+        return None
+    return arr / norm
+
+
+class EnvelopeIndex:
+    """Exact cosine index over envelope centroids.
+
+    Rows are kept L2-normalized in a growable matrix so ``upsert`` is amortized O(dim)
+    and ``search`` is one matrix-vector product. Subclasses narrow the rows scanned
+    per query by overriding ``_candidate_rows``.
+
+    ``stamp`` and ``synced_at`` record which committed database state the rows reflect
+    (see ``OrganizationAgent.sync_envelope_index``); both are saved with the index.
+    """
+
+    kind = "exact"
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._ids: list[int] = []
+        self._rows: dict[int, int] = {}
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self.stamp: str | None = None
+        self.synced_at: datetime | None = None
+        self.dirty = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def dim(self) -> int:
+        return self._vectors.shape[1]
+
+    def _matrix(self) -> np.ndarray:
+        return self._vectors[: len(self._ids)]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids, self._rows = [], {}
+            self._vectors = np.empty((0, 0), dtype=np.float32)
+            self.stamp, self.synced_at = None, None
+            self.dirty += 1
+
+    def upsert(self, envelope_id: int, vec: Sequence[float] | None) -> None:
+        row = None if vec is None else _unit(vec)
+        with self._lock:
+            if row is None:
+                self.remove(envelope_id)
+                return
+            if len(self._ids) and row.shape[0] != self.dim:
+                # The embedding model changed dimension; centroids of the old size are unusable.
+                logger.warning("EnvelopeIndex: dimension changed %s -> %s, resetting index", self.dim, row.shape[0])
+                self.clear()
+            if self._vectors.shape[1] != row.shape[0]:
+                self._vectors = np.empty((0, row.shape[0]), dtype=np.float32)
+            pos = self._rows.get(envelope_id)
+            if pos is None:
+                pos = len(self._ids)
+                if pos == self._vectors.shape[0]:
+                    grown = np.empty((max(16, 2 * pos), self.dim), dtype=np.float32)
+                    grown[:pos] = self._vectors[:pos]
+                    self._vectors = grown
+                self._ids.append(envelope_id)
+                self._rows[envelope_id] = pos
+            self._vectors[pos] = row
+            self._on_upsert(pos, row)
+            self.dirty += 1
+
+    def remove(self, envelope_id: int) -> None:
+        with self._lock:
+            pos = self._rows.pop(envelope_id, None)
+            if pos is None:
+                return
+            last = len(self._ids) - 1
+            if pos != last:
+                # Swap-remove keeps the matrix dense.
+                moved = self._ids[last]
+                self._ids[pos] = moved
+                self._rows[moved] = pos
+                self._vectors[pos] = self._vectors[last]
+                self._on_move(last, pos)
+            self._ids.pop()
+            self.dirty += 1
+
+    def _on_upsert(self, pos: int, row: np.ndarray) -> None:
+        pass
+
+    def _on_move(self, src: int, dst: int) -> None:
+        pass
+
+    def _candidate_rows(self, query: np.ndarray) -> np.ndarray | None:
+        """Row positions worth scoring for ``query``; None means all rows."""
+        return None
+
+    def search(self, vec: Sequence[float], k: int) -> list[tuple[int, float]]:
+        """Return up to ``k`` (envelope_id, cosine) pairs, most similar first."""
+        query = _unit(vec)
+        with self._lock:
+            if query is None or not self._ids or query.shape[0] != self.dim:
+                return []
+            rows = self._candidate_rows(query)
+            matrix = self._matrix() if rows is None else self._matrix()[rows]
+            if matrix.shape[0] == 0:
+                return []
+            sims = matrix @ query
+            k = min(max(1, k), sims.shape[0])
+            top = np.argpartition(-sims, k - 1)[:k]
+            top = top[np.argsort(-sims[top], kind="stable")]
+            positions = top if rows is None else rows[top]
+            return [(self._ids[pos], float(sims[idx])) for idx, pos in zip(top, positions)]
+
+    def _extra_arrays(self) -> dict[str, np.ndarray]:
+        return {}
+
+    def _load_extra(self, data: np.lib.npyio.NpzFile) -> None:
+        pass
+
+    def save(self, path: str) -> None:
+        with self._lock:
+            target = Path(path)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp = target.with_name(target.name + ".tmp")
+            with tmp.open("wb") as handle:
+                np.savez(
+                    handle,
+                    kind=np.array(self.kind),
+                    ids=np.asarray(self._ids, dtype=np.int64),
+                    vectors=self._matrix(),
+                    stamp=np.array(self.stamp or ""),
+                    synced_at=np.array(self.synced_at.isoformat() if self.synced_at else ""),
+                    **self._extra_arrays(),
+                )
+            os.replace(tmp, target)
+            self.dirty = 0
+
+    @classmethod
+    def restore(cls, path: str) -> EnvelopeIndex:
+        index = cls()
+        with np.load(path, allow_pickle=False) as data:
+            if str(data["kind"]) != cls.kind:
+                raise ValueError(f"Index file '{path}' holds a '{data['kind']}' index, expected '{cls.kind}'")
+            ids = [int(i) for i in data["ids"]]
+            index._vectors = np.array(data["vectors"], dtype=np.float32).reshape(len(ids), -1)
+            index._ids = ids
+            index._rows = {eid: pos for pos, eid in enumerate(ids)}
+            # Files written before stamps existed are treated as never synced and get rebuilt.
+            if "stamp" in data.files and str(data["synced_at"]):
+                index.stamp = str(data["stamp"]) or None
+                index.synced_at = datetime.fromisoformat(str(data["synced_at"]))
+            index._load_extra(data)
+        return index
+
+
+class IVFIndex(EnvelopeIndex):
+    """Inverted-file index: spherical k-means lists, probing the ``nprobe`` closest per query.
+
+    Below ``min_train`` rows every query is an exact scan. Lists are retrained once the
+    index doubles in size since the last training; in between, new rows join their
+    nearest list.
+    """
+
+    kind = "ivf"
+
+    def __init__(self, nprobe: int = 8, min_train: int = 256) -> None:
+        super().__init__()
+        self.nprobe = max(1, nprobe)
+        self.min_train = max(1, min_train)
+        self._centroids = np.empty((0, 0), dtype=np.float32)
+        self._assign = np.empty(0, dtype=np.int32)
+        self._trained_at = 0
+
+    def clear(self) -> None:
+        with self._lock:
+            super().clear()
+            self._centroids = np.empty((0, 0), dtype=np.float32)
+            self._assign = np.empty(0, dtype=np.int32)
+            self._trained_at = 0
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids.shape[0] > 0 and self._centroids.shape[1] == self.dim
+
+    def _nearest_list(self, rows: np.ndarray) -> np.ndarray:
+        return np.argmax(rows @ self._centroids.T, axis=1).astype(np.int32)
+
+    def _on_upsert(self, pos: int, row: np.ndarray) -> None:
+        if pos >= self._assign.shape[0]:
+            grown = np.zeros(max(16, 2 * (pos + 1)), dtype=np.int32)
+            grown[: self._assign.shape[0]] = self._assign
+            self._assign = grown
+        if self.trained:
+            self._assign[pos] = self._nearest_list(row[None, :])[0]
+
+    def _on_move(self, src: int, dst: int) -> None:
+        self._assign[dst] = self._assign[src]
+
+    def train(self, seed: int = 0) -> None:
+        with self._lock:
+            n = len(self._ids)
+            if n == 0:
+                return
+            matrix = self._matrix()
+            nlist = max(1, int(np.sqrt(n)))
+            rng = np.random.default_rng(seed)
+            sample_size = min(n, nlist * _KMEANS_SAMPLE_PER_LIST)
+            sample = matrix[rng.choice(n, size=sample_size, replace=False)]
+            centroids = sample[rng.choice(sample_size, size=nlist, replace=False)].copy()
+            for _ in range(_KMEANS_ITERATIONS):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                for j in range(nlist):
+                    members = sample[labels == j]
+                    if members.shape[0]:
+                        mean = members.sum(axis=0)
+                        norm = float(np.linalg.norm(mean))
+                        if norm > 0.0:
+                            centroids[j] = mean / norm
+            self._centroids = centroids.astype(np.float32)
+            self._assign = np.zeros(max(16, self._vectors.shape[0]), dtype=np.int32)
+            self._assign[:n] = self._nearest_list(matrix)
+            self._trained_at = n
+            self.dirty += 1
+
+    def _candidate_rows(self, query: np.ndarray) -> np.ndarray | None:
+        n = len(self._ids)
+        if n < self.min_train:
+            return None
+        if not self.trained or n >= 2 * self._trained_at:
+            self.train()
+        nprobe = min(self.nprobe, self._centroids.shape[0])
+        probe = np.argpartition(-(self._centroids @ query), nprobe - 1)[:nprobe]
+        return np.flatnonzero(np.isin(self._assign[:n], probe))
+
+    def _extra_arrays(self) -> dict[str, np.ndarray]:
+        n = len(self._ids)
+        return {
+            "centroids": self._centroids,
+            "assign": self._assign[:n],
+            "trained_at": np.array(self._trained_at),
+        }
+
+    def _load_extra(self, data: np.lib.npyio.NpzFile) -> None:
+        self._centroids = np.array(data["centroids"], dtype=np.float32)
+        self._assign = np.array(data["assign"], dtype=np.int32)
+        self._trained_at = int(data["trained_at"])
+
+
+INDEX_KINDS: dict[str, type[EnvelopeIndex]] = {
+    EnvelopeIndex.kind: EnvelopeIndex,
+    IVFIndex.kind: IVFIndex,
+}
+
+
+def _new_index(kind: str, nprobe: int) -> EnvelopeIndex:
+    if kind == IVFIndex.kind:
+        return IVFIndex(nprobe=nprobe)
+    return INDEX_KINDS[kind]()
+
+
+@lru_cache(maxsize=8)
+def _load_index(database_url: str, kind: str, path: str | None, nprobe: int) -> EnvelopeIndex:
+    index: EnvelopeIndex | None = None
+    if kind not in INDEX_KINDS:
+        raise ValueError(f"Unsupported ENVELOPE_INDEX_KIND '{kind}'. Supported: {', '.join(INDEX_KINDS)}")
+    if path and Path(path).exists():
+        try:
+            index = INDEX_KINDS[kind].restore(path)
+            if isinstance(index, IVFIndex):
+                index.nprobe = max(1, nprobe)
+        except (KeyError, OSError, ValueError):
+            logger.warning("EnvelopeIndex: could not load '%s'; it will be rebuilt", path, exc_info=True)
+            index = None
+    if index is None:
+        index = _new_index(kind, nprobe)
+    if path:
+        # Processes sharing ``path`` may overwrite each other's file; that is safe because the
+        # saved stamp says which committed state the rows reflect and loaders sync forward from it.
+        atexit.register(flush_envelope_index, index, path, force=True)
+    return index
+
+
+def get_envelope_index(settings: Settings) -> EnvelopeIndex:
+    """Process-wide index for the configured database (loaded from disk on first use)."""
+    return _load_index(
+        settings.database_url,
+        settings.envelope_index_kind,
+        settings.envelope_index_path or None,
+        settings.envelope_index_nprobe,
+    )
+
+
+def flush_envelope_index(index: EnvelopeIndex, path: str | None, *, force: bool = False) -> None:
+    """Persist ``index`` after ``_FLUSH_EVERY`` changes (always when ``force``)."""
+    if not path or (not index.dirty) or (not force and index.dirty < _FLUSH_EVERY):
+        return
+    try:
+        index.save(path)
+    except OSError:
+        logger.warning("EnvelopeIndex: failed to save '%s'", path, exc_info=True)
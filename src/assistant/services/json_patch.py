@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import copy
+from typing import Any
+
+
+def _escape(token: str) -> str:
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def json_diff(old: Any, new: Any, path: str = "") -> list[dict[str, Any]]:
+    """RFC 6902 operations (``add``/``remove``/``replace``) turning ``old`` into ``new``.
+
+    Objects are diffed key by key and lists index by index (trailing items added or
+    removed), which keeps patches small for the append/trim edits context updates make.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops: list[dict[str, Any]] = []
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": child, "value": value})
+            else:
+                ops.extend(json_diff(old[key], value, child))
+        return ops
+    if isinstance(old, list) and isinstance(new, list):
+        ops = []
+        common = min(len(old), len(new))
+        for idx in range(common):
+            ops.extend(json_diff(old[idx], new[idx], f"{path}/{idx}"))
+        # Remove from the end so earlier indices stay valid while the patch is applied.
+        for idx in range(len(old) - 1, common - 1, -1):
+            ops.append({"op": "remove", "path": f"{path}/{idx}"})
+        for idx in range(common, len(new)):
+            ops.append({"op": "add", "path": f"{path}/{idx}", "value": new[idx]})
+        return ops
+    if old == new and type(old) is type(new):
+        return []
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def apply_patch(document: Any, ops: list[dict[str, Any]]) -> Any:
+    """Apply operations produced by :func:`json_diff`; ``document`` is not modified."""
+    result = copy.deepcopy(document)
+    for op in ops:
+        if op["op"] not in ("add", "remove", "replace"):
+            raise ValueError(f"unsupported patch op: {op['op']}")
+        path = op["path"]
+        if path == "":
+            if op["op"] == "remove":
+                raise ValueError("cannot remove the document root")
+            result = copy.deepcopy(op["value"])
+            continue
+        *parents, last = [_unescape(token) for token in path.split("/")[1:]]
+        target = result
+        for token in parents:
+            target = target[int(token)] if isinstance(target, list) else target[token]
+        if isinstance(target, list):
+            index = len(target) if last == "-" else int(last)
+            if op["op"] == "add":
+                target.insert(index, copy.deepcopy(op["value"]))
+            elif op["op"] == "remove":
+                del target[index]
+            else:
+                target[index] = copy.deepcopy(op["value"])
+        elif op["op"] == "remove":
+            del target[last]
+        else:
+            target[last] = copy.deepcopy(op["value"])
+    return result
@@ -1,14 +1,23 @@
 from __future__ import annotations
 
+import logging
+import re
+import threading
 from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
 
 from assistant.config.settings import Settings
 from assistant.db.models import EnvelopeORM
-from assistant.services.embeddings import model_embed, semantic_similarity, similarity
+from assistant.db.repo_envelopes import keyword_terms, text_terms
+from assistant.services.embeddings import model_embed, semantic_similarity
 
-import logging
 logger = logging.getLogger(__name__)
 
+_WORD_RE = re.compile(r"\w+")
+
+
 @dataclass
 class EnvelopeScore:
     envelope: EnvelopeORM | None
@@ -16,16 +25,200 @@ class EnvelopeScore:
     reason: str
 
 
+def _l2_normalize(vec: Sequence[float]) -> np.ndarray | None:
+    arr = np.asarray(vec, dtype=np.float32)
+    norm = float(np.linalg.norm(arr))
+    if arr.ndim != 1 or arr.size == 0 or norm == 0.0:
+        return None
+    return arr / norm
+
+
+class CentroidMatrix:
+    """Process-wide cache of L2-normalized envelope centroids.
+
+    Rows are keyed by envelope id and re-normalized only when the envelope's profile
+    signature changes, so each routing call just stacks cached rows into a matrix.
+    """
+
+    def __init__(self) -> None:
+        self._rows: dict[int, tuple[tuple, np.ndarray | None]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _signature(envelope: EnvelopeORM) -> tuple:
+        vec = envelope.embedding_vector
+        return (envelope.updated_at, envelope.embedding_count, envelope.card_count, len(vec) if vec is not None else 0)
+
+    def normalized(self, envelope: EnvelopeORM) -> np.ndarray | None:
+        vec = envelope.embedding_vector
+        if vec is None or len(vec) == 0:
+            return None
+        if envelope.id is None:
+            return _l2_normalize(vec)
+        signature = self._signature(envelope)
+        with self._lock:
+            cached = self._rows.get(envelope.id)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+        row = _l2_normalize(vec)
+        with self._lock:
+            self._rows[envelope.id] = (signature, row)
+        return row
+
+    def matrix(self, envelopes: Sequence[EnvelopeORM], dim: int) -> tuple[np.ndarray, np.ndarray]:
+        """Return (positions into ``envelopes``, stacked unit rows) for centroids of size ``dim``."""
+        positions: list[int] = []
+        rows: list[np.ndarray] = []
+        for idx, envelope in enumerate(envelopes):
+            row = self.normalized(envelope)
+            if row is not None and row.shape[0] == dim:
+                positions.append(idx)
+                rows.append(row)
+        if not rows:
+            return np.empty(0, dtype=np.intp), np.empty((0, dim), dtype=np.float32)
+        return np.asarray(positions, dtype=np.intp), np.vstack(rows)
+
+
+_CENTROIDS = CentroidMatrix()
+
+
+@dataclass(frozen=True)
+class EnvelopeTerms:
+    keywords: frozenset[str]
+    terms: frozenset[str]
+
+
+class TermSets:
+    """Process-wide cache of each envelope's lowercased keyword and term sets.
+
+    Mirrors the ``envelope_terms`` index: ``keywords`` drive the overlap score (falling
+    back to name/summary words), ``terms`` adds name/summary tokens for assignee lookups.
+    """
+
+    def __init__(self) -> None:
+        self._sets: dict[int, tuple[tuple, EnvelopeTerms]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _build(envelope: EnvelopeORM) -> EnvelopeTerms:
+        keywords = keyword_terms(envelope.keywords_json)
+        text = text_terms(envelope.name, envelope.summary)
+        if not keywords:
+            keywords = set(f"{envelope.name} {envelope.summary or ''}".lower().split())
+        return EnvelopeTerms(keywords=frozenset(keywords), terms=frozenset(keywords | text))
+
+    def get(self, envelope: EnvelopeORM) -> EnvelopeTerms:
+        if envelope.id is None:
+            return self._build(envelope)
+        signature = (envelope.updated_at, envelope.card_count, envelope.name, envelope.summary)
+        with self._lock:
+            cached = self._sets.get(envelope.id)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+        terms = self._build(envelope)
+        with self._lock:
+            self._sets[envelope.id] = (signature, terms)
+        return terms
+
+
+_TERM_SETS = TermSets()
+
+
 class EnvelopeScorer:
     def __init__(self, settings: Settings):
         self.settings = settings
+        self.centroids = _CENTROIDS
+        self.term_sets = _TERM_SETS
 
     @staticmethod
-    def _overlap(a: list[str], b: list[str]) -> float:
+    def _overlap(a: frozenset[str] | set[str], b: frozenset[str]) -> float:
         if not a or not b:
             return 0.0
-        sa, sb = set(a), set(b)
-        return len(sa.intersection(sb)) / len(sa.union(sb))
+        return len(a & b) / len(a | b)
+
+    @staticmethod
+    def _envelope_text(envelope: EnvelopeORM) -> str:
+        return f"{envelope.name} {envelope.summary or ''}".strip()
+
+    @staticmethod
+    def _assignee_match(assignee: str | None, terms: EnvelopeTerms) -> float:
+        if not assignee:
+            return 0.0
+        normalized = assignee.strip().lower()
+        tokens = set(_WORD_RE.findall(normalized))
+        if normalized and (normalized in terms.terms or (tokens and tokens <= terms.terms)):
+            return 1.0
+        return 0.0
+
+    def _embedding_similarities(
+        self,
+        card_description: str,
+        envelopes: Sequence[EnvelopeORM],
+        card_vec: Sequence[float],
+    ) -> np.ndarray:
+        sims = np.full(len(envelopes), np.nan, dtype=np.float64)
+        if len(card_vec):
+            # Envelopes with a centroid never fall back to text similarity; a dimension
+            # mismatch or zero vector scores 0.0, as the dense cosine always has.
+            for idx, envelope in enumerate(envelopes):
+                vec = envelope.embedding_vector
+                if vec is not None and len(vec):
+                    sims[idx] = 0.0
+            card_unit = _l2_normalize(card_vec)
+            if card_unit is not None:
+                positions, matrix = self.centroids.matrix(envelopes, dim=card_unit.shape[0])
+                if positions.size:
+                    # One matrix-vector product scores every envelope with a stored centroid.
+                    sims[positions] = matrix @ card_unit
+        for idx in np.flatnonzero(np.isnan(sims)):
+            envelope = envelopes[idx]
+            sims[idx] = semantic_similarity(card_description, self._envelope_text(envelope), settings=self.settings)
+            logger.debug("EnvelopeScorer: semantic_similarity=%s for envelope=%s", sims[idx], envelope.name)
+        return sims
+
+    def rank(
+        self,
+        card_description: str,
+        card_keywords: list[str],
+        envelopes: Sequence[EnvelopeORM],
+        card_embedding: list[float] | None = None,
+        assignee: str | None = None,
+        top_k: int | None = None,
+    ) -> list[EnvelopeScore]:
+        """Score all envelopes at once and return the best ``top_k`` (all when None), highest first."""
+        if not envelopes:
+            return []
+        card_vec = card_embedding if card_embedding is not None else model_embed(card_description, settings=self.settings)
+        sims = self._embedding_similarities(card_description, envelopes, card_vec)
+
+        card_terms = keyword_terms(card_keywords)
+        kscores = np.empty(len(envelopes), dtype=np.float64)
+        bonuses = np.empty(len(envelopes), dtype=np.float64)
+        for idx, envelope in enumerate(envelopes):
+            terms = self.term_sets.get(envelope)
+            kscores[idx] = self._overlap(card_terms, terms.keywords)
+            bonuses[idx] = self._assignee_match(assignee, terms)
+
+        finals = (
+            self.settings.embedding_weight * sims
+            + self.settings.keyword_weight * kscores
+            + self.settings.entity_weight * bonuses
+        )
+        # Stable sort keeps the first envelope on ties, like the previous linear scan.
+        order = np.argsort(-finals, kind="stable")
+        if top_k is not None:
+            order = order[: max(1, top_k)]
+        ranked = [
+            EnvelopeScore(
+                envelope=envelopes[idx],
+                score=float(finals[idx]),
+                reason=f"embedding={sims[idx]:.2f}, keyword={kscores[idx]:.2f}, assignee={bonuses[idx]:.2f}",
+            )
+            for idx in order
+        ]
+        for item in ranked:
+            logger.debug("EnvelopeScorer: score=%s, reason=%s for envelope=%s", item.score, item.reason, item.envelope.name)
+        return ranked
 
     def score(
         self,
@@ -35,35 +228,8 @@ class EnvelopeScorer:
         card_embedding: list[float] | None = None,
         assignee: str | None = None,
     ) -> tuple[float, str]:
-        env_text = f"{envelope.name} {envelope.summary or ''}".strip()
-        card_vec = card_embedding if card_embedding is not None else model_embed(card_description, settings=self.settings)
-        env_vec = envelope.embedding_vector_json or []
-        if card_vec and env_vec:
-            sim = similarity(card_vec, env_vec)
-            logger.debug("EnvelopeScorer: similarity=%s for envelope=%s", sim, envelope.name)
-        else:
-            sim = semantic_similarity(card_description, env_text, settings=self.settings)
-            logger.debug("EnvelopeScorer: semantic_similarity=%s for envelope=%s", sim, envelope.name)
-
-        envelope_keywords = [w.lower() for w in (envelope.keywords_json or []) if w]
-        if not envelope_keywords:
-            envelope_keywords = [w.lower() for w in env_text.split() if w]
-        kscore = self._overlap(card_keywords, envelope_keywords)
-        assignee_bonus = 0.0
-        if assignee:
-            normalized = assignee.strip().lower()
-            if normalized and (
-                normalized in " ".join(envelope_keywords)
-                or normalized in (envelope.summary or "").lower()
-                or normalized in envelope.name.lower()
-            ):
-                assignee_bonus = 1.0
-        final = (
-            self.settings.embedding_weight * sim
-            + self.settings.keyword_weight * kscore
-            + self.settings.entity_weight * assignee_bonus
-        )
-        return final, f"embedding={sim:.2f}, keyword={kscore:.2f}, assignee={assignee_bonus:.2f}"
+        (result,) = self.rank(card_description, card_keywords, [envelope], card_embedding=card_embedding, assignee=assignee)
+        return result.score, result.reason
 
     def choose_best(
         self,
@@ -73,18 +239,10 @@ class EnvelopeScorer:
         card_embedding: list[float] | None = None,
         assignee: str | None = None,
     ) -> EnvelopeScore:
-        if not envelopes:
+        ranked = self.rank(
+            card_description, card_keywords, envelopes, card_embedding=card_embedding, assignee=assignee, top_k=1
+        )
+        if not ranked:
             return EnvelopeScore(envelope=None, score=0.0, reason="no envelopes available")
-        best_env = None
-        best_score = -1.0
-        best_reason = ""
-        for envelope in envelopes:
-            score, reason = self.score(
-                card_description, card_keywords, envelope, card_embedding=card_embedding, assignee=assignee
-            )
-            logger.debug("EnvelopeScorer: score=%s, reason=%s for envelope=%s", score, reason, envelope.name)
-            if score > best_score:
-                best_env = envelope
-                best_score = score
-                best_reason = reason
-        return EnvelopeScore(envelope=best_env, score=max(best_score, 0.0), reason=best_reason)
+        best = ranked[0]
+        return EnvelopeScore(envelope=best.envelope, score=max(best.score, 0.0), reason=best.reason)
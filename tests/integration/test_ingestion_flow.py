@@ -2,10 +2,15 @@ import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
+from assistant.agents.context.agent import ContextAgent
+from assistant.agents.organization.agent import OrganizationAgent
 from assistant.config.settings import Settings
 from assistant.pipeline.orchestrator import AssistantOrchestrator
+from assistant.pipeline.worker import BackgroundWorker
 from assistant.db.base import Base
 from assistant.db.models import CardORM, EnvelopeORM, IngestionEventORM, UserContextORM
+from assistant.db.repo_jobs import JOB_REFINE_ENVELOPE, JOB_UPDATE_CONTEXT, JobsRepository
+from assistant.schemas.context import ContextUpdateOutput, StructuredUserContext
 
 
 def test_ingestion_creates_card_and_envelope() -> None:
@@ -59,3 +64,149 @@ def test_ingestion_invalid_prompt_version_fails_fast() -> None:
     with Session() as session:
         with pytest.raises(ValueError, match="Unknown prompt version"):
             AssistantOrchestrator(session, settings)
+
+
+def test_ingest_notes_batches_refinement_and_context_updates(monkeypatch) -> None:
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    settings = Settings(
+        _env_file=None,
+        llm_provider="openai",
+        llm_api_key=None,
+        EMBEDDING_PROVIDER="lexical_hashed",
+        database_url="sqlite+pysqlite:///:memory:",
+        INGEST_WORKERS=3,
+    )
+    notes = [
+        "Call Sarah about the Q3 budget next Monday",
+        "",
+        "Prepare Q3 budget slides for Sarah",
+        "Remember to pick up milk on the way home",
+    ]
+
+    with Session() as session:
+        orchestrator = AssistantOrchestrator(session, settings)
+        refined: list[int] = []
+        context_calls: list[int] = []
+        original_refine = orchestrator.organization_agent.refine_envelope
+        original_update = orchestrator.context_agent.update_context
+
+        def spy_refine(envelope_id: int) -> None:
+            refined.append(envelope_id)
+            original_refine(envelope_id)
+
+        def spy_update(card_id: int, **kwargs):
+            context_calls.append(card_id)
+            return original_update(card_id, **kwargs)
+
+        monkeypatch.setattr(orchestrator.organization_agent, "refine_envelope", spy_refine)
+        monkeypatch.setattr(orchestrator.context_agent, "update_context", spy_update)
+
+        results = orchestrator.ingest_notes(notes)
+        cards = session.query(CardORM).order_by(CardORM.id).all()
+        events = session.query(IngestionEventORM).order_by(IngestionEventORM.id).all()
+        event_stages = [{t.stage for t in event.stage_timings} for event in events]
+        envelope_counts = {e.id: e.card_count for e in session.query(EnvelopeORM).all()}
+
+    assert [r.card.description for r in results] == [c.description for c in cards]
+    assert [c.raw_text for c in cards] == [n for n in notes if n]
+    assert all(c.embedding_vector is not None for c in cards)
+    assert len(events) == 3
+    assert event_stages[0] == {"extract", "route", "store", "profile"}
+    assert event_stages[-1] == event_stages[0] | {"embed", "refine", "context", "commit", "total"}
+    assert sorted(refined) == sorted(set(refined)) == sorted(envelope_counts)
+    assert sum(envelope_counts.values()) == 3
+    assert context_calls == [cards[-1].id]
+    assert results[-1].context_updates and not results[0].context_updates
+
+
+@pytest.mark.parametrize("background_worker", [False, True])
+def test_debounced_context_update_runs_inline_without_a_worker(background_worker) -> None:
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    settings = Settings(
+        _env_file=None,
+        llm_provider="openai",
+        llm_api_key=None,
+        EMBEDDING_PROVIDER="lexical_hashed",
+        database_url="sqlite+pysqlite:///:memory:",
+        CONTEXT_UPDATE_MIN_INTERVAL_SECONDS=60,
+        CONTEXT_UPDATE_MAX_PENDING_CARDS=10,
+    )
+
+    with Session() as session:
+        orchestrator = AssistantOrchestrator(session, settings, background_worker=background_worker)
+        llm_calls: list[int] = []
+
+        def fake_update(previous_context_json, evidence, seen_card_ids=None):
+            llm_calls.append(len(evidence))
+            return ContextUpdateOutput(context=StructuredUserContext(), focus_summary=f"run {len(llm_calls)}")
+
+        orchestrator.context_agent.updater.update = fake_update
+        orchestrator.ingest_note("Call Sarah about the Q3 budget next Monday")
+        second = orchestrator.ingest_note("Prepare Q3 budget slides for Sarah")
+        context_jobs = [j for j in JobsRepository(session).list_pending() if j.kind == JOB_UPDATE_CONTEXT]
+
+    if background_worker:
+        # Inside the window the update waits for the worker's trailing job, and the output says so.
+        assert len(llm_calls) == 1
+        assert [j.subject_id for j in context_jobs] == [second.card.id]
+        assert second.context_updates[-1] == "trailing context update queued for the background worker"
+    else:
+        # Nothing would run a queued job: the second card reaches the context right away.
+        assert len(llm_calls) == 2
+        assert context_jobs == []
+        assert second.context_updates[0].startswith("context updated")
+
+
+def test_deferred_ingest_queues_coalesced_background_jobs(monkeypatch) -> None:
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    settings = Settings(
+        _env_file=None,
+        llm_provider="openai",
+        llm_api_key=None,
+        EMBEDDING_PROVIDER="lexical_hashed",
+        database_url="sqlite+pysqlite:///:memory:",
+        INGEST_DEFERRED=True,
+    )
+    refined: list[int] = []
+    context_calls: list[int] = []
+    original_refine = OrganizationAgent.refine_envelope
+    original_update = ContextAgent.update_context
+
+    def spy_refine(self, envelope_id: int) -> None:
+        refined.append(envelope_id)
+        original_refine(self, envelope_id)
+
+    def spy_update(self, card_id: int):
+        context_calls.append(card_id)
+        return original_update(self, card_id)
+
+    monkeypatch.setattr(OrganizationAgent, "refine_envelope", spy_refine)
+    monkeypatch.setattr(ContextAgent, "update_context", spy_update)
+
+    with Session() as session:
+        orchestrator = AssistantOrchestrator(session, settings)
+        first = orchestrator.ingest_note("Call Sarah about the Q3 budget next Monday")
+        second = orchestrator.ingest_note("Prepare Q3 budget slides for Sarah")
+        orchestrator.ingest_notes(["Remember to pick up milk", "Buy eggs and milk"])
+
+        assert refined == [] and context_calls == []
+        assert first.context_updates == ["context update queued"]
+        pending = JobsRepository(session).list_pending()
+        envelope_ids = {c.envelope_id for c in session.query(CardORM).all()}
+        assert sorted(j.subject_id for j in pending if j.kind == JOB_REFINE_ENVELOPE) == sorted(envelope_ids)
+        context_jobs = [j for j in pending if j.kind == JOB_UPDATE_CONTEXT]
+        latest_card_id = max(c.id for c in session.query(CardORM).all())
+        assert [j.subject_id for j in context_jobs] == [latest_card_id]
+
+        result = BackgroundWorker(session, settings).drain_all()
+        assert sorted(refined) == sorted(envelope_ids) == sorted(result.refined_envelopes)
+        assert context_calls == [latest_card_id]
+        assert result.failed == 0 and result.context_messages
+        assert JobsRepository(session).count_by_status() == {"done": len(pending)}
+        assert second.card.id < latest_card_id
@@ -1,5 +1,6 @@
 from datetime import datetime
 
+import pytest
 from sqlalchemy import create_engine, inspect
 from sqlalchemy.orm import sessionmaker
 
@@ -7,7 +8,8 @@ from assistant.agents.thinking.agent import ThinkingAgent
 from assistant.agents.thinking.artifacts import list_artifacts, write_run
 from assistant.config.settings import Settings
 from assistant.db.base import Base
-from assistant.db.models import CardORM, EnvelopeORM, UserContextORM
+from assistant.db.models import CardORM, EnvelopeORM, ThinkingWatermarkORM, UserContextORM
+from assistant.pipeline.orchestrator import AssistantOrchestrator
 
 
 class _FakeStructuredInvoker:
@@ -40,7 +42,10 @@ def test_thinking_cycle_generates_artifact_and_schema_without_db_persistence(mon
     Base.metadata.create_all(bind=engine)
     Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
-    monkeypatch.setattr("assistant.agents.thinking.agent.build_chat_model", lambda _settings: _FakeLLM())
+    monkeypatch.setattr(
+        "assistant.agents.thinking.agent.build_structured_model",
+        lambda _settings, schema: _FakeLLM().with_structured_output(schema),
+    )
     settings = Settings(
         _env_file=None,
         THINKING_PROMPT_VERSION="thinking.v2",
@@ -85,3 +90,120 @@ def test_thinking_cycle_generates_artifact_and_schema_without_db_persistence(mon
     table_names = set(inspect(engine).get_table_names())
     assert "thinking_runs" not in table_names
     assert "thinking_suggestions" not in table_names
+
+
+class _RecordingInvoker(_FakeStructuredInvoker):
+    def __init__(self):
+        self.payloads: list[str] = []
+        self.next_suggestions: list[dict] | None = None
+
+    def invoke(self, messages):
+        self.payloads.append(messages[-1].content)
+        if self.next_suggestions is not None:
+            suggestions, self.next_suggestions = self.next_suggestions, None
+            return {"suggestions": suggestions}
+        return super().invoke(messages)
+
+
+def _suggestion(title: str, priority: str = "medium") -> dict:
+    return {
+        "suggestion_type": "next_step",
+        "title": title,
+        "message": title,
+        "priority": priority,
+        "score": 0.5,
+        "reasoning_steps": ["step"],
+        "evidence": {"card_ids": [3]},
+    }
+
+
+def test_thinking_cycle_skips_idle_ticks_and_sends_only_changes(monkeypatch, tmp_path) -> None:
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    invoker = _RecordingInvoker()
+    monkeypatch.setattr("assistant.agents.thinking.agent.build_structured_model", lambda _settings, schema: invoker)
+    settings = Settings(_env_file=None, THINKING_OUTPUT_DIR=str(tmp_path), THINKING_FULL_REFRESH_EVERY=2)
+
+    def add_card(session, text: str) -> None:
+        session.add(CardORM(raw_text=text, card_type="task", description=text, keywords_json=["budget"]))
+        session.commit()
+
+    with Session() as session:
+        add_card(session, "Prepare budget draft")
+        add_card(session, "Book venue")
+        agent = ThinkingAgent(session, settings)
+
+        first = agent.run_cycle()
+        assert first is not None and not first.input_stats.incremental
+        assert first.input_stats.cards_scanned == 2
+        session.commit()
+
+        # Idle tick: nothing changed, no LLM call.
+        assert agent.run_cycle() is None
+        assert len(invoker.payloads) == 1
+
+        add_card(session, "Call the caterer")
+        invoker.next_suggestions = [_suggestion("Confirm the caterer")]
+        second = agent.run_cycle()
+        assert second.input_stats.incremental and second.input_stats.cards_scanned == 1
+        # Only the new suggestion came back; the earlier one still holds and is carried forward.
+        assert [s.title for s in second.suggestions] == ["Confirm the caterer", "Start Q3 Budget Draft"]
+        assert second.carried_forward == 1
+        payload = invoker.payloads[-1]
+        assert payload.startswith("Incremental run")
+        assert "next_step | high | Start Q3 Budget Draft | 1 | 1" in payload
+        assert "Call the caterer" in payload and "Book venue" not in payload
+        assert '"context_json"' not in payload
+        session.commit()
+
+        # A context change is sent in full; an edited card counts as changed.
+        session.add(UserContextORM(id=1, context_json='{"projects":[]}', focus_summary="budget", updated_at=datetime.utcnow()))
+        session.get(CardORM, 1).description = "Prepare the final budget draft"
+        session.commit()
+        invoker.next_suggestions = [_suggestion("start q3 budget draft", priority="low")]
+        third = agent.run_cycle()
+        assert third.input_stats.cards_scanned == 1
+        # A revision (same type and title) replaces the earlier suggestion instead of adding one.
+        assert [(s.title, s.priority.value) for s in third.suggestions] == [
+            ("start q3 budget draft", "low"),
+            ("Confirm the caterer", "medium"),
+        ]
+        assert "next_step | medium | Confirm the caterer | 3 | -" in invoker.payloads[-1]
+        assert '"context_json"' in invoker.payloads[-1] and "final budget draft" in invoker.payloads[-1]
+        session.commit()
+
+        # THINKING_FULL_REFRESH_EVERY incremental runs later the full input is resent.
+        add_card(session, "Send invites")
+        fourth = agent.run_cycle()
+        assert not fourth.input_stats.incremental and fourth.input_stats.cards_scanned == 4
+        assert [s.title for s in fourth.suggestions] == ["Start Q3 Budget Draft"] and fourth.carried_forward == 0
+        session.commit()
+
+        forced = agent.run_cycle(force=True)
+        assert forced is not None and not forced.input_stats.incremental
+        assert len(invoker.payloads) == 5
+
+
+def test_failed_artifact_write_does_not_advance_the_watermark(monkeypatch, tmp_path) -> None:
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    invoker = _RecordingInvoker()
+    monkeypatch.setattr("assistant.agents.thinking.agent.build_structured_model", lambda _settings, schema: invoker)
+    blocked = tmp_path / "not-a-dir"
+    blocked.write_text("")
+
+    with Session() as session:
+        session.add(CardORM(raw_text="Prepare budget draft", card_type="task", description="x", keywords_json=[]))
+        session.commit()
+        settings = Settings(_env_file=None, llm_provider="openai", llm_api_key=None, THINKING_OUTPUT_DIR=str(blocked))
+        with pytest.raises(OSError):
+            AssistantOrchestrator(session, settings).run_thinking_cycle()
+        assert session.query(ThinkingWatermarkORM).count() == 0
+
+        settings = Settings(_env_file=None, llm_provider="openai", llm_api_key=None, THINKING_OUTPUT_DIR=str(tmp_path))
+        orchestrator = AssistantOrchestrator(session, settings)
+        output, artifact_path = orchestrator.run_thinking_cycle()
+        assert artifact_path.exists() and output.suggestions
+        assert orchestrator.run_thinking_cycle() is None
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from assistant.agents.context.agent import ContextAgent
+from assistant.config.settings import Settings
+from assistant.db.base import Base
+from assistant.db.models import CardORM
+from assistant.schemas.context import ContextUpdateOutput, StructuredUserContext
+
+T0 = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def _add_cards(session, start: int, count: int) -> None:
+    for idx in range(start, start + count):
+        session.add(
+            CardORM(
+                raw_text=f"note {idx}",
+                card_type="task",
+                description=f"description {idx}",
+                keywords_json=["budget"],
+                reasoning_steps_json=["step"],
+                created_at=T0 - timedelta(minutes=idx),
+            )
+        )
+    session.flush()
+
+
+def test_context_updates_are_debounced_and_skip_unchanged_evidence() -> None:
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    settings = Settings(
+        _env_file=None,
+        CONTEXT_UPDATE_MIN_INTERVAL_SECONDS=60,
+        CONTEXT_UPDATE_MAX_PENDING_CARDS=3,
+    )
+
+    with Session() as session:
+        agent = ContextAgent(session, settings)
+        llm_calls: list[int] = []
+
+        def fake_update(previous_context_json, evidence, seen_card_ids=None):
+            llm_calls.append(len(evidence))
+            return ContextUpdateOutput(context=StructuredUserContext(), focus_summary=f"run {len(llm_calls)}")
+
+        agent.updater.update = fake_update
+        _add_cards(session, 0, 2)
+        assert agent.update_context(2, now=T0).updated
+        assert agent.snapshot_repo.get_snapshot().last_card_id == 2
+
+        # Two new cards inside the window: wait for the trailing update.
+        _add_cards(session, 2, 2)
+        debounced = agent.update_context(4, now=T0 + timedelta(seconds=10))
+        assert not debounced.updated and debounced.retry_after == T0 + timedelta(seconds=60)
+        assert len(llm_calls) == 1
+
+        # Enough new cards to flush the burst early.
+        _add_cards(session, 4, 1)
+        assert agent.update_context(5, now=T0 + timedelta(seconds=20)).updated
+        assert len(llm_calls) == 2
+
+        # Nothing changed since the last update: the evidence hash matches and the LLM is skipped.
+        unchanged = agent.update_context(5, now=T0 + timedelta(seconds=90))
+        assert not unchanged.updated and unchanged.retry_after is None
+        assert len(llm_calls) == 2
+        assert agent.update_context(5, force=True, now=T0 + timedelta(seconds=95)).messages[0].startswith(
+            "context unchanged"
+        )
+
+        # Once the window has passed a single new card is enough.
+        _add_cards(session, 5, 1)
+        assert agent.update_context(6, now=T0 + timedelta(seconds=100)).updated
+        assert len(llm_calls) == 3
+        assert agent.snapshot_repo.get_snapshot().updated_at == T0 + timedelta(seconds=100)
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from assistant.agents.context.agent import ContextAgent
+from assistant.agents.context.evidence import build_context_evidence
+from assistant.agents.context.updater import ContextUpdater
+from assistant.config.settings import Settings
+from assistant.db.base import Base
+from assistant.db.models import CardORM
+from assistant.schemas.context import ContextItem, ContextUpdateOutput, StructuredUserContext
+
+T0 = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def _add_card(session, idx: int) -> None:
+    session.add(
+        CardORM(
+            raw_text=f"note {idx}",
+            card_type="task",
+            description=f"description {idx}",
+            keywords_json=["budget"],
+            reasoning_steps_json=["step"],
+            created_at=T0 + timedelta(minutes=idx),
+        )
+    )
+    session.flush()
+
+
+def test_delta_payload_sends_digest_and_only_new_cards() -> None:
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    with Session() as session:
+        for idx in range(6):
+            _add_card(session, idx)
+        evidence = build_context_evidence(session)
+        context = StructuredUserContext(
+            projects=[ContextItem(name="Budget review", strength=0.8, evidence_card_ids=[1, 2], last_seen_at=T0)]
+        )
+        previous = context.model_dump_json()
+
+        full = ContextUpdater.build_payload(previous, evidence)
+        delta = ContextUpdater.build_payload(previous, evidence[:1], seen_card_ids=[c.card_id for c in evidence[1:]])
+
+    assert len(delta) < len(full) / 2
+    assert "projects | Budget review | 0.80 | 1,2 | 2026-01-01T12:00" in delta
+    assert '"card_id":6' in delta and '"card_id":5' not in delta
+    assert "Already-seen evidence card ids: 5, 4, 3, 2, 1" in delta
+
+
+def test_context_updates_send_deltas_with_periodic_full_refresh() -> None:
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    settings = Settings(_env_file=None, CONTEXT_UPDATE_MIN_INTERVAL_SECONDS=0, CONTEXT_FULL_REFRESH_EVERY=2)
+
+    with Session() as session:
+        agent = ContextAgent(session, settings)
+        calls: list[tuple[list[int], list[int] | None]] = []
+
+        def fake_update(previous_context_json, evidence, seen_card_ids=None):
+            calls.append(([c.card_id for c in evidence], seen_card_ids))
+            return ContextUpdateOutput(context=StructuredUserContext(), focus_summary=f"run {len(calls)}")
+
+        agent.updater.update = fake_update
+        for idx in range(3):
+            _add_card(session, idx)
+        assert agent.update_context(3, now=T0).messages == ["context updated with 3 evidence cards"]
+        assert calls[-1] == ([3, 2, 1], None)
+
+        _add_card(session, 3)
+        result = agent.update_context(4, now=T0 + timedelta(minutes=1))
+        assert result.messages == ["context updated with 1 new of 4 evidence cards (delta)"]
+        assert calls[-1] == ([4], [3, 2, 1])
+
+        _add_card(session, 4)
+        agent.update_context(5, now=T0 + timedelta(minutes=2))
+        assert calls[-1] == ([5], [4, 3, 2, 1])
+        assert agent.snapshot_repo.get_snapshot().delta_updates_since_full == 2
+
+        # Every CONTEXT_FULL_REFRESH_EVERY delta updates the whole evidence set is resent.
+        _add_card(session, 5)
+        agent.update_context(6, now=T0 + timedelta(minutes=3))
+        assert calls[-1] == ([6, 5, 4, 3, 2, 1], None)
+        assert agent.snapshot_repo.get_snapshot().delta_updates_since_full == 0
+
+        # An edited card changes the fingerprint, and only that card is resent.
+        session.get(CardORM, 2).description = "description 1, revised"
+        session.flush()
+        agent.update_context(6, now=T0 + timedelta(minutes=4))
+        assert calls[-1] == ([2], [6, 5, 4, 3, 1])
+        assert len(calls) == 5
@@ -0,0 +1,88 @@
+import math
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from assistant.db.base import Base
+from assistant.db.models import CardORM, ContextEntityORM
+from assistant.db.repo_cards import CardsRepository
+from assistant.db.repo_context import ContextRepository
+
+T0 = datetime(2026, 3, 1, 9, 0, 0)
+
+
+def _create(session, *, assignee: str | None, keywords: list[str]) -> CardORM:
+    return CardsRepository(session).create_card(
+        raw_text="note",
+        card_type="task",
+        description="note",
+        due_at=None,
+        assignee_text=assignee,
+        keywords=keywords,
+        reasoning_steps=[],
+        envelope_id=None,
+    )
+
+
+def test_context_entities_are_maintained_on_create_and_decay_with_time() -> None:
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+
+    with Session() as session:
+        # Cards with explicit timestamps; create_card would stamp them all "now".
+        for days_ago, assignee, keywords in (
+            (28, "Sarah", ["budget", "budget", "q3"]),
+            (14, "Sarah", ["budget"]),
+            (0, "Paul", ["travel"]),
+        ):
+            card = CardORM(
+                raw_text="note",
+                card_type="task",
+                description="note",
+                assignee_text=assignee,
+                keywords_json=keywords,
+                reasoning_steps_json=[],
+                created_at=T0 - timedelta(days=days_ago),
+            )
+            session.add(card)
+            session.flush()
+            ContextRepository(session, half_life_days=14).record_card(card)
+        session.commit()
+
+        repo = ContextRepository(session, half_life_days=14)
+        top = {item.label: item for item in repo.top_context_entities(limit=10, now=T0)}
+        assert top["person:Sarah"].mention_count == 2
+        assert top["theme:budget"].mention_count == 2
+        assert top["person:Sarah"].strength == pytest.approx(1.2 * (0.25 + 0.5))
+        assert top["person:Paul"].strength == pytest.approx(1.2)
+        assert [item.label for item in repo.top_context_entities(limit=2, now=T0)] == ["person:Paul", "person:Sarah"]
+
+        # Fourteen days later every score has halved; the ranking is unchanged.
+        later = repo.top_context_entities(limit=10, now=T0 + timedelta(days=14))
+        assert {i.label: i.strength for i in later}["person:Paul"] == pytest.approx(0.6)
+
+        incremental = {row.label: (row.log_score, row.mention_count) for row in session.query(ContextEntityORM)}
+        assert repo.rebuild_context_entities() == len(incremental) == 5
+        rebuilt = {row.label: (row.log_score, row.mention_count) for row in session.query(ContextEntityORM)}
+        assert rebuilt.keys() == incremental.keys()
+        for label, (log_score, count) in rebuilt.items():
+            assert math.isclose(log_score, incremental[label][0]) and count == incremental[label][1]
+
+
+def test_create_card_updates_entities_in_the_same_transaction() -> None:
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+
+    with Session() as session:
+        _create(session, assignee="Mike", keywords=["gift"])
+        session.rollback()
+        assert session.query(ContextEntityORM).count() == 0
+
+        _create(session, assignee="Mike", keywords=["gift", "birthday"])
+        session.commit()
+        labels = [item.label for item in ContextRepository(session).top_context_entities(limit=5)]
+    assert labels[0] == "person:Mike" and set(labels) == {"person:Mike", "theme:gift", "theme:birthday"}
@@ -41,3 +41,50 @@ def test_context_evidence_selector_returns_bounded_deduped_cards() -> None:
         # Current semantics: include latest global cards and important per active envelope.
         latest_six_ids = [c.id for c in session.query(CardORM).order_by(CardORM.created_at.desc()).limit(6).all()]
         assert set(latest_six_ids).issubset(set(ids))
+
+
+def test_context_evidence_uses_persisted_importance_in_one_query() -> None:
+    from sqlalchemy import event
+
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    now = datetime.utcnow()
+
+    with Session() as session:
+        env = EnvelopeORM(name="Travel", summary="Trips", card_count=20)
+        session.add(env)
+        session.flush()
+
+        def card(idx: int, card_type: str = "idea_note", **fields) -> CardORM:
+            return CardORM(
+                raw_text=f"note {idx}",
+                card_type=card_type,
+                description=f"description {idx}",
+                keywords_json=fields.pop("keywords", []),
+                reasoning_steps_json=[],
+                envelope_id=env.id,
+                created_at=now - timedelta(days=idx),
+                **fields,
+            )
+
+        # Ten fresh notes fill the "latest" slots; the important one is older than all of them.
+        session.add_all([card(idx) for idx in range(10)])
+        important = card(30, "task", due_at=now, assignee_text="Paul", keywords=["a", "b", "c", "d", "e", "f"])
+        plain = card(20, "idea_note")
+        session.add_all([important, plain])
+        session.commit()
+        assert important.importance_score == 2.0 + 1.0 + 0.6 + 5 * 0.15
+        assert plain.importance_score == 0.0
+
+        plain.card_type = "reminder"
+        session.commit()
+        assert plain.importance_score == 1.5
+
+        statements: list[str] = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        evidence = build_context_evidence(session, max_cards=12)
+
+    assert len(statements) == 1
+    assert [e.card_id for e in evidence][-1] == important.id
+    assert len(evidence) == 7
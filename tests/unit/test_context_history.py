@@ -0,0 +1,85 @@
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from assistant.db.base import Base
+from assistant.db.models import UserContextVersionORM
+from assistant.db.repo_context_history import ContextHistoryRepository
+from assistant.db.repo_context_snapshot import ContextSnapshotRepository
+from assistant.services.json_patch import apply_patch, json_diff
+
+T0 = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def _context(step: int) -> dict:
+    projects = [{"name": f"project {i}", "strength": round(0.5 + i / 20, 2), "evidence_card_ids": [i]} for i in range(step % 4)]
+    return {"people": [{"name": "Sarah", "strength": 0.9, "evidence_card_ids": [1, step]}], "projects": projects}
+
+
+def test_json_diff_round_trips() -> None:
+    old = {"a": [1, 2, 3], "b": {"x/y": 1, "t~": 2}, "c": "same"}
+    new = {"a": [1, 5], "b": {"x/y": 2}, "c": "same", "d": None}
+    ops = json_diff(old, new)
+    assert apply_patch(old, ops) == new
+    assert old["a"] == [1, 2, 3]
+    assert {"op": "replace", "path": "/b/x~1y", "value": 2} in ops
+    assert json_diff(new, new) == []
+
+
+def test_history_stores_diffs_between_keyframes_and_compacts() -> None:
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+
+    with Session() as session:
+        history = ContextHistoryRepository(session, keyframe_every=3, max_versions=0)
+        versions = {}
+        for step in range(8):
+            row = history.record(json.dumps(_context(step)), f"focus {step}", created_at=T0 + timedelta(minutes=step))
+            versions[row.id] = {"context": _context(step), "focus_summary": f"focus {step}"}
+        # An identical document is not a new version.
+        assert history.record(json.dumps(_context(7)), "focus 7") is None
+
+        kinds = [row.kind for row in session.query(UserContextVersionORM).order_by(UserContextVersionORM.id)]
+        assert kinds == ["keyframe", "diff", "diff", "keyframe", "diff", "diff", "keyframe", "diff"]
+        for version, document in versions.items():
+            assert history.get_document(version) == document
+
+        # Keep the newest 4: the oldest survivor (a diff) is rewritten as a keyframe.
+        assert history.compact(4) == 4
+        remaining = session.query(UserContextVersionORM).order_by(UserContextVersionORM.id).all()
+        assert [row.id for row in remaining] == [5, 6, 7, 8]
+        assert remaining[0].kind == "keyframe"
+        for version in (5, 6, 7, 8):
+            assert history.get_document(version) == versions[version]
+        assert history.get_document(2) is None
+
+
+def test_snapshot_writes_history_and_rollback_restores_a_version() -> None:
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+
+    with Session() as session:
+        repo = ContextSnapshotRepository(session)
+        for step in range(3):
+            repo.upsert_snapshot(
+                context_json=json.dumps(_context(step)),
+                focus_summary=f"focus {step}",
+                updated_at=T0 + timedelta(minutes=step),
+                evidence_sha256="abc",
+                last_card_id=10 + step,
+                seen_evidence={"1": "hash"},
+            )
+
+        restored = repo.restore_version(1, now=T0 + timedelta(hours=1))
+        assert json.loads(restored.context_json) == _context(0)
+        assert restored.focus_summary == "focus 0"
+        assert restored.last_card_id == 12
+        assert restored.evidence_sha256 is None and restored.seen_evidence_json is None
+
+        latest = ContextHistoryRepository(session).latest()
+        assert (latest.id, latest.source) == (4, "rollback")
+        assert repo.restore_version(99) is None
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+import assistant.db.connection as connection
+from assistant.db.models import CardORM, EnvelopeORM
+from assistant.db.repo_cards import CardsRepository
+from assistant.db.repo_envelopes import EnvelopesRepository
+
+# Tables as created by the original ORM models, before vectors were stored as blobs.
+LEGACY_SCHEMA = [
+    """
+    CREATE TABLE envelopes (
+        id INTEGER NOT NULL,
+        name VARCHAR(255) NOT NULL,
+        summary TEXT,
+        keywords_json JSON NOT NULL,
+        embedding_vector_json JSON NOT NULL,
+        card_count INTEGER NOT NULL,
+        last_card_at DATETIME,
+        created_at DATETIME NOT NULL,
+        updated_at DATETIME NOT NULL,
+        PRIMARY KEY (id),
+        UNIQUE (name)
+    )
+    """,
+    """
+    CREATE TABLE cards (
+        id INTEGER NOT NULL,
+        raw_text TEXT NOT NULL,
+        card_type VARCHAR(50) NOT NULL,
+        description TEXT NOT NULL,
+        due_at DATETIME,
+        assignee_text VARCHAR(255),
+        keywords_json JSON NOT NULL,
+        reasoning_steps_json JSON NOT NULL,
+        embedding_vector_json JSON NOT NULL,
+        envelope_id INTEGER,
+        created_at DATETIME NOT NULL,
+        updated_at DATETIME NOT NULL,
+        PRIMARY KEY (id),
+        FOREIGN KEY(envelope_id) REFERENCES envelopes (id)
+    )
+    """,
+    """
+    CREATE TABLE user_context (
+        id INTEGER NOT NULL,
+        context_json TEXT NOT NULL,
+        focus_summary TEXT,
+        updated_at DATETIME NOT NULL,
+        PRIMARY KEY (id)
+    )
+    """,
+    "INSERT INTO envelopes VALUES (1, 'Q3 Budget', NULL, '[\"budget\"]', '[1.0, 2.0]', 1, NULL, "
+    "'2026-01-01 00:00:00', '2026-01-01 00:00:00')",
+    "INSERT INTO cards VALUES (1, 'Prepare budget', 'task', 'Prepare budget', NULL, NULL, '[\"budget\"]', '[]', "
+    "'[3.0, 4.0]', 1, '2026-01-01 00:00:00', '2026-01-01 00:00:00')",
+]
+
+
+@pytest.mark.parametrize("native_drop_column", [True, False])
+def test_init_db_upgrades_legacy_json_vector_tables(monkeypatch, tmp_path, native_drop_column) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}", future=True)
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.execute(text(statement))
+    monkeypatch.setattr(connection, "engine", engine)
+    monkeypatch.setattr(connection, "SessionLocal", sessionmaker(bind=engine, autoflush=False, future=True))
+    if not native_drop_column:
+        # Exercise the table-rebuild path used on SQLite older than 3.35.
+        monkeypatch.setattr(connection.sqlite3, "sqlite_version_info", (3, 31, 1))
+
+    connection.init_db()
+    connection.init_db()
+
+    inspector = inspect(engine)
+    for table in ("cards", "envelopes"):
+        columns = {col["name"] for col in inspector.get_columns(table)}
+        assert "embedding_vector_json" not in columns and "embedding_vector" in columns
+    assert {ix["name"] for ix in inspector.get_indexes("cards")} >= {"ix_cards_created_at", "ix_cards_envelope_created"}
+
+    with connection.SessionLocal() as session:
+        assert np.allclose(session.get(CardORM, 1).embedding_vector, [3.0, 4.0])
+        assert np.allclose(session.get(EnvelopeORM, 1).embedding_vector, [1.0, 2.0])
+
+        envelope = EnvelopesRepository(session).create_envelope("Groceries")
+        card = CardsRepository(session).create_card(
+            raw_text="Buy milk",
+            card_type="task",
+            description="Buy milk",
+            due_at=None,
+            assignee_text=None,
+            keywords=["milk"],
+            reasoning_steps=[],
+            envelope_id=envelope.id,
+            embedding_vector=[0.5, 0.5],
+        )
+        session.commit()
+        assert card.id == 2 and envelope.id == 2
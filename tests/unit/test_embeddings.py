@@ -1,5 +1,12 @@
+import asyncio
+
+import numpy as np
+import pytest
+
 from assistant.config.settings import Settings
 from assistant.services import embeddings
+from assistant.services.circuit_breaker import CircuitBreaker
+from assistant.services.embedding_cache import EmbeddingCache
 
 
 def test_semantic_similarity_uses_lexical_fallback_when_model_unavailable() -> None:
@@ -10,9 +17,9 @@ def test_semantic_similarity_uses_lexical_fallback_when_model_unavailable() -> N
 
 
 def test_semantic_similarity_uses_model_vectors_when_available(monkeypatch) -> None:
-    settings = Settings(EMBEDDING_PROVIDER="openai", EMBEDDING_API_KEY="dummy")
+    settings = Settings(EMBEDDING_PROVIDER="openai", EMBEDDING_API_KEY="dummy", EMBEDDING_CACHE_PATH="")
 
-    def fake_embed(provider: str, model: str, api_key: str, base_url: str, text: str):
+    def fake_embed(provider: str, model: str, api_key: str, base_url: str, text: str, settings=None):
         if "budget" in text:
             return (1.0, 0.0)
         return (0.0, 1.0)
@@ -22,3 +29,245 @@ def test_semantic_similarity_uses_model_vectors_when_available(monkeypatch) -> N
     same_topic = embeddings.semantic_similarity("budget q3", "budget forecast", settings=settings)
     different_topic = embeddings.semantic_similarity("budget q3", "grocery eggs", settings=settings)
     assert same_topic > different_topic
+
+
+class _FakeEmbeddingItem:
+    def __init__(self, index: int, embedding: list[float]):
+        self.index = index
+        self.embedding = embedding
+
+
+class _FakeEmbeddingsAPI:
+    def __init__(self) -> None:
+        self.calls: list[list[str]] = []
+
+    def create(self, *, model: str, input: list[str]):
+        self.calls.append(list(input))
+        items = [_FakeEmbeddingItem(i, [float(len(text)), 1.0]) for i, text in enumerate(input)]
+
+        class _Response:
+            data = list(reversed(items))
+
+        return _Response()
+
+
+class _FakeClient:
+    def __init__(self) -> None:
+        self.embeddings = _FakeEmbeddingsAPI()
+
+
+def test_model_embed_many_batches_requests_and_preserves_order(monkeypatch, tmp_path) -> None:
+    settings = Settings(
+        _env_file=None,
+        EMBEDDING_PROVIDER="openai",
+        EMBEDDING_API_KEY="dummy",
+        EMBEDDING_BATCH_SIZE=2,
+        EMBEDDING_CONCURRENCY=1,
+        EMBEDDING_CACHE_PATH=str(tmp_path / "embeddings.sqlite3"),
+    )
+    client = _FakeClient()
+    monkeypatch.setattr(embeddings, "_build_client", lambda api_key, base_url: client)
+
+    cached = embeddings.model_embed("a", settings=settings)
+    vectors = embeddings.model_embed_many(["bbb", "a", "cc", "bbb", "dddd"], settings=settings)
+
+    assert cached == [1.0, 1.0]
+    assert [v[0] for v in vectors] == [3.0, 1.0, 2.0, 3.0, 4.0]
+    # "a" is served from cache, duplicates are embedded once, misses go out in batches of two.
+    assert client.embeddings.calls == [["a"], ["bbb", "cc"], ["dddd"]]
+
+
+class _FakeAsyncEmbeddingsAPI(_FakeEmbeddingsAPI):
+    def __init__(self) -> None:
+        super().__init__()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create(self, *, model: str, input: list[str]):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return super().create(model=model, input=input)
+
+
+class _FakeAsyncClient:
+    def __init__(self) -> None:
+        self.embeddings = _FakeAsyncEmbeddingsAPI()
+        self.closed = False
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+def test_model_embed_many_overlaps_batches_up_to_concurrency(monkeypatch) -> None:
+    settings = Settings(
+        _env_file=None,
+        EMBEDDING_PROVIDER="openai",
+        EMBEDDING_API_KEY="dummy",
+        EMBEDDING_BATCH_SIZE=2,
+        EMBEDDING_CONCURRENCY=3,
+        EMBEDDING_CACHE_PATH="",
+    )
+    client = _FakeAsyncClient()
+    monkeypatch.setattr(embeddings, "_build_async_client", lambda api_key, base_url, concurrency: client)
+    texts = [f"note {'x' * i}" for i in range(11)]
+
+    vectors = embeddings.model_embed_many(texts, settings=settings)
+
+    assert [v[0] for v in vectors] == [float(len(t)) for t in texts]
+    assert sorted(len(call) for call in client.embeddings.calls) == [1, 2, 2, 2, 2, 2]
+    assert client.embeddings.max_in_flight == 3
+    assert client.closed
+
+
+def test_model_embed_many_returns_empty_vectors_when_model_unavailable() -> None:
+    settings = Settings(_env_file=None, EMBEDDING_PROVIDER="lexical")
+    assert embeddings.model_embed_many(["one", "two"], settings=settings) == [[], []]
+
+
+def test_persistent_embedding_cache_survives_restart(monkeypatch, tmp_path) -> None:
+    path = str(tmp_path / "embeddings.sqlite3")
+    settings = Settings(_env_file=None, EMBEDDING_PROVIDER="openai", EMBEDDING_API_KEY="dummy", EMBEDDING_CACHE_PATH=path)
+    client = _FakeClient()
+    monkeypatch.setattr(embeddings, "_build_client", lambda api_key, base_url: client)
+
+    first = embeddings.model_embed_many(["budget", "milk"], settings=settings)
+    embeddings.get_embedding_cache(settings).close()
+    embeddings._get_cache.cache_clear()
+
+    second = embeddings.model_embed_many(["milk", "budget"], settings=settings)
+    stats = embeddings.embedding_cache_stats(settings)
+
+    assert second == [first[1], first[0]]
+    assert client.embeddings.calls == [["budget", "milk"]]
+    assert stats.hits == 2 and stats.misses == 0
+    assert stats.entries == 2
+
+
+def test_embedding_cache_evicts_least_recently_used(tmp_path) -> None:
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"), max_entries=2, flush_every=1)
+    cache.put("ollama", "m", "a", (1.0,))
+    cache.put("ollama", "m", "b", (2.0,))
+    cache.get("ollama", "m", "a")
+    cache.flush()
+    cache.put("ollama", "m", "c", (3.0,))
+    cache.close()
+
+    reopened = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"), max_entries=2)
+    assert reopened.get("ollama", "m", "a") == (1.0,)
+    assert reopened.get("ollama", "m", "b") is None
+    assert reopened.get("ollama", "m", "c") == (3.0,)
+    assert reopened.stats().evictions == 0
+
+
+def test_embedding_cache_keys_on_endpoint(tmp_path) -> None:
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"), max_entries=10, flush_every=1)
+    cache.put("openai_compatible", "m", "a", (1.0,), endpoint="http://gpu-a:8000/v1")
+    cache.close()
+
+    reopened = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"), max_entries=10)
+    assert reopened.get("openai_compatible", "m", "a", endpoint="http://gpu-a:8000/v1/") == (1.0,)
+    assert reopened.get("openai_compatible", "m", "a", endpoint="http://gpu-b:8000/v1") is None
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_circuit_breaker_opens_probes_and_backs_off() -> None:
+    clock = _FakeClock()
+    breaker = CircuitBreaker("test", failure_threshold=2, base_cooldown=10, max_cooldown=25, clock=clock)
+
+    breaker.record_failure(RuntimeError("down"))
+    assert breaker.allow() and breaker.state == "closed"
+    breaker.record_failure(RuntimeError("down"))
+    assert breaker.state == "open" and not breaker.allow()
+
+    clock.now = 10
+    assert breaker.allow() and breaker.state == "half_open"
+    assert not breaker.allow()  # only one probe at a time
+    breaker.record_failure(RuntimeError("still down"))
+    assert breaker.stats().cooldown_seconds == 20
+
+    clock.now = 29
+    assert not breaker.allow()
+    clock.now = 30
+    assert breaker.allow()
+    breaker.record_success()
+    stats = breaker.stats()
+    assert (stats.state, stats.cooldown_seconds, stats.times_opened, stats.rejected) == ("closed", 10, 2, 3)
+    assert stats.last_error == "still down"
+
+
+def test_model_embedding_recovers_after_breaker_cooldown(monkeypatch) -> None:
+    settings = Settings(_env_file=None, EMBEDDING_PROVIDER="openai", EMBEDDING_API_KEY="dummy", EMBEDDING_CACHE_PATH="")
+    clock = _FakeClock()
+    breaker = CircuitBreaker("openai", failure_threshold=1, base_cooldown=5, clock=clock)
+    monkeypatch.setattr(embeddings, "_breaker_for", lambda *args: breaker)
+    client = _FakeClient()
+    healthy = client.embeddings.create
+
+    def failing_create(*, model: str, input: list[str]):
+        client.embeddings.calls.append(list(input))
+        raise ConnectionError("connection refused")
+
+    client.embeddings.create = failing_create
+    monkeypatch.setattr(embeddings, "_build_client", lambda api_key, base_url: client)
+
+    assert embeddings.model_embed("first", settings=settings) == []
+    assert embeddings.model_embed("second", settings=settings) == []
+    assert client.embeddings.calls == [["first"]]  # open circuit: no request sent
+
+    client.embeddings.create = healthy
+    clock.now = 5
+    assert embeddings.model_embed("third", settings=settings) == [5.0, 1.0]
+    assert breaker.state == "closed"
+
+
+def test_breaker_is_tuned_from_the_callers_settings(monkeypatch) -> None:
+    settings = Settings(
+        _env_file=None,
+        EMBEDDING_PROVIDER="openai_compatible",
+        EMBEDDING_API_KEY="dummy",
+        EMBEDDING_BASE_URL="http://breaker-test:8000/v1",
+        EMBEDDING_CACHE_PATH="",
+        EMBEDDING_BREAKER_FAILURE_THRESHOLD=1,
+        EMBEDDING_BREAKER_COOLDOWN_SECONDS=60,
+    )
+    client = _FakeClient()
+
+    def failing_create(*, model: str, input: list[str]):
+        client.embeddings.calls.append(list(input))
+        raise ConnectionError("connection refused")
+
+    client.embeddings.create = failing_create
+    monkeypatch.setattr(embeddings, "_build_client", lambda api_key, base_url: client)
+    monkeypatch.setattr(embeddings, "_BREAKERS", {})
+
+    assert embeddings.model_embed("first", settings=settings) == []
+    assert embeddings.model_embed("second", settings=settings) == []
+    # Threshold 1 from these settings (not the process default of 3) opened the circuit.
+    assert client.embeddings.calls == [["first"]]
+    (stats,) = embeddings.embedding_breaker_stats()
+    assert (stats.state, stats.cooldown_seconds) == ("open", 60)
+
+
+def test_lexical_hashed_provider_returns_stable_dense_vectors(monkeypatch) -> None:
+    settings = Settings(_env_file=None, EMBEDDING_PROVIDER="lexical_hashed", EMBEDDING_HASH_DIM=256)
+    monkeypatch.setattr(embeddings, "_build_client", lambda api_key, base_url: pytest.fail("no network expected"))
+
+    vec = embeddings.model_embed("Q3 budget planning with Sarah", settings=settings)
+    assert len(vec) == 256
+    assert np.linalg.norm(vec) == pytest.approx(1.0, abs=1e-5)
+    assert embeddings.model_embed_many(["Q3 budget planning with Sarah", ""], settings=settings) == [vec, []]
+    # crc32 feature hashing: identical across processes, unlike hash().
+    assert np.array_equal(embeddings.hashed_embed("budget", 64), embeddings.hashed_embed("budget", 64))
+
+    related = embeddings.semantic_similarity("q3 budget planning", "budget plans for q3", settings=settings)
+    unrelated = embeddings.semantic_similarity("q3 budget planning", "buy milk tonight", settings=settings)
+    assert related > unrelated
@@ -0,0 +1,200 @@
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from assistant.agents.organization.agent import OrganizationAgent
+from assistant.config.settings import Settings
+from assistant.db.base import Base
+from assistant.db.models import EnvelopeORM
+from assistant.db.repo_envelopes import EnvelopesRepository
+from assistant.schemas.card import ExtractedCard
+from assistant.services.envelope_index import EnvelopeIndex, IVFIndex, _load_index, flush_envelope_index
+
+
+def _clustered_vectors(n: int, dim: int = 16, clusters: int = 8, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    return centers[rng.integers(0, clusters, size=n)] + 0.05 * rng.normal(size=(n, dim))
+
+
+@pytest.mark.parametrize("index", [EnvelopeIndex(), IVFIndex(nprobe=4, min_train=64)])
+def test_index_search_upsert_and_remove(index: EnvelopeIndex) -> None:
+    vectors = _clustered_vectors(400)
+    for envelope_id, vec in enumerate(vectors, start=1):
+        index.upsert(envelope_id, vec)
+    assert len(index) == 400
+
+    assert index.search(vectors[41], k=5)[0][0] == 42
+
+    index.upsert(42, -vectors[41])
+    assert 42 not in [eid for eid, _ in index.search(vectors[41], k=5)]
+    index.remove(7)
+    assert len(index) == 399
+    assert 7 not in [eid for eid, _ in index.search(vectors[6], k=10)]
+
+
+def test_index_persists_and_restores(tmp_path) -> None:
+    path = str(tmp_path / "index.npz")
+    index = IVFIndex(nprobe=4, min_train=64)
+    vectors = _clustered_vectors(200)
+    for envelope_id, vec in enumerate(vectors, start=1):
+        index.upsert(envelope_id, vec)
+    expected = index.search(vectors[10], k=3)
+    index.save(path)
+
+    restored = IVFIndex.restore(path)
+    assert len(restored) == 200
+    assert restored.search(vectors[10], k=3) == expected
+    with pytest.raises(ValueError):
+        EnvelopeIndex.restore(path)
+
+
+def test_route_scores_only_index_candidates(monkeypatch, tmp_path) -> None:
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    settings = Settings(
+        _env_file=None,
+        DATABASE_URL=f"sqlite:///{tmp_path / 'route.db'}",
+        ENVELOPE_INDEX_PATH=str(tmp_path / "index.npz"),
+        ENVELOPE_INDEX_MIN_ENVELOPES=50,
+        ENVELOPE_INDEX_CANDIDATES=4,
+        ENVELOPE_ASSIGN_THRESHOLD=0.3,
+    )
+    _load_index.cache_clear()
+    vectors = _clustered_vectors(120)
+    scored: list[int] = []
+
+    with Session() as session:
+        for i, vec in enumerate(vectors):
+            session.add(EnvelopeORM(name=f"Env {i}", keywords_json=[], embedding_vector=vec, embedding_count=1, card_count=1))
+        session.add(EnvelopeORM(name="Unprofiled", keywords_json=[], card_count=0))
+        session.commit()
+
+        agent = OrganizationAgent(session, settings)
+        original_rank = agent.scorer.rank
+
+        def spy_rank(card_description, card_keywords, envelopes, **kwargs):
+            scored.append(len(envelopes))
+            return original_rank(card_description, card_keywords, envelopes, **kwargs)
+
+        monkeypatch.setattr(agent.scorer, "rank", spy_rank)
+        extracted = ExtractedCard(card_type="task", description="x", context_keywords=[])
+        decision, envelope_id = agent.route(extracted, "x", card_embedding=vectors[30].tolist())
+
+    assert scored == [5]
+    assert envelope_id == 31
+    assert decision.action == "assign"
+    _load_index.cache_clear()
+
+
+def test_envelope_terms_follow_profile_and_summary_writes() -> None:
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    with Session() as session:
+        repo = EnvelopesRepository(session)
+        budget = repo.create_envelope("Q3 Budget", summary="Finance with Sarah")
+        errands = repo.create_envelope("Errands")
+        assert repo.find_by_terms({"sarah"}) == {budget.id}
+
+        repo.update_profile(budget, keywords=["Forecast", "q3"], embedding_vector=[], card_count=1, last_card_at=None)
+        repo.update_profile(errands, keywords=["milk"], embedding_vector=[], card_count=1, last_card_at=None)
+        assert repo.find_by_terms({"forecast"}) == {budget.id}
+        assert repo.find_by_terms({"q3", "milk"}) == {budget.id, errands.id}
+
+        repo.update_profile(budget, keywords=["payroll"], embedding_vector=[], card_count=2, last_card_at=None)
+        repo.update_summary(budget, name="Payroll", summary="HR with Tom")
+        assert repo.find_by_terms({"forecast"}) == set()
+        assert repo.find_by_terms({"sarah"}) == set()
+        assert repo.find_by_terms({"tom", "payroll"}) == {budget.id}
+
+
+def test_route_candidates_include_term_matches_outside_ann_hits(monkeypatch, tmp_path) -> None:
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    settings = Settings(
+        _env_file=None,
+        DATABASE_URL=f"sqlite:///{tmp_path / 'terms.db'}",
+        ENVELOPE_INDEX_PATH="",
+        ENVELOPE_INDEX_MIN_ENVELOPES=50,
+        ENVELOPE_INDEX_CANDIDATES=4,
+    )
+    _load_index.cache_clear()
+    vectors = _clustered_vectors(80)
+    scored: list[set[str]] = []
+
+    with Session() as session:
+        repo = EnvelopesRepository(session)
+        for i, vec in enumerate(vectors):
+            envelope = repo.create_envelope(f"Env {i}")
+            keywords = ["payroll"] if i == 70 else []
+            repo.update_profile(envelope, keywords=keywords, embedding_vector=vec, card_count=1, last_card_at=None)
+        session.commit()
+
+        agent = OrganizationAgent(session, settings)
+        original_rank = agent.scorer.rank
+
+        def spy_rank(card_description, card_keywords, envelopes, **kwargs):
+            scored.append({e.name for e in envelopes})
+            return original_rank(card_description, card_keywords, envelopes, **kwargs)
+
+        monkeypatch.setattr(agent.scorer, "rank", spy_rank)
+        extracted = ExtractedCard(card_type="task", description="x", context_keywords=["payroll"])
+        agent.route(extracted, "x", card_embedding=vectors[3].tolist())
+
+    assert "Env 70" in scored[0] and "Env 3" in scored[0]
+    assert len(scored[0]) <= 5
+    _load_index.cache_clear()
+
+
+def test_index_syncs_from_committed_centroids_only(tmp_path) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'sync.db'}", future=True)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    path = str(tmp_path / "index.npz")
+    settings = Settings(
+        _env_file=None,
+        DATABASE_URL=f"sqlite:///{tmp_path / 'sync.db'}",
+        ENVELOPE_INDEX_PATH=path,
+        ENVELOPE_INDEX_MIN_ENVELOPES=1,
+    )
+    _load_index.cache_clear()
+    vectors = _clustered_vectors(40)
+
+    with Session() as session:
+        for i, vec in enumerate(vectors):
+            session.add(EnvelopeORM(name=f"Env {i}", keywords_json=[], embedding_vector=vec, embedding_count=1, card_count=1))
+        session.commit()
+        agent = OrganizationAgent(session, settings)
+        index = agent.sync_envelope_index()
+        assert len(index) == 40 and index.stamp is not None
+
+        # A centroid written by a transaction that rolls back never reaches the index.
+        envelope = EnvelopesRepository(session).get_by_id(1)
+        EnvelopesRepository(session).update_profile(
+            envelope, keywords=[], embedding_vector=-vectors[0], card_count=2, last_card_at=None
+        )
+        assert agent.sync_envelope_index().search(vectors[0], k=1)[0][0] == 1
+        session.rollback()
+
+        # Another process commits a new centroid: the stamp moves and the row is re-read.
+        with Session() as other:
+            moved = EnvelopesRepository(other).get_by_id(2)
+            EnvelopesRepository(other).update_profile(
+                moved, keywords=[], embedding_vector=vectors[30], card_count=2, last_card_at=None
+            )
+            other.add(EnvelopeORM(name="New", keywords_json=[], embedding_vector=-vectors[5], embedding_count=1, card_count=1))
+            other.commit()
+        index = agent.sync_envelope_index()
+        assert len(index) == 41
+        assert 2 in [eid for eid, _ in index.search(vectors[30], k=2)]
+        assert index.search(-vectors[5], k=1)[0][0] == 41
+
+    # The saved file carries its stamp, so a fresh process syncs forward from it.
+    flush_envelope_index(index, path, force=True)
+    restored = IVFIndex.restore(path)
+    assert (restored.stamp, restored.synced_at) == (index.stamp, index.synced_at)
+    _load_index.cache_clear()
@@ -1,8 +1,14 @@
 from datetime import datetime, timedelta
 
-from assistant.agents.organization.profile import build_envelope_profile
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from assistant.agents.organization.agent import OrganizationAgent
+from assistant.agents.organization.profile import apply_card_to_profile, build_envelope_profile
 from assistant.config.settings import Settings
-from assistant.db.models import CardORM
+from assistant.db.base import Base
+from assistant.db.models import CardORM, EnvelopeORM
 
 
 def test_build_envelope_profile_derives_keywords_and_count() -> None:
@@ -23,3 +29,107 @@ def test_build_envelope_profile_derives_keywords_and_count() -> None:
     assert profile.card_count == 2
     assert "q3" in profile.keywords
     assert "budget" in profile.keywords
+
+
+def test_build_envelope_profile_reuses_stored_card_vectors(monkeypatch) -> None:
+    requested: list[list[str]] = []
+
+    def fake_embed_many(texts, settings=None, batch_size=None):
+        requested.append(list(texts))
+        return [[0.0, 4.0] for _ in texts]
+
+    monkeypatch.setattr("assistant.agents.organization.profile.model_embed_many", fake_embed_many)
+    cards = [
+        CardORM(raw_text="stored one", keywords_json=[], embedding_vector=[1.0, 0.0], created_at=datetime.utcnow()),
+        CardORM(raw_text="stored two", keywords_json=[], embedding_vector=[3.0, 0.0], created_at=datetime.utcnow()),
+        CardORM(raw_text="legacy card", keywords_json=[], embedding_vector=None, created_at=datetime.utcnow()),
+    ]
+    profile = build_envelope_profile(cards, Settings(_env_file=None))
+    assert requested == [["legacy card"]]
+    assert profile.embedding_vector == [4.0 / 3, 4.0 / 3]
+
+
+def test_backfill_card_embeddings_fills_only_missing_vectors(monkeypatch) -> None:
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    monkeypatch.setattr(
+        "assistant.agents.organization.agent.model_embed_many",
+        lambda texts, settings=None, batch_size=None: [[float(len(t))] for t in texts],
+    )
+
+    with Session() as session:
+        session.add(CardORM(raw_text="done", card_type="task", description="done", embedding_vector=[9.0]))
+        for i in range(5):
+            session.add(CardORM(raw_text="x" * (i + 1), card_type="task", description=f"card {i}"))
+        session.commit()
+
+        filled = OrganizationAgent(session, Settings(_env_file=None)).backfill_card_embeddings(batch_size=2)
+        session.commit()
+        vectors = [c.embedding_vector.tolist() for c in session.query(CardORM).order_by(CardORM.id).all()]
+
+    assert filled == 5
+    assert vectors == [[9.0], [1.0], [2.0], [3.0], [4.0], [5.0]]
+
+
+def test_incremental_profile_matches_full_rebuild() -> None:
+    settings = Settings(_env_file=None, EMBEDDING_PROVIDER="lexical")
+    now = datetime.utcnow()
+    cards = [
+        CardORM(
+            raw_text=f"note {i}",
+            keywords_json=["budget", f"k{i % 3}"],
+            embedding_vector=[float(i), 1.0, -float(i)],
+            created_at=now + timedelta(minutes=i),
+        )
+        for i in range(7)
+    ]
+    envelope = EnvelopeORM(name="Budget", keywords_json=[], embedding_vector=None, embedding_count=0, card_count=0)
+    for card in cards:
+        profile = apply_card_to_profile(envelope, card, settings)
+        envelope.keywords_json = profile.keywords
+        envelope.embedding_vector = profile.embedding_vector
+        envelope.embedding_count = profile.embedding_count
+        envelope.keyword_weights_json = profile.keyword_weights
+        envelope.card_count = profile.card_count
+        envelope.last_card_at = profile.last_card_at
+
+    full = build_envelope_profile(list(reversed(cards)), settings)
+    assert envelope.card_count == full.card_count == 7
+    assert envelope.embedding_count == full.embedding_count == 7
+    assert envelope.embedding_vector == pytest.approx(full.embedding_vector)
+    assert envelope.keyword_weights_json == pytest.approx(full.keyword_weights)
+    assert envelope.keywords_json[0] == "budget"
+    assert envelope.last_card_at == full.last_card_at == cards[-1].created_at
+
+
+def test_rebuild_envelope_profile_stores_vectors_it_embeds(monkeypatch) -> None:
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    requested: list[list[str]] = []
+
+    def fake_embed_many(texts, settings=None, batch_size=None):
+        requested.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+    monkeypatch.setattr("assistant.agents.organization.agent.model_embed_many", fake_embed_many)
+    monkeypatch.setattr("assistant.agents.organization.profile.model_embed_many", fake_embed_many)
+    with Session() as session:
+        envelope = EnvelopeORM(name="Budget", keywords_json=[])
+        session.add(envelope)
+        session.flush()
+        session.add(CardORM(raw_text="abc", card_type="task", description="abc", envelope_id=envelope.id))
+        session.add(
+            CardORM(raw_text="ab", card_type="task", description="ab", envelope_id=envelope.id, embedding_vector=[4.0, 1.0])
+        )
+        session.commit()
+
+        agent = OrganizationAgent(session, Settings(_env_file=None, ENVELOPE_INDEX_PATH=""))
+        agent.rebuild_envelope_profile(envelope.id)
+        session.commit()
+        agent.rebuild_envelope_profile(envelope.id)
+
+        assert requested == [["abc"]]
+        assert session.query(CardORM).filter(CardORM.raw_text == "abc").one().embedding_vector.tolist() == [3.0, 1.0]
+        assert list(envelope.embedding_vector) == pytest.approx([3.5, 1.0])
@@ -0,0 +1,184 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from assistant.config.settings import Settings
+from assistant.db.base import Base
+from assistant.db.models import BackgroundJobORM
+from assistant.db.repo_jobs import (
+    JOB_REFINE_ENVELOPE,
+    JOB_THINKING_RUN,
+    JOB_UPDATE_CONTEXT,
+    JobsRepository,
+    retry_delay_seconds,
+)
+from assistant.pipeline.worker import WorkerPool
+
+T0 = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def _session_factory(url: str = "sqlite+pysqlite:///:memory:"):
+    engine = create_engine(url, future=True)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+
+
+def test_enqueue_collapses_pending_duplicates() -> None:
+    with _session_factory()() as session:
+        repo = JobsRepository(session)
+        first = repo.enqueue_refine(7, now=T0)
+        assert repo.enqueue_refine(7, now=T0).id == first.id
+        repo.enqueue_context_update(11, now=T0)
+        context = repo.enqueue_context_update(12, now=T0)
+        assert context.subject_id == 12
+        assert len(repo.list_pending()) == 2
+
+        # Once running, a new request for the same envelope queues a fresh pass.
+        claimed = repo.claim("w1", lease_seconds=60, kinds=[JOB_REFINE_ENVELOPE], now=T0)
+        assert [job.id for job in claimed] == [first.id]
+        assert repo.enqueue_refine(7, now=T0).id != first.id
+        session.commit()
+        assert repo.count_by_status() == {"pending": 2, "running": 1}
+
+
+def test_claim_orders_by_priority_and_honours_kind_limits() -> None:
+    with _session_factory()() as session:
+        repo = JobsRepository(session)
+        context = repo.enqueue_context_update(1, now=T0)
+        refine = repo.enqueue_refine(3, now=T0)
+        thinking_a = repo.enqueue(JOB_THINKING_RUN, now=T0)
+        thinking_b = repo.enqueue(JOB_THINKING_RUN, now=T0)
+        limits = {JOB_THINKING_RUN: 1}
+
+        first = repo.claim("w1", lease_seconds=60, limit=2, kind_limits=limits, now=T0)
+        assert [job.id for job in first] == [refine.id, context.id]
+        assert [job.id for job in repo.claim("w1", lease_seconds=60, kind_limits=limits, now=T0)] == [thinking_a.id]
+        assert repo.claim("w2", lease_seconds=60, kind_limits=limits, now=T0) == []
+
+        assert repo.complete(thinking_a, "w1", {"ok": True}, now=T0)
+        assert [job.id for job in repo.claim("w2", lease_seconds=60, kind_limits=limits, now=T0)] == [thinking_b.id]
+
+
+def test_expired_lease_is_reclaimed_and_stale_worker_loses_completion() -> None:
+    with _session_factory()() as session:
+        repo = JobsRepository(session)
+        job = repo.enqueue_refine(5, now=T0)
+        repo.claim("crashed", lease_seconds=30, now=T0)
+        assert repo.claim("w2", lease_seconds=30, now=T0 + timedelta(seconds=10)) == []
+
+        reclaimed = repo.claim("w2", lease_seconds=30, now=T0 + timedelta(seconds=31))
+        assert [j.id for j in reclaimed] == [job.id]
+        assert reclaimed[0].attempts == 2
+        assert not repo.complete(job, "crashed")
+        assert repo.complete(job, "w2")
+
+
+def test_expired_lease_on_last_attempt_is_dead_lettered() -> None:
+    with _session_factory()() as session:
+        repo = JobsRepository(session)
+        job = repo.enqueue(JOB_THINKING_RUN, max_attempts=2, now=T0)
+        repo.claim("crashed", lease_seconds=30, now=T0)
+        assert repo.claim("crashed-again", lease_seconds=30, now=T0 + timedelta(seconds=31))
+
+        assert repo.claim("w3", lease_seconds=30, now=T0 + timedelta(seconds=62)) == []
+        dead = repo.get(job.id)
+        assert (dead.status, dead.attempts, dead.lease_owner) == ("failed", 2, None)
+        assert dead.error_text == "lease expired after 2 attempts"
+        assert not repo.complete(job, "crashed-again")
+
+
+def test_failures_back_off_then_dead_letter_and_can_be_requeued() -> None:
+    with _session_factory()() as session:
+        repo = JobsRepository(session)
+        job = repo.enqueue(JOB_THINKING_RUN, max_attempts=2, now=T0)
+        backoff = {"retry_base_seconds": 10, "retry_max_seconds": 60}
+
+        repo.claim("w1", lease_seconds=60, now=T0)
+        assert repo.fail(job, "w1", "timeout", now=T0, **backoff) == "pending"
+        assert repo.claim("w1", lease_seconds=60, now=T0 + timedelta(seconds=9)) == []
+        assert repo.claim("w1", lease_seconds=60, now=T0 + timedelta(seconds=10))
+        assert repo.fail(job, "w1", "timeout again", now=T0 + timedelta(seconds=10), **backoff) == "failed"
+        assert repo.get(job.id).error_text == "timeout again"
+
+        assert repo.requeue_failed() == 1
+        assert repo.get(job.id).status == "pending" and repo.get(job.id).attempts == 0
+    assert [retry_delay_seconds(n, 5, 30) for n in (1, 2, 3, 4, 5)] == [5, 10, 20, 30, 30]
+
+
+def test_failed_attempt_is_superseded_by_newer_pending_duplicate() -> None:
+    with _session_factory()() as session:
+        repo = JobsRepository(session)
+        running = repo.enqueue_refine(9, now=T0)
+        repo.claim("w1", lease_seconds=60, now=T0)
+        newer = repo.enqueue_refine(9, now=T0)
+        status = repo.fail(running, "w1", "boom", retry_base_seconds=1, retry_max_seconds=1, now=T0)
+        assert status == "superseded"
+        assert [job.id for job in repo.list_pending()] == [newer.id]
+
+
+def test_worker_pool_runs_each_job_once_across_threads(tmp_path) -> None:
+    Session = _session_factory(f"sqlite+pysqlite:///{tmp_path / 'jobs.db'}")
+    settings = Settings(
+        _env_file=None,
+        BACKGROUND_POLL_SECONDS=0.05,
+        JOB_RETRY_BASE_SECONDS=0,
+        JOB_KIND_LIMITS=f"{JOB_UPDATE_CONTEXT}=1",
+    )
+    with Session() as session:
+        repo = JobsRepository(session)
+        for envelope_id in range(1, 13):
+            repo.enqueue_refine(envelope_id)
+        for card_id in range(1, 4):
+            repo.enqueue(JOB_UPDATE_CONTEXT, card_id)
+        session.commit()
+
+    runs: list[tuple[str, int]] = []
+    lock = threading.Lock()
+    active = {"context": 0, "max_context": 0}
+    flaky = {"failed": False}
+
+    def refine(session, settings, job: BackgroundJobORM):
+        if job.subject_id == 4 and not flaky["failed"]:
+            flaky["failed"] = True
+            raise RuntimeError("transient")
+        time.sleep(0.01)
+        with lock:
+            runs.append((job.kind, job.subject_id))
+        return {"envelope_id": job.subject_id}
+
+    def update_context(session, settings, job: BackgroundJobORM):
+        with lock:
+            active["context"] += 1
+            active["max_context"] = max(active["max_context"], active["context"])
+        time.sleep(0.03)
+        with lock:
+            active["context"] -= 1
+            runs.append((job.kind, job.subject_id))
+        return {"messages": []}
+
+    pool = WorkerPool(
+        Session,
+        settings,
+        threads=4,
+        handlers={JOB_REFINE_ENVELOPE: refine, JOB_UPDATE_CONTEXT: update_context},
+    ).start()
+    try:
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            with Session() as session:
+                if JobsRepository(session).count_by_status() == {"done": 15}:
+                    break
+            time.sleep(0.05)
+    finally:
+        pool.stop()
+
+    assert sorted(runs) == sorted(
+        [(JOB_REFINE_ENVELOPE, i) for i in range(1, 13)] + [(JOB_UPDATE_CONTEXT, i) for i in range(1, 4)]
+    )
+    assert active["max_context"] == 1
+    with Session() as session:
+        retried = session.query(BackgroundJobORM).filter(BackgroundJobORM.subject_id == 4).one()
+        assert retried.attempts == 2 and retried.status == "done"
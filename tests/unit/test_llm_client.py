@@ -0,0 +1,112 @@
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from pydantic import BaseModel
+
+from assistant.agents.ingestion.extractor import get_ingestion_pipeline
+from assistant.config.settings import Settings
+from assistant.llm.cache import CachedLLM, LLMResponseCache
+from assistant.llm.client import build_chat_model, build_structured_model, with_response_cache
+
+
+class _Output(BaseModel):
+    name: str
+
+
+def _settings(**overrides) -> Settings:
+    values = {"LLM_PROVIDER": "ollama", "LLM_MODEL": "llama3.1:8b", **overrides}
+    return Settings(_env_file=None, **values)
+
+
+def test_chat_models_are_shared_per_llm_config() -> None:
+    first = build_chat_model(_settings())
+    assert build_chat_model(_settings()) is first
+    assert build_chat_model(_settings(LLM_MODEL="qwen2.5:7b")) is not first
+
+
+def test_structured_runnables_and_ingestion_pipelines_are_reused() -> None:
+    runnable = build_structured_model(_settings(), _Output)
+    assert build_structured_model(_settings(), _Output) is runnable
+
+    pipeline = get_ingestion_pipeline(_settings(), "ingestion.extract.v11")
+    assert get_ingestion_pipeline(_settings(), "ingestion.extract.v11") is pipeline
+    assert pipeline.llm is build_chat_model(_settings())
+    assert get_ingestion_pipeline(_settings(), "ingestion.extract.v12") is not pipeline
+
+
+class _CountingLLM:
+    def __init__(self, response) -> None:
+        self.response = response
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        return self.response
+
+
+def _messages(note: str) -> list:
+    return [SystemMessage(content="system"), HumanMessage(content=note)]
+
+
+def test_response_cache_replays_identical_requests(tmp_path) -> None:
+    settings = _settings(LLM_CACHE_ENABLED=True, LLM_CACHE_PATH=str(tmp_path / "llm_cache.sqlite3"))
+    inner = _CountingLLM(_Output(name="Budget"))
+    llm = with_response_cache(inner, settings, prompt_version="envelope_refine.v3", schema=_Output)
+
+    assert llm.invoke(_messages("q3 budget")) == _Output(name="Budget")
+    assert llm.invoke(_messages("q3 budget")) == _Output(name="Budget")
+    assert inner.calls == 1
+    llm.invoke(_messages("milk"))
+    with_response_cache(inner, settings, prompt_version="envelope_refine.v4", schema=_Output).invoke(
+        _messages("q3 budget")
+    )
+    assert inner.calls == 3
+
+    chat = _CountingLLM(AIMessage(content='{"name": "x"}'))
+    cached_chat = with_response_cache(chat, settings, prompt_version="ingestion.extract.v12")
+    cached_chat.invoke(_messages("q3 budget"))
+    assert cached_chat.invoke(_messages("q3 budget")).content == '{"name": "x"}'
+    assert chat.calls == 1
+
+    stats = llm.cache.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (2, 4, 4)
+
+
+def test_response_cache_keys_on_the_endpoint(tmp_path) -> None:
+    path = str(tmp_path / "llm_cache.sqlite3")
+    inner = _CountingLLM(_Output(name="Budget"))
+
+    def cached(base_url: str):
+        settings = _settings(LLM_CACHE_ENABLED=True, LLM_CACHE_PATH=path, LLM_BASE_URL=base_url)
+        return with_response_cache(inner, settings, prompt_version="envelope_refine.v3", schema=_Output)
+
+    cached("http://gpu-a:11434/v1").invoke(_messages("q3 budget"))
+    cached("http://gpu-a:11434/v1/").invoke(_messages("q3 budget"))
+    assert inner.calls == 1
+    cached("http://gpu-b:11434/v1").invoke(_messages("q3 budget"))
+    assert inner.calls == 2
+
+
+def test_response_cache_is_opt_in() -> None:
+    inner = _CountingLLM(_Output(name="x"))
+    assert with_response_cache(inner, _settings(), prompt_version="v1", schema=_Output) is inner
+
+
+def test_response_cache_expires_and_caps_entries() -> None:
+    now = [0.0]
+    cache = LLMResponseCache(":memory:", ttl_seconds=60, max_entries=2, clock=lambda: now[0])
+    inner = _CountingLLM(_Output(name="x"))
+    llm = CachedLLM(inner, cache, model="ollama:llama3.1:8b", prompt_version="v1", schema=_Output)
+
+    llm.invoke(_messages("a"))
+    now[0] = 61
+    llm.invoke(_messages("a"))  # expired: refreshed from the model
+    now[0] = 62
+    llm.invoke(_messages("b"))
+    now[0] = 63
+    llm.invoke(_messages("a"))  # hit, most recently used
+    llm.invoke(_messages("c"))  # evicts "b"
+    llm.invoke(_messages("b"))
+
+    stats = cache.stats()
+    assert inner.calls == 5
+    assert (stats.hits, stats.expired, stats.entries) == (1, 1, 2)
+    assert stats.evictions == 2
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 import pytest
@@ -119,3 +120,43 @@ def test_resolve_prompt_version_missing_template_file_raises(tmp_path: Path, mon
 
     with pytest.raises(FileNotFoundError, match="not found for version"):
         resolve_prompt_version("ingestion", "ingestion.extract.v1")
+
+
+def test_compiled_prompt_is_cached_until_file_changes(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(prompt_loader, "PROMPTS_DIR", tmp_path)
+    template = tmp_path / "greeting.jinja"
+    template.write_text("hello {{ name }}", encoding="utf-8")
+    reads: list[Path] = []
+    original_read_bytes = Path.read_bytes
+
+    def counting_read_bytes(self: Path) -> bytes:
+        reads.append(self)
+        return original_read_bytes(self)
+
+    monkeypatch.setattr(Path, "read_bytes", counting_read_bytes)
+
+    first = prompt_loader.compile_prompt("greeting.jinja")
+    assert load_prompt("greeting.jinja", name="Sarah") == "hello Sarah"
+    assert prompt_loader.compile_prompt("greeting.jinja") is first
+    assert reads == [template]
+
+    # Same content with a new mtime: re-hashed, but the compiled template is kept.
+    stat = template.stat()
+    os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert prompt_loader.compile_prompt("greeting.jinja") is first
+
+    template.write_text("hi {{ name }}, see {{ topic }}", encoding="utf-8")
+    os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000))
+    assert load_prompt("greeting.jinja", name="Sarah", topic=None) == "hi Sarah, see "
+    with pytest.raises(ValueError, match="topic"):
+        load_prompt("greeting.jinja", name="Sarah")
+
+    template.unlink()
+    with pytest.raises(FileNotFoundError, match="Prompt template not found"):
+        load_prompt("greeting.jinja")
+
+
+def test_load_registry_returns_independent_copies() -> None:
+    registry = load_registry("ingestion")
+    registry["versions"].clear()
+    assert load_registry("ingestion")["versions"]
@@ -1,5 +1,8 @@
+import math
 from datetime import datetime
 
+import pytest
+
 from assistant.config.settings import Settings
 from assistant.db.models import EnvelopeORM
 from assistant.services.scoring import EnvelopeScorer
@@ -17,3 +20,43 @@ def test_scorer_prefers_related_envelope() -> None:
     )
     assert result.envelope is not None
     assert result.envelope.name == "Q3 Budget Project"
+
+
+def test_rank_vectorized_scores_match_formula_and_return_top_k() -> None:
+    settings = Settings(_env_file=None, EMBEDDING_WEIGHT=0.5, KEYWORD_WEIGHT=0.3, ENTITY_WEIGHT=0.3)
+    scorer = EnvelopeScorer(settings)
+    now = datetime.utcnow()
+    envelopes = [
+        EnvelopeORM(id=101, name="Budget", summary="q3 finance", keywords_json=["budget", "q3"],
+                    embedding_vector=[1.0, 0.0, 0.0], embedding_count=1, card_count=1, updated_at=now),
+        EnvelopeORM(id=102, name="Errands", summary="home with Sarah", keywords_json=["milk"],
+                    embedding_vector=[0.0, 2.0, 0.0], embedding_count=1, card_count=1, updated_at=now),
+        EnvelopeORM(id=103, name="Mixed", summary="misc", keywords_json=["budget"],
+                    embedding_vector=[1.0, 1.0, 0.0], embedding_count=1, card_count=1, updated_at=now),
+    ]
+    card_vec = [3.0, 4.0, 0.0]
+
+    ranked = scorer.rank("call sarah", ["budget", "q3"], envelopes, card_embedding=card_vec, assignee="Sarah", top_k=2)
+
+    expected = {
+        101: 0.5 * 0.6 + 0.3 * 1.0,
+        102: 0.5 * 0.8 + 0.3 * 1.0,
+        103: 0.5 * (7 / (5 * math.sqrt(2))) + 0.3 * 0.5,
+    }
+    assert [r.envelope.id for r in ranked] == sorted(expected, key=expected.get, reverse=True)[:2]
+    for item in ranked:
+        assert item.score == pytest.approx(expected[item.envelope.id], abs=1e-6)
+    assert ranked[0].reason == "embedding=0.80, keyword=0.00, assignee=1.00"
+    assert scorer.choose_best("call sarah", ["budget", "q3"], envelopes, card_embedding=card_vec).envelope.id == 103
+
+
+def test_assignee_and_keyword_overlap_are_term_set_lookups() -> None:
+    scorer = EnvelopeScorer(Settings(_env_file=None, EMBEDDING_PROVIDER="lexical"))
+    now = datetime.utcnow()
+    envelope = EnvelopeORM(id=201, name="Vendor sync", summary="Weekly call with Sarah Lee.",
+                           keywords_json=["Vendor", "Contracts"], card_count=3, updated_at=now)
+
+    score, reason = scorer.score("x", ["vendor", "renewal"], envelope, card_embedding=[], assignee="sarah lee")
+    assert reason.endswith("keyword=0.33, assignee=1.00")
+    _, reason = scorer.score("x", ["vendor"], envelope, card_embedding=[], assignee="Tom")
+    assert reason.endswith("assignee=0.00")
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from assistant.db.base import Base
+from assistant.db.models import IngestionStageTimingORM
+from assistant.db.repo_events import EventsRepository
+from assistant.observability.timings import StageTimer, percentile
+
+
+def test_stage_timer_accumulates_repeated_stages() -> None:
+    ticks = iter([0.0, 1.0, 1.25, 2.0, 2.5, 3.0])
+    timer = StageTimer(clock=lambda: next(ticks))
+    with timer.stage("refine"):
+        pass
+    with timer.stage("refine"):
+        pass
+    timer.add("extract", 120)
+    assert timer.stages == {"refine": 750.0, "extract": 120.0}
+    assert timer.elapsed_ms() == 3000.0
+    assert [percentile(list(range(1, 101)), q) for q in (50, 95, 99, 100)] == [50, 95, 99, 100]
+    assert percentile([], 50) == 0.0
+
+
+def test_stage_latency_stats_reports_percentiles_per_stage_in_window() -> None:
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    now = datetime(2026, 1, 2, 12, 0, 0)
+
+    with Session() as session:
+        repo = EventsRepository(session)
+        for idx in range(1, 101):
+            repo.log_ingestion(
+                model_name="m",
+                prompt_version="p",
+                schema_version="s",
+                success=True,
+                latency_ms=idx,
+                stage_timings={"extract": float(idx), "commit": 2.0},
+            )
+        session.flush()
+        session.query(IngestionStageTimingORM).update({IngestionStageTimingORM.created_at: now})
+        old = repo.log_ingestion(
+            model_name="m", prompt_version="p", schema_version="s", success=True, latency_ms=1, stage_timings={"route": 9.0}
+        )
+        session.flush()
+        old.stage_timings[0].created_at = now - timedelta(days=2)
+        session.commit()
+
+        rows = repo.stage_latency_stats(now - timedelta(hours=24))
+
+    assert [row.stage for row in rows] == ["extract", "commit"]
+    extract = rows[0]
+    assert (extract.count, extract.p50_ms, extract.p95_ms, extract.p99_ms, extract.max_ms) == (100, 50, 95, 99, 100)
+    assert rows[1].p99_ms == 2.0
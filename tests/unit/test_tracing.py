@@ -0,0 +1,80 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from assistant.observability.tracing import (
+    JsonlSpanExporter,
+    propagate,
+    read_spans,
+    render_trace,
+    set_exporter,
+    slowest_traces,
+    span,
+    traced,
+)
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    set_exporter(JsonlSpanExporter(str(path), max_bytes=0, backup_count=0), trace_db_queries=True)
+    yield path
+    set_exporter(None)
+
+
+def test_spans_nest_across_threads_and_record_errors(trace_file) -> None:
+    @traced("work")
+    def work(value: int) -> int:
+        if value == 2:
+            raise ValueError("bad value")
+        return value
+
+    with span("root", notes=3) as root:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(propagate(work), value) for value in (1, 2, 3)]
+        root.set_attribute("done", True)
+    assert [f.exception() is None for f in futures] == [True, False, True]
+
+    records = read_spans(str(trace_file))
+    by_name = {}
+    for record in records:
+        by_name.setdefault(record["name"], []).append(record)
+    (root_record,) = by_name["root"]
+    assert root_record["parent_id"] is None and root_record["attributes"] == {"notes": 3, "done": True}
+    assert {r["parent_id"] for r in by_name["work"]} == {root_record["span_id"]}
+    assert {r["trace_id"] for r in records} == {root_record["trace_id"]}
+    assert [r["status"] for r in by_name["work"]].count("error") == 1
+
+
+def test_db_queries_inside_spans_are_traced_and_summarized(trace_file) -> None:
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))  # outside any span: not recorded
+        for name, count in (("fast", 1), ("slow", 3)):
+            with span(name):
+                with span("load"):
+                    for _ in range(count):
+                        conn.execute(text("SELECT 1"))
+
+    records = read_spans(str(trace_file))
+    queries = [r for r in records if r["name"] == "db.query"]
+    assert len(queries) == 4 and queries[0]["attributes"]["sql"] == "SELECT 1"
+
+    traces = slowest_traces(records, limit=5)
+    assert sorted(t.name for t in traces) == ["fast", "slow"]
+    slow = slowest_traces(records, name="slow")[0]
+    lines = render_trace(slow)
+    assert [line.split("%  ")[1] for line in lines] == ["slow", "load", "db.query x3"]
+
+
+def test_read_spans_includes_rotated_files_and_skips_torn_lines(tmp_path) -> None:
+    path = tmp_path / "traces.jsonl"
+    old = {"trace_id": "a", "span_id": "1", "parent_id": None, "name": "old", "duration_ms": 5.0}
+    new = {"trace_id": "b", "span_id": "2", "parent_id": None, "name": "new", "duration_ms": 1.0}
+    (tmp_path / "traces.jsonl.1").write_text(json.dumps(old) + "\n", encoding="utf-8")
+    path.write_text(json.dumps(new) + "\n{\"trace_id\": \"c\", \"span", encoding="utf-8")
+
+    assert [r["name"] for r in read_spans(str(path))] == ["old", "new"]
+    assert [t.name for t in slowest_traces(read_spans(str(path)), limit=1)] == ["old"]
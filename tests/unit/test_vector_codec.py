@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from assistant.db.base import Base
+from assistant.db.models import CardORM
+from assistant.db.types import decode_vector, encode_vector
+
+
+def test_float32_round_trip_is_zero_copy_view() -> None:
+    vec = [0.25, -1.5, 3.0]
+    blob = encode_vector(vec)
+    assert len(blob) == 8 + 4 * len(vec)
+    decoded = decode_vector(blob)
+    assert decoded.dtype == np.float32
+    assert decoded.tolist() == vec
+    assert not decoded.flags.owndata
+    assert not decoded.flags.writeable
+
+
+@pytest.mark.parametrize("dtype,bytes_per_dim,tolerance", [("float16", 2, 1e-3), ("int8", 1, 1e-2)])
+def test_compact_dtypes_round_trip_within_tolerance(dtype: str, bytes_per_dim: int, tolerance: float) -> None:
+    vec = np.linspace(-1.0, 1.0, 64, dtype=np.float32)
+    blob = encode_vector(vec, dtype)
+    assert len(blob) == 8 + bytes_per_dim * vec.size
+    assert np.allclose(decode_vector(blob), vec, atol=tolerance)
+
+
+def test_unknown_dtype_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        encode_vector([1.0], "float64")
+
+
+def test_card_embedding_vector_round_trips_through_sqlite() -> None:
+    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    with Session() as session:
+        session.add(CardORM(raw_text="a", card_type="task", description="a", embedding_vector=[1.0, 2.0, 3.0]))
+        session.add(CardORM(raw_text="b", card_type="task", description="b", embedding_vector=[]))
+        session.commit()
+
+    with Session() as session:
+        first, second = session.query(CardORM).order_by(CardORM.id).all()
+        assert first.embedding_vector.tolist() == [1.0, 2.0, 3.0]
+        assert second.embedding_vector is None
+        first.description = "changed"
+        session.commit()
+        assert session.get(CardORM, first.id).embedding_vector.tolist() == [1.0, 2.0, 3.0]